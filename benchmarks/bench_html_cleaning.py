@@ -0,0 +1,78 @@
+"""
+Compare HTML cleaning stage of csv_cleaner: BeautifulSoup in one process (old path) against lxml text content in
+process pool. Large CSV fixture with the same columns as indeed spider output is generated on the fly.
+
+Run from the repository root:
+    python -m benchmarks.bench_html_cleaning --rows 50000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from parser.clean_csv.csv_cleaner import clean_job_raw_data
+
+
+FIELDS = ['keyword', 'location', 'page', 'position', 'company', 'jobkey', 'jobTitle', 'jobDescription', 'salaryMax',
+          'salaryMin', 'salaryText']
+WORDS = ['python', 'django', 'sql', 'aws', 'docker', 'kubernetes', 'team', 'experience', 'design', 'develop',
+         'data', 'pipeline', 'cloud', 'testing', 'agile', 'communication', 'api', 'linux', 'git', 'security']
+
+
+def make_description(rnd: random.Random) -> str:
+    """Build HTML description similar to sanitizedJobDescription"""
+    paragraphs = []
+    for _ in range(rnd.randint(3, 8)):
+        items = ''.join(f'<li>{" ".join(rnd.choices(WORDS, k=8))}</li>' for _ in range(rnd.randint(2, 6)))
+        paragraphs.append(f'<p><b>{rnd.choice(WORDS).title()}</b>\n{" ".join(rnd.choices(WORDS, k=40))}</p>'
+                          f'<ul>{items}</ul>')
+    return f'<div>{"".join(paragraphs)}</div>'
+
+
+def make_fixture(path: str, rows: int, seed=0) -> None:
+    """Write crawled-like CSV file with given number of rows"""
+    rnd = random.Random(seed)
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(FIELDS)
+        for idx in range(rows):
+            salary_min = rnd.randint(20, 80)
+            hourly = rnd.random() < 0.3
+            if not hourly:
+                salary_min *= 2000
+            writer.writerow([
+                'python', '', idx // 15 + 1, idx % 15, 'Company', f'{idx:016x}', 'Python Developer',
+                make_description(rnd), salary_min * 1.2, salary_min, 'an hour' if hourly else 'a year',
+            ])
+
+
+def bench(path: str, output_dir: str, **kwargs) -> float:
+    started = time.perf_counter()
+    clean_job_raw_data(path, 'bench', output_dir=output_dir, **kwargs)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, 'fixture.csv')
+        make_fixture(fixture, args.rows)
+        print(f'fixture: {args.rows} rows, {os.path.getsize(fixture) / 2 ** 20:.1f} MiB')
+        cases = [
+            ('beautifulsoup, 1 process', dict(fast=False, workers=1)),
+            ('lxml, 1 process', dict(fast=True, workers=1)),
+            (f'lxml, {args.workers} processes', dict(fast=True, workers=args.workers)),
+        ]
+        for name, kwargs in cases:
+            elapsed = bench(fixture, tmp, **kwargs)
+            print(f'{name:<28} {elapsed:8.2f}s {args.rows / elapsed:10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Compare parsing of Indeed pages in spider callbacks: non-greedy regex over the whole page with full json.loads (old
+path) against extraction module (one substring search, decoding of the object only, orjson when installed).
+Pages are saved Indeed HTML files (search pages have "mosaic-provider-jobcards" data, job pages have "_initialData"),
+responses of crawl recorded with ARCHIVE_MODE=record or synthetic pages of realistic size which are generated on the
+fly.
+
+Run from the repository root:
+    python -m benchmarks.bench_parsing --pages 2000
+    python -m benchmarks.bench_parsing --fixtures path/to/saved/html --workers 4
+    python -m benchmarks.bench_parsing --archive data/responses.sqlite
+"""
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_html_cleaning import WORDS, make_description
+from indeed_project.indeed_project.archive import ResponseArchive
+from indeed_project.indeed_project.extraction import (
+    JOB_MARKER, SEARCH_MARKER, ExtractionError, orjson, parse_job_page, parse_search_page,
+)
+
+
+SEARCH_RE = re.compile(r'window.mosaic.providerData\["mosaic-provider-jobcards"]=(\{.+?\});')
+JOB_RE = re.compile(r"_initialData=(\{.+?\});")
+
+
+def make_page(head: str, marker: str, data: dict, rnd: random.Random) -> str:
+    """Page with several scripts around hidden data like Indeed has"""
+    noise = ''.join(f'<script>var cfg{idx}={json.dumps({"w": rnd.choices(WORDS, k=200)})};</script>'
+                    for idx in range(20))
+    return (f'<html><head>{head}{noise}</head><body><div id="app"></div>'
+            f'<script type="text/javascript">window.foo=1;{marker}{json.dumps(data)};window.bar=2;</script>'
+            f'{noise}</body></html>')
+
+
+def make_search_page(rnd: random.Random) -> str:
+    results = [{
+        'jobkey': f'{rnd.getrandbits(64):016x}',
+        'title': ' '.join(rnd.choices(WORDS, k=3)),
+        'snippet': make_description(rnd)[:500],
+        'taxonomyAttributes': [{'attributes': [{'label': rnd.choice(WORDS), 'suid': 'ABCDE'}]} for _ in range(10)],
+    } for _ in range(15)]
+    data = {'metaData': {'mosaicProviderJobCardsModel': {
+        'results': results, 'tierSummaries': [{'jobCount': rnd.randint(10, 900)}],
+    }}}
+    return make_page('<title>Search</title>', SEARCH_MARKER, data, rnd)
+
+
+def make_job_page(rnd: random.Random) -> str:
+    salary_min = rnd.randint(40, 160) * 1000
+    data = {
+        'jobInfoWrapperModel': {'jobInfoModel': {
+            'companyName': 'Company', 'jobTitle': 'Python Developer',
+            'sanitizedJobDescription': make_description(rnd),
+        }},
+        'salaryInfoModel': {'salaryMin': salary_min, 'salaryMax': salary_min * 1.2, 'salaryText': 'a year'},
+        'hostQueryExecutionResult': {'data': [{'key': rnd.choice(WORDS), 'value': 'x' * 100} for _ in range(200)]},
+    }
+    return make_page('<title>Job</title>', JOB_MARKER, data, rnd)
+
+
+def make_fixtures(fixtures_dir: str, pages: int, seed=0) -> None:
+    """Write synthetic pages as .html files, half of them are search results pages, half are job pages"""
+    rnd = random.Random(seed)
+    for idx in range(pages):
+        with open(os.path.join(fixtures_dir, f'{idx:06d}.html'), 'w', encoding='utf-8') as dest:
+            dest.write(make_search_page(rnd) if idx % 2 == 0 else make_job_page(rnd))
+
+
+def list_fixtures(fixtures_dir: str) -> list[str]:
+    return [os.path.join(fixtures_dir, name) for name in sorted(os.listdir(fixtures_dir))
+            if name.endswith(('.html', '.htm'))]
+
+
+def parse_old(text: str) -> None:
+    """Old spider callbacks parsing"""
+    if SEARCH_MARKER in text:
+        json_all = json.loads(SEARCH_RE.findall(text)[0])
+        [job['jobkey'] for job in json_all['metaData']['mosaicProviderJobCardsModel']['results']]
+    else:
+        json_blob = json.loads(JOB_RE.findall(text)[0])
+        json_blob['jobInfoWrapperModel']['jobInfoModel'].get('sanitizedJobDescription')
+
+
+def parse_new(text: str) -> None:
+    try:
+        parse_search_page(text)
+    except ExtractionError:
+        parse_job_page(text)
+
+
+PARSERS = {'regex + json': parse_old, 'extraction': parse_new}
+
+
+def load_pages(source: str, shard=0, shards=1) -> list[str]:
+    """Pages of every shards-th .html file of directory or of response archive file"""
+    if os.path.isdir(source):
+        pages = []
+        for path in list_fixtures(source)[shard::shards]:
+            with open(path, 'r', encoding='utf-8', errors='replace') as html_file:
+                pages.append(html_file.read())
+        return pages
+    archive = ResponseArchive(source)
+    try:
+        return [response.text for response in archive.iter_responses(shard, shards)]
+    finally:
+        archive.close()
+
+
+def run(parser_name: str, source: str, shard=0, shards=1) -> tuple[int, float]:
+    """
+    Parse pages of one shard, only parsing is timed
+    :return: number of pages and parsing time
+    """
+    pages = load_pages(source, shard, shards)
+    parse = PARSERS[parser_name]
+    started = time.perf_counter()
+    for text in pages:
+        parse(text)
+    return len(pages), time.perf_counter() - started
+
+
+def bench(parser_name: str, source: str, workers=1) -> tuple[int, float, float]:
+    """
+    :return: number of pages, wall time of parsing and parsing time summed over processes
+    """
+    if workers == 1:
+        pages, elapsed = run(parser_name, source)
+        return pages, elapsed, elapsed
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(run, [parser_name] * workers, [source] * workers, range(workers), [workers] * workers))
+    pages, elapsed = zip(*results)
+    return sum(pages), max(elapsed), sum(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=2000, help='number of synthetic pages')
+    parser.add_argument('--fixtures', help='directory with saved Indeed .html pages instead of synthetic ones')
+    parser.add_argument('--archive', help='response archive of recorded crawl instead of synthetic pages')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='also run parsing in this number of processes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.archive or args.fixtures
+        if source is None:
+            make_fixtures(tmp, args.pages)
+            source = tmp
+        print(f'fixture: {source}, orjson: {orjson is not None}')
+        cases = [(name, 1) for name in PARSERS]
+        if args.workers > 1:
+            cases += [(name, args.workers) for name in PARSERS]
+        for name, workers in cases:
+            pages, wall, cpu = bench(name, source, workers)
+            if not pages:
+                parser.error(f'No pages in {source}')
+            print(f'{f"{name}, {workers} processes":<28} {pages:8d} pages {wall:8.2f}s {pages / wall:10.0f} pages/s '
+                  f'{pages / cpu:10.0f} pages/s per core')
+
+
+if __name__ == '__main__':
+    main()
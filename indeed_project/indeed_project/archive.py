@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS responses ('
+    'fingerprint BLOB PRIMARY KEY, '
+    'url TEXT NOT NULL, '
+    'status INTEGER NOT NULL, '
+    'headers TEXT NOT NULL, '
+    'codec TEXT NOT NULL, '
+    'body BLOB NOT NULL, '
+    'fetched_at TEXT NOT NULL)',
+]
+
+
+@dataclass
+class ArchivedResponse:
+    url: str
+    status: int
+    # header name -> values, as scrapy Headers keep them
+    headers: dict[bytes, list[bytes]]
+    body: bytes
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+
+class ResponseArchive:
+    """
+    Responses in SQLite file keyed by request fingerprint. Bodies are compressed with zstd when zstandard is installed
+    and with zlib otherwise, codec is kept per row, so archives written with either of them are readable.
+    """
+
+    def __init__(self, path: str, level: Optional[int] = None, commit_every=100):
+        """
+        :param path: sqlite file, it is created if it doesn't exist
+        :param level: compression level, default level of codec if None
+        :param commit_every: written responses are committed by batches
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.commit_every = commit_every
+        self.pending = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.level = level
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        if zstandard is not None:
+            self.compressor = zstandard.ZstdCompressor(level=level or 3)
+            self.decompressor = zstandard.ZstdDecompressor()
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return self.compressor.compress(body)
+        return zlib.compress(body, self.level or 6)
+
+    def _decompress(self, codec: str, body: bytes) -> bytes:
+        if codec == 'zlib':
+            return zlib.decompress(body)
+        if codec == 'zstd' and zstandard is not None:
+            return self.decompressor.decompress(body)
+        raise ValueError(f'Archive {self.path} has {codec} response, but {codec} codec is not available')
+
+    def put(self, fingerprint: bytes, url: str, status: int, headers: dict[bytes, list[bytes]], body: bytes) -> None:
+        """Save response, response with the same fingerprint is replaced"""
+        headers = {name.decode('latin-1'): [value.decode('latin-1') for value in values]
+                   for name, values in headers.items()}
+        self.connection.execute(
+                'INSERT OR REPLACE INTO responses (fingerprint, url, status, headers, codec, body, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (fingerprint, url, status, json.dumps(headers), self.codec, self._compress(body),
+                 datetime.now(timezone.utc).isoformat())
+        )
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def _response(self, url: str, status: int, headers: str, codec: str, body: bytes) -> ArchivedResponse:
+        return ArchivedResponse(
+                url=url,
+                status=status,
+                headers={name.encode('latin-1'): [value.encode('latin-1') for value in values]
+                         for name, values in json.loads(headers).items()},
+                body=self._decompress(codec, body),
+        )
+
+    def get(self, fingerprint: bytes) -> Optional[ArchivedResponse]:
+        row = self.connection.execute(
+                'SELECT url, status, headers, codec, body FROM responses WHERE fingerprint = ?', (fingerprint,)
+        ).fetchone()
+        return self._response(*row) if row is not None else None
+
+    def iter_responses(self, shard=0, shards=1, batch_size=1000) -> Iterator[ArchivedResponse]:
+        """
+        All archived responses in insertion order
+        :param shard: number of shard, responses are split into shards by rowid, e.g. to parse them in processes
+        :param shards: number of shards
+        """
+        last_rowid = 0
+        while True:
+            rows = self.connection.execute(
+                    'SELECT rowid, url, status, headers, codec, body FROM responses '
+                    'WHERE rowid > ? AND rowid % ? = ? ORDER BY rowid LIMIT ?',
+                    (last_rowid, shards, shard, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for row in rows:
+                yield self._response(*row[1:])
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def commit(self) -> None:
+        self.connection.commit()
+        self.pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.connection.close()
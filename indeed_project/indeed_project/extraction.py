@@ -0,0 +1,112 @@
+"""
+Extraction of hidden JSON data from Indeed pages. Script block is found with one substring search and only the JSON
+object after it is decoded: orjson (when it is installed) gets the slice up to the statement end "};", Python json
+decoder stops by itself at the end of the object. Only used fields are kept.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+SEARCH_MARKER = 'window.mosaic.providerData["mosaic-provider-jobcards"]='
+JOB_MARKER = '_initialData='
+# "};" inside JSON strings gives wrong object ends, slices are checked up to this number of them
+MAX_END_CANDIDATES = 8
+# JSON object longer than this is treated as broken page
+MAX_JSON_LENGTH = 20 * 2 ** 20
+
+_decoder = json.JSONDecoder()
+
+
+class ExtractionError(ValueError):
+    """Page has no expected JSON data"""
+
+
+@dataclass
+class SearchPage:
+    """Data of search results page which spider uses"""
+    # jobkey of every job card in page order, None for cards without jobkey
+    jobkeys: list[Optional[str]]
+    total: int = 0
+
+
+@dataclass
+class JobPage:
+    """Data of job page which spider uses"""
+    company: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    salary: Optional[dict] = None
+
+
+def find_json(text: str, marker: str) -> int:
+    """
+    Find JSON object which follows marker
+    :param text: page text
+    :param marker: text just before the object
+    :return: position of the object start
+    """
+    start = text.find(marker)
+    if start < 0:
+        raise ExtractionError(f'No {marker!r} on page')
+    start = text.find('{', start + len(marker))
+    if start < 0:
+        raise ExtractionError(f'No JSON object after {marker!r}')
+    return start
+
+
+def load_json(text: str, marker: str) -> Any:
+    """Decoded JSON object which follows marker"""
+    start = find_json(text, marker)
+    if orjson is not None:
+        limit = min(len(text), start + MAX_JSON_LENGTH)
+        end = start
+        for _ in range(MAX_END_CANDIDATES):
+            end = text.find('};', end + 1, limit)
+            if end < 0:
+                break
+            try:
+                return orjson.loads(text[start:end + 1])
+            except orjson.JSONDecodeError:
+                continue
+    try:
+        return _decoder.raw_decode(text, start)[0]
+    except ValueError as error:
+        raise ExtractionError(f'Broken JSON after {marker!r}: {error}') from error
+
+
+def get_path(data: Any, *path, default=None) -> Any:
+    """Value by path of keys, default if any key is missed"""
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return default
+        data = data[key]
+    return data
+
+
+def parse_search_page(text: str) -> SearchPage:
+    """Jobkeys of job cards and total number of jobs of search"""
+    model = get_path(load_json(text, SEARCH_MARKER), 'metaData', 'mosaicProviderJobCardsModel')
+    if not isinstance(model, dict):
+        raise ExtractionError('No mosaicProviderJobCardsModel in job cards data')
+    return SearchPage(
+            jobkeys=[job.get('jobkey') for job in model.get('results') or []],
+            total=sum(category.get('jobCount', 0) for category in model.get('tierSummaries') or []),
+    )
+
+
+def parse_job_page(text: str) -> JobPage:
+    """Company, title, HTML description and salary model of job page"""
+    data = load_json(text, JOB_MARKER)
+    job = get_path(data, 'jobInfoWrapperModel', 'jobInfoModel', default={}) or {}
+    return JobPage(
+            company=job.get('companyName'),
+            title=job.get('jobTitle'),
+            description=job.get('sanitizedJobDescription'),
+            salary=get_path(data, 'salaryInfoModel'),
+    )
@@ -0,0 +1,36 @@
+from typing import Any, BinaryIO
+
+import zstandard
+
+
+class ZstdPlugin:
+    """
+    Feed postprocessing plugin which compresses feed with zstd. Data is written as a series of independent frames of
+    about zstd_frame_size bytes, so feed of crashed crawl loses only the last frame and the next crawl may append to the
+    same file.
+
+    Accepted feed_options parameters:
+    - zstd_compresslevel, 3 by default
+    - zstd_frame_size, uncompressed bytes per frame, 4 MiB by default
+    """
+
+    def __init__(self, file: BinaryIO, feed_options: dict[str, Any]) -> None:
+        self.file = file
+        self.feed_options = feed_options
+        self.frame_size = feed_options.get('zstd_frame_size', 4 * 2 ** 20)
+        compressor = zstandard.ZstdCompressor(level=feed_options.get('zstd_compresslevel', 3))
+        self.writer = compressor.stream_writer(self.file, closefd=False)
+        self.in_frame = 0
+
+    def write(self, data: bytes) -> int:
+        written = self.writer.write(data)
+        self.in_frame += len(data)
+        if self.in_frame >= self.frame_size:
+            self.writer.flush(zstandard.FLUSH_FRAME)
+            self.in_frame = 0
+        return written
+
+    def close(self) -> None:
+        # postprocessing manager closes only the plugin, so the feed file is closed here as in scrapy plugins
+        self.writer.close()
+        self.file.close()
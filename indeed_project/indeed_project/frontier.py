@@ -0,0 +1,53 @@
+import csv
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import product
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Search:
+    """One keyword/location search, searches with higher priority are crawled first"""
+    keyword: str
+    location: str = ''
+    priority: int = 0
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """Searches which differ only by case or spaces are the same search"""
+        return ' '.join(self.keyword.casefold().split()), ' '.join(self.location.casefold().split())
+
+
+def split_arg(value: Optional[str]) -> list[str]:
+    """Values of -a argument separated by semicolons, locations like "New York, NY" have commas inside"""
+    return [part.strip() for part in (value or '').split(';')]
+
+
+def product_searches(keywords: Iterable[str], locations: Iterable[str], priority=0) -> Iterator[Search]:
+    """Every keyword in every location, empty location searches everywhere"""
+    for keyword, location in product(list(keywords), list(locations) or ['']):
+        if keyword:
+            yield Search(keyword, location, priority)
+
+
+def read_searches(path: str) -> Iterator[Search]:
+    """
+    Read frontier file: csv with keyword, location and optional priority columns, e.g.
+        keyword,location,priority
+        python,"New York, NY",10
+    """
+    with open(path, 'r', newline='') as csv_file:
+        for row in csv.DictReader(csv_file):
+            keyword = (row.get('keyword') or '').strip()
+            if keyword:
+                yield Search(keyword, (row.get('location') or '').strip(), int(row.get('priority') or 0))
+
+
+def build_frontier(searches: Iterable[Search]) -> list[Search]:
+    """Unique searches, the highest priority first. Duplicate search keeps its highest priority"""
+    unique = {}
+    for search in searches:
+        known = unique.get(search.key)
+        if known is None or search.priority > known.priority:
+            unique[search.key] = search
+    return sorted(unique.values(), key=lambda search: -search.priority)
@@ -3,11 +3,21 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+from urllib.parse import parse_qs, urlparse
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from .archive import ResponseArchive
+
+
+PROXY_ENDPOINT = 'https://proxy.scrapeops.io/'
+
 
 class IndeedProjectSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +111,75 @@ class IndeedProjectDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ResponseArchiveMiddleware:
+    """
+    ARCHIVE_MODE = 'record' saves downloaded responses into ResponseArchive, ARCHIVE_MODE = 'replay' serves the crawl
+    from the archive without network, requests which are not archived are ignored. Responses are keyed by fingerprint
+    of request to the target site, so it has to go before proxy middleware, which replaces request url with proxy url.
+    """
+
+    def __init__(self, archive: ResponseArchive, mode: str, fingerprinter, stats, http_codes=(200,)):
+        self.archive = archive
+        self.mode = mode
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+        self.http_codes = {int(code) for code in http_codes}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        mode = settings.get('ARCHIVE_MODE')
+        if not mode:
+            raise NotConfigured
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'Unknown ARCHIVE_MODE: {mode}')
+        archive = ResponseArchive(settings.get('ARCHIVE_PATH'),
+                                  commit_every=settings.getint('ARCHIVE_COMMIT_EVERY', 100))
+        middleware = cls(
+                archive=archive,
+                mode=mode,
+                fingerprinter=crawler.request_fingerprinter,
+                stats=crawler.stats,
+                http_codes=settings.getlist('ARCHIVE_HTTP_CODES', [200]),
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    @staticmethod
+    def target_url(url: str) -> str:
+        """Url of the site for proxy request url"""
+        if url.startswith(PROXY_ENDPOINT):
+            target = parse_qs(urlparse(url).query).get('url')
+            if target:
+                return target[0]
+        return url
+
+    def fingerprint(self, request) -> bytes:
+        url = self.target_url(request.url)
+        return self.fingerprinter.fingerprint(request if url == request.url else request.replace(url=url))
+
+    def process_request(self, request, spider):
+        if self.mode != 'replay':
+            return None
+        archived = self.archive.get(self.fingerprint(request))
+        if archived is None:
+            self.stats.inc_value('archive/missed')
+            raise IgnoreRequest(f'{request.url} is not archived')
+        self.stats.inc_value('archive/replayed')
+        headers = Headers(archived.headers)
+        response_cls = responsetypes.from_args(headers=headers, url=archived.url, body=archived.body)
+        return response_cls(url=archived.url, status=archived.status, headers=headers, body=archived.body,
+                            flags=['archive'], request=request)
+
+    def process_response(self, request, response, spider):
+        if self.mode == 'record' and response.status in self.http_codes:
+            self.archive.put(self.fingerprint(request), self.target_url(response.url), response.status,
+                             dict(response.headers), response.body)
+            self.stats.inc_value('archive/recorded')
+        return response
+
+    def spider_closed(self, spider):
+        spider.logger.info(f'Response archive {self.archive.path}: {len(self.archive)} responses')
+        self.archive.close()
@@ -2,12 +2,110 @@
 #
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-
+from typing import Optional
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem
+
+from .dedupe import SeenJobkeys
+from .store import JobStore
+
+
+NO_SALARY = 'noSalaryInfoAtAll'
+
+
+def _to_float(value) -> Optional[float]:
+    """Salary bound as float, placeholders like noSalaryMaxInfo give None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_salary(adapter: ItemAdapter) -> bool:
+    """
+    Make salaryMin and salaryMax floats, single bound salary gets the same value on both sides and swapped bounds are
+    fixed. salaryText is stripped.
+    :return: False if item has no numeric salary at all
+    """
+    salary_min, salary_max = _to_float(adapter.get('salaryMin')), _to_float(adapter.get('salaryMax'))
+    if salary_min is None and salary_max is None:
+        return False
+    salary_min = salary_max if salary_min is None else salary_min
+    salary_max = salary_min if salary_max is None else salary_max
+    adapter['salaryMin'], adapter['salaryMax'] = min(salary_min, salary_max), max(salary_min, salary_max)
+    if isinstance(adapter.get('salaryText'), str):
+        adapter['salaryText'] = adapter['salaryText'].strip()
+    return True
 
 
 class IndeedProjectPipeline:
+    """
+    Save crawled postings to job store (JOB_STORE_PATH setting), cleaner reads new postings from there. Items without
+    salary and jobkeys which were already crawled (now or before) are dropped before they cost anything downstream,
+    salary fields are normalized, items are written in batches of JOB_STORE_BATCH_SIZE.
+    """
+
+    def __init__(self, store_path: str, batch_size=500, dedupe_backend='set', bloom_path: Optional[str] = None,
+                 bloom_capacity=10_000_000, bloom_error_rate=0.001, stats=None):
+        self.store_path = store_path
+        self.batch_size = batch_size
+        self.dedupe_backend = dedupe_backend
+        self.bloom_path = bloom_path
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.stats = stats
+        self.store = None
+        self.seen = None
+        self.buffer = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+                settings.get('JOB_STORE_PATH'),
+                batch_size=settings.getint('JOB_STORE_BATCH_SIZE', 500),
+                dedupe_backend=settings.get('DEDUPE_BACKEND', 'set'),
+                bloom_path=settings.get('DEDUPE_BLOOM_PATH'),
+                bloom_capacity=settings.getint('DEDUPE_BLOOM_CAPACITY', 10_000_000),
+                bloom_error_rate=settings.getfloat('DEDUPE_BLOOM_ERROR_RATE', 0.001),
+                stats=crawler.stats,
+        )
+
+    def _inc(self, key: str, count=1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(f'job_store/{key}', count)
+
+    def open_spider(self, spider):
+        self.store = JobStore(self.store_path)
+        self.seen = SeenJobkeys(self.store, self.dedupe_backend, self.bloom_path, self.bloom_capacity,
+                                self.bloom_error_rate)
+        spider.logger.info(f'{len(self.seen)} jobkeys are already crawled')
+
+    def flush(self) -> None:
+        if self.buffer:
+            self._inc('written', self.store.add_raw(self.buffer))
+            self.buffer = []
+
+    def close_spider(self, spider):
+        self.flush()
+        self.seen.save()
+        spider.logger.info(f'Job store: {self.store.counts()}')
+        self.store.close()
+
     def process_item(self, item, spider):
+        # stale posting which is fetched again by incremental crawl (refresh flag of spider, it is not a posting
+        # field) is a duplicate only within current crawl
+        refresh = bool(item.pop('refresh', False)) if isinstance(item, dict) else False
+        adapter = ItemAdapter(item)
+        if adapter.get('salaryText') == NO_SALARY or not normalize_salary(adapter):
+            self._inc('dropped_no_salary')
+            raise DropItem(f'No salary for jobkey {adapter.get("jobkey")}')
+        if self.seen.check_and_add(adapter['jobkey'], refresh):
+            self._inc('dropped_duplicate')
+            raise DropItem(f'Duplicate jobkey {adapter["jobkey"]}')
+        self.buffer.append(adapter.asdict())
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
         return item
@@ -0,0 +1,323 @@
+import os
+import pickle
+import socket
+import time
+import uuid
+from typing import Optional
+
+import redis
+from scrapy import Request, signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.request import request_from_dict
+from twisted.internet import task
+
+
+# request meta key with token of the lease of a request taken from the shared queue
+LEASE_META_KEY = 'redis_lease'
+
+# member with the lowest score is moved from queue to the hash of leases of the worker in one step, so a request is
+# either in the queue or leased, crash between pop and lease can't lose it
+POP_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return false
+end
+redis.call('HSET', KEYS[2], ARGV[1], popped[2] .. ':' .. popped[1])
+return popped[1]
+"""
+
+# fingerprint seen at or after ARGV[3] is a duplicate, otherwise its time is set to ARGV[2]
+SEEN_SCRIPT = """
+local seen_at = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if seen_at and tonumber(seen_at) >= tonumber(ARGV[3]) then
+    return 1
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+return 0
+"""
+
+
+class RedisRequestQueue:
+    """
+    Priority queue of requests in Redis sorted set shared by all workers. Pop is one ZPOPMIN command, so every request
+    is given to exactly one worker.
+    """
+
+    def __init__(self, server: redis.Redis, key: str, spider):
+        self.server = server
+        self.key = key
+        self.spider = spider
+        self._pop_leased = server.register_script(POP_SCRIPT)
+
+    def push(self, request: Request) -> None:
+        # higher scrapy priority goes first, sorted set pops the lowest score
+        self.restore(pickle.dumps(request.to_dict(spider=self.spider)), -request.priority)
+
+    def restore(self, data: bytes, score: float) -> None:
+        """Put serialized request back, the same request is added once however many times it is restored"""
+        self.server.zadd(self.key, {data: score})
+
+    def decode(self, data: bytes) -> Request:
+        return request_from_dict(pickle.loads(data), spider=self.spider)
+
+    def pop(self) -> Optional[Request]:
+        popped = self.server.zpopmin(self.key)
+        if not popped:
+            return None
+        return self.decode(popped[0][0])
+
+    def pop_leased(self, leases_key: str, token: str) -> Optional[Request]:
+        """Pop request and keep it in leases_key hash under token until the worker is done with it"""
+        data = self._pop_leased(keys=[self.key, leases_key], args=[token])
+        if data is None:
+            return None
+        return self.decode(data)
+
+    def __len__(self) -> int:
+        return self.server.zcard(self.key)
+
+    def clear(self) -> None:
+        self.server.delete(self.key)
+
+
+class RedisDupeFilter:
+    """
+    Fingerprints of scheduled requests with the time they were seen in Redis sorted set. Request is a duplicate only
+    when any worker has seen it within ttl seconds, so the next sweep (daily recrawl, refetch of stale job pages)
+    schedules the same pages again. Check and add is one Lua script, it is atomic between workers.
+    """
+
+    def __init__(self, server: redis.Redis, key: str, fingerprinter, ttl: Optional[float] = None):
+        """
+        :param ttl: seconds which fingerprint is kept for, None keeps it until dupefilter is cleared
+        """
+        self.server = server
+        self.key = key
+        self.fingerprinter = fingerprinter
+        self.ttl = ttl
+        self._check_and_add = server.register_script(SEEN_SCRIPT)
+
+    def request_seen(self, request: Request) -> bool:
+        now = time.time()
+        oldest = now - self.ttl if self.ttl else 0
+        return self._check_and_add(
+                keys=[self.key], args=[self.fingerprinter.fingerprint(request), now, oldest]
+        ) == 1
+
+    def expire(self) -> int:
+        """Remove expired fingerprints, they don't count anyway and only take memory"""
+        if not self.ttl:
+            return 0
+        return self.server.zremrangebyscore(self.key, '-inf', f'({time.time() - self.ttl}')
+
+    def clear(self) -> None:
+        self.server.delete(self.key)
+
+
+class RedisLeases:
+    """
+    Requests which a worker has taken from the shared queue and hasn't finished downloading yet. Live worker keeps its
+    heartbeat key, which expires after timeout seconds; leases of a worker without heartbeat (killed or crashed) are
+    put back to the queue by any other worker.
+    """
+
+    def __init__(self, server: redis.Redis, prefix: str, worker_id: str, timeout=120.0):
+        self.server = server
+        self.prefix = prefix
+        self.worker_id = worker_id
+        self.timeout = timeout
+        self.key = self.leases_key(worker_id)
+        self.heartbeat_key = f'{prefix}:workers:{worker_id}'
+
+    def leases_key(self, worker_id: str) -> str:
+        return f'{self.prefix}:leases:{worker_id}'
+
+    def heartbeat(self) -> None:
+        self.server.set(self.heartbeat_key, 1, px=max(1, int(self.timeout * 1000)))
+
+    def release(self, token: Optional[str]) -> None:
+        if token is not None:
+            self.server.hdel(self.key, token)
+
+    def __len__(self) -> int:
+        return self.server.hlen(self.key)
+
+    def _workers(self) -> dict[str, str]:
+        """Leases keys of all workers by worker id"""
+        start = len(self.leases_key(''))
+        return {
+            key[start:]: key for key in
+            (key.decode() for key in self.server.scan_iter(match=self.leases_key('*')))
+        }
+
+    def _requeue(self, key: str, queue: RedisRequestQueue) -> int:
+        leased = self.server.hgetall(key)
+        for value in leased.values():
+            score, data = value.split(b':', 1)
+            queue.restore(data, float(score))
+        # request which is restored twice (by two workers at once) is still one member of the queue
+        self.server.delete(key)
+        return len(leased)
+
+    def requeue_own(self, queue: RedisRequestQueue) -> int:
+        return self._requeue(self.key, queue)
+
+    def requeue_orphans(self, queue: RedisRequestQueue) -> int:
+        """Put leases of dead workers back to the queue, number of requeued requests is returned"""
+        requeued = 0
+        for worker_id, key in self._workers().items():
+            if worker_id != self.worker_id and not self.server.exists(f'{self.prefix}:workers:{worker_id}'):
+                requeued += self._requeue(key, queue)
+        return requeued
+
+    def held_by_others(self) -> int:
+        """Number of requests which other live workers are downloading, they may bring new requests"""
+        return sum(self.server.hlen(key) for worker_id, key in self._workers().items() if worker_id != self.worker_id)
+
+    def drop_own(self) -> None:
+        self.server.delete(self.key)
+
+    def stop(self) -> None:
+        self.server.delete(self.heartbeat_key)
+
+    def clear(self) -> None:
+        for key in self._workers().values():
+            self.server.delete(key)
+
+
+def _worker_id() -> str:
+    return f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+
+class RedisScheduler(BaseScheduler):
+    """
+    Scheduler with request queue and dupefilter in Redis (any server of Redis protocol), so several
+    "scrapy crawl indeed" workers on any number of machines share one frontier and don't fetch the same page twice.
+    Queue and dupefilter are kept after worker stops, restarted worker resumes the crawl; fingerprints expire after
+    SCHEDULER_DUPEFILTER_TTL seconds, so the next sweep fetches pages again. Request taken from the queue is leased
+    until it leaves the downloader, requests of a worker which died in the middle of downloads are requeued by other
+    workers after SCHEDULER_LEASE_TIMEOUT seconds. Idle worker waits SCHEDULER_IDLE_TIMEOUT seconds for requests from
+    other workers before it finishes.
+    """
+
+    def __init__(self, crawler, server: redis.Redis, persist=True, flush_on_start=False, idle_timeout=60.0,
+                 dupefilter_ttl: Optional[float] = 20 * 60 * 60, lease_timeout=120.0):
+        """
+        :param server: Redis client
+        :param persist: keep queue and dupefilter when worker closes
+        :param flush_on_start: drop queue and dupefilter of previous crawl, set it for the first worker of a new sweep
+        :param idle_timeout: seconds which empty queue is waited for before spider is closed
+        :param dupefilter_ttl: seconds after which a seen request may be scheduled again, None never forgets requests
+        :param lease_timeout: seconds without heartbeat after which requests of a worker are given to other workers
+        """
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.server = server
+        self.persist = persist
+        self.flush_on_start = flush_on_start
+        self.idle_timeout = idle_timeout
+        self.dupefilter_ttl = dupefilter_ttl
+        self.lease_timeout = lease_timeout
+        self.queue = None
+        self.dupefilter = None
+        self.leases = None
+        self.heartbeat = None
+        self.spider = None
+        self.idle_since = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        scheduler = cls(
+                crawler,
+                server=redis.Redis.from_url(settings.get('REDIS_URL') or 'redis://localhost:6379/0'),
+                persist=settings.getbool('SCHEDULER_PERSIST', True),
+                flush_on_start=settings.getbool('SCHEDULER_FLUSH_ON_START', False),
+                idle_timeout=settings.getfloat('SCHEDULER_IDLE_TIMEOUT', 60.0),
+                dupefilter_ttl=settings.getfloat('SCHEDULER_DUPEFILTER_TTL', 20 * 60 * 60) or None,
+                lease_timeout=settings.getfloat('SCHEDULER_LEASE_TIMEOUT', 120.0),
+        )
+        crawler.signals.connect(scheduler.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(scheduler.request_left_downloader, signal=signals.request_left_downloader)
+        return scheduler
+
+    def open(self, spider) -> None:
+        self.spider = spider
+        self.queue = RedisRequestQueue(self.server, f'{spider.name}:requests', spider)
+        self.dupefilter = RedisDupeFilter(self.server, f'{spider.name}:dupefilter',
+                                          self.crawler.request_fingerprinter, self.dupefilter_ttl)
+        self.leases = RedisLeases(self.server, spider.name, _worker_id(), self.lease_timeout)
+        if self.flush_on_start:
+            self.queue.clear()
+            self.dupefilter.clear()
+            self.leases.clear()
+        self.dupefilter.expire()
+        self.leases.heartbeat()
+        # heartbeat has its own timer, engine doesn't call scheduler while downloader is busy
+        self.heartbeat = task.LoopingCall(self.leases.heartbeat)
+        self.heartbeat.start(self.lease_timeout / 3, now=False)
+        self._requeue_orphans()
+        pending = len(self.queue)
+        if pending:
+            spider.logger.info(f'Resuming crawl: {pending} requests in shared queue')
+
+    def close(self, reason: str) -> None:
+        if self.heartbeat is not None and self.heartbeat.running:
+            self.heartbeat.stop()
+        if reason == 'finished':
+            # nothing is in flight when spider finishes, leases left are requests dropped before download
+            self.leases.drop_own()
+        else:
+            requeued = self.leases.requeue_own(self.queue)
+            if requeued:
+                self.spider.logger.info(f'{requeued} unfinished requests are put back to shared queue')
+        self.leases.stop()
+        if not self.persist:
+            self.queue.clear()
+            self.dupefilter.clear()
+
+    def has_pending_requests(self) -> bool:
+        return len(self.queue) > 0
+
+    def enqueue_request(self, request: Request) -> bool:
+        # proxied, retried or redirected request replaces the leased one, lease is released once it is queued
+        token = request.meta.pop(LEASE_META_KEY, None)
+        try:
+            if not request.dont_filter and self.dupefilter.request_seen(request):
+                self.stats.inc_value('dupefilter/filtered')
+                return False
+            self.queue.push(request)
+        finally:
+            self.leases.release(token)
+        self.stats.inc_value('scheduler/enqueued/redis')
+        return True
+
+    def next_request(self) -> Optional[Request]:
+        token = uuid.uuid4().hex
+        request = self.queue.pop_leased(self.leases.key, token)
+        if request is not None:
+            request.meta[LEASE_META_KEY] = token
+            self.idle_since = None
+            self.stats.inc_value('scheduler/dequeued/redis')
+        return request
+
+    def request_left_downloader(self, request: Request, spider) -> None:
+        self.leases.release(request.meta.pop(LEASE_META_KEY, None))
+
+    def _requeue_orphans(self) -> int:
+        requeued = self.leases.requeue_orphans(self.queue)
+        if requeued:
+            self.stats.inc_value('scheduler/requeued/redis', requeued)
+            self.spider.logger.info(f'{requeued} requests of stopped workers are put back to shared queue')
+        return requeued
+
+    def spider_idle(self, spider) -> None:
+        """Keep worker alive while other workers may still add requests to the shared queue"""
+        if self._requeue_orphans() or self.leases.held_by_others():
+            self.idle_since = None
+            raise DontCloseSpider
+        if self.idle_since is None:
+            self.idle_since = time.monotonic()
+        if time.monotonic() - self.idle_since < self.idle_timeout:
+            raise DontCloseSpider
@@ -9,6 +9,8 @@
 import os
 from dotenv import load_dotenv
 
+from .store import RAW_COLUMNS
+
 
 load_dotenv()
 
@@ -18,9 +20,13 @@ BOT_NAME = "indeed_project"
 SPIDER_MODULES = ["indeed_project.spiders"]
 NEWSPIDER_MODULE = "indeed_project.spiders"
 
+# zstd compressed JSON lines with fixed fields, cleaner reads fields by name (see parser/raw_feed.py)
 FEEDS = {
-    'data/%(name)s_%(time)s.csv': {
-        'format': 'csv',
+    'data/%(name)s_%(time)s.jsonl.zst': {
+        'format': 'jsonlines',
+        'fields': list(RAW_COLUMNS),
+        'postprocessing': ['indeed_project.feeds.ZstdPlugin'],
+        'zstd_compresslevel': 3,
         }
 }
 
@@ -29,8 +35,16 @@ SCRAPEOPS_PROXY_ENABLED = True
 # SCRAPEOPS_PROXY_SETTINGS = {'country': 'us'}
 
 DOWNLOADER_MIDDLEWARES = {
+    # goes before proxy middleware, so archive is keyed by requests to the site and replayed requests don't reach proxy,
+    # and after HttpCompressionMiddleware (590), so archived bodies are decoded
+    'indeed_project.middlewares.ResponseArchiveMiddleware': 580,
     'scrapeops_scrapy_proxy_sdk.scrapeops_scrapy_proxy_sdk.ScrapeOpsScrapyProxySdk': 725,
 }
+# -s ARCHIVE_MODE=record saves responses into ARCHIVE_PATH, -s ARCHIVE_MODE=replay crawls from it without network
+ARCHIVE_MODE = None
+ARCHIVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'responses.sqlite')
+ARCHIVE_HTTP_CODES = [200]
+ARCHIVE_COMMIT_EVERY = 100
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -82,9 +96,40 @@ ROBOTSTXT_OBEY = True
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "indeed_project.pipelines.IndeedProjectPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "indeed_project.pipelines.IndeedProjectPipeline": 300,
+}
+# sqlite job store shared by spider, cleaner and predictor
+JOB_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'jobs.sqlite')
+# items are written to store by batches
+JOB_STORE_BATCH_SIZE = 500
+# crawled jobkeys are dropped: "set" keeps all jobkeys from store in memory, "bloom" keeps Bloom filter in a file
+DEDUPE_BACKEND = 'set'
+DEDUPE_BLOOM_PATH = os.path.join(os.path.dirname(JOB_STORE_PATH), 'seen_jobkeys.bloom')
+DEDUPE_BLOOM_CAPACITY = 10_000_000
+DEDUPE_BLOOM_ERROR_RATE = 0.001
+# incremental crawl requests only job pages which are new or were fetched more than RECRAWL_TTL_DAYS ago
+INCREMENTAL_CRAWL = True
+RECRAWL_TTL_DAYS = 7
+# csv file with keyword, location and priority columns, -a frontier=<file> overrides it
+SEARCH_FRONTIER_PATH = None
+# pagination of a search stops earlier when page brings no new jobkeys
+MAX_SEARCH_PAGES = 100
+# distributed crawl: workers with the same REDIS_URL share request queue and dupefilter in Redis
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    SCHEDULER = 'indeed_project.scheduler.RedisScheduler'
+# queue and dupefilter are kept when worker stops, so restarted worker resumes
+SCHEDULER_PERSIST = True
+# -s SCHEDULER_FLUSH_ON_START=1 for the first worker of a new sweep drops queue and dupefilter of the previous one
+SCHEDULER_FLUSH_ON_START = False
+# idle worker waits this number of seconds for requests of other workers before it finishes
+SCHEDULER_IDLE_TIMEOUT = 60
+# request seen by any worker is filtered for this number of seconds, the next daily sweep schedules it again; 0 keeps
+# fingerprints until SCHEDULER_FLUSH_ON_START
+SCHEDULER_DUPEFILTER_TTL = 20 * 60 * 60
+# requests of a worker without heartbeat for this number of seconds (killed, crashed) are given to other workers
+SCHEDULER_LEASE_TIMEOUT = 120
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -1,6 +1,5 @@
-import json
-import re
-from typing import Generator
+from datetime import datetime, timedelta, timezone
+from typing import Generator, Iterable, Optional
 
 import scrapy
 
@@ -9,6 +8,10 @@ from urllib.parse import urlencode
 from scrapy import Request
 from scrapy.utils.reactor import install_reactor
 
+from ..extraction import ExtractionError, parse_job_page, parse_search_page
+from ..frontier import Search, build_frontier, product_searches, read_searches, split_arg
+from ..store import JobStore
+
 
 """
 All info in Indeed could be found in script section (hidden json data):
@@ -29,6 +32,66 @@ class IndeedSpider(scrapy.Spider):
     # start_urls = ['https://www.indeed.com/q-python-developer-jobs.html']
     install_reactor("twisted.internet.asyncioreactor.AsyncioSelectorReactor")
 
+    def __init__(self, incremental: Optional[str] = None, ttl_days: Optional[str] = None, *args, **kwargs):
+        """
+        :param incremental: -a incremental=0 fetches all job pages, INCREMENTAL_CRAWL setting by default
+        :param ttl_days: -a ttl_days=N, job page fetched earlier than N days ago is fetched again, RECRAWL_TTL_DAYS
+                         setting by default
+        """
+        super().__init__(*args, **kwargs)
+        self.incremental_arg = incremental
+        self.ttl_days_arg = ttl_days
+        self.store = None
+        self.ttl = None
+        self.max_pages = 100
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.max_pages = settings.getint('MAX_SEARCH_PAGES', 100)
+        incremental = (settings.getbool('INCREMENTAL_CRAWL', True) if spider.incremental_arg is None
+                       else spider.incremental_arg.lower() not in ('0', 'false', 'no'))
+        if incremental:
+            spider.store = JobStore(settings.get('JOB_STORE_PATH'))
+            ttl_days = float(spider.ttl_days_arg or settings.getfloat('RECRAWL_TTL_DAYS', 7))
+            spider.ttl = timedelta(days=ttl_days)
+        return spider
+
+    def select_for_fetch(self, jobkeys: list[str]) -> dict[str, bool]:
+        """
+        Jobkeys which job pages should be requested: all of them in full crawl, only new and stale ones (fetched
+        earlier than TTL ago) in incremental crawl. Every listed jobkey gets last seen time.
+        :return: selected jobkeys, True for stale ones which are fetched again on purpose (pipeline doesn't drop them
+                 as already crawled)
+        """
+        if self.store is None:
+            return dict.fromkeys(jobkeys, False)
+        self.store.mark_seen(jobkeys)
+        fetched = self.store.fetched_at(jobkeys)
+        deadline = datetime.now(timezone.utc) - self.ttl
+        selected = {}
+        for jobkey in jobkeys:
+            if jobkey not in fetched:
+                selected[jobkey] = False
+                self.crawler.stats.inc_value('incremental/fetched_new')
+            elif fetched[jobkey] < deadline:
+                selected[jobkey] = True
+                self.crawler.stats.inc_value('incremental/fetched_stale')
+            else:
+                self.crawler.stats.inc_value('incremental/skipped_fresh')
+        return selected
+
+    def closed(self, reason):
+        if self.store is not None:
+            stats = self.crawler.stats
+            skipped = stats.get_value('incremental/skipped_fresh', 0)
+            fetched = stats.get_value('incremental/fetched_new', 0) + stats.get_value('incremental/fetched_stale', 0)
+            total = skipped + fetched
+            self.logger.info(f'Incremental crawl: {skipped} of {total} job pages are skipped as fresh '
+                             f'({skipped / total if total else 0:.0%}), {fetched} are fetched')
+            self.store.close()
+
     def get_indeed_search_url(self, keyword, location, offset=0):
         """Generate search url with appropriate parameters"""
         params = {
@@ -39,102 +102,130 @@ class IndeedSpider(scrapy.Spider):
         }
         return 'https://www.indeed.com/jobs?' + urlencode(params)
 
-    def start_requests(self) -> Generator[Request]:
-        """Send search request"""
-        keyword_list = ['python']
-        location_list = ['']
+    def search_request(self, search: Search, offset=0, seen_jobkeys: Iterable[str] = ()) -> Request:
+        """
+        Request of one search results page, the next pages of a search go after its earlier pages
+        :param seen_jobkeys: jobkeys of earlier pages of the search, they travel with request, so any worker of
+                             distributed crawl can continue the search
+        """
+        return scrapy.Request(
+                url=self.get_indeed_search_url(search.keyword, search.location, offset),
+                callback=self.parse_search_results,
+                priority=search.priority - offset // 10,
+                meta={
+                    'keyword': search.keyword,
+                    'location': search.location,
+                    'offset': offset,
+                    'search': search,
+                    'search_jobkeys': sorted(seen_jobkeys),
+                }
+        )
 
-        for keyword in keyword_list:
-            for location in location_list:
-                indeed_jobs_url = self.get_indeed_search_url(keyword, location)
+    def start_requests(self) -> Generator[Request, None, None]:
+        """Send first page request of every search in frontier"""
+        frontier = self.load_frontier()
+        self.logger.info(f'Search frontier: {len(frontier)} searches')
+        for search in frontier:
+            yield self.search_request(search)
+
+    def load_frontier(self) -> list[Search]:
+        """
+        Searches from -a frontier=<csv file> (or SEARCH_FRONTIER_PATH setting) and from -a keywords="python;java"
+        with -a locations="New York, NY;Remote". Only python everywhere is searched when nothing is set.
+        """
+        searches = []
+        path = getattr(self, 'frontier', None) or self.settings.get('SEARCH_FRONTIER_PATH')
+        if path:
+            searches.extend(read_searches(path))
+        if getattr(self, 'keywords', None):
+            searches.extend(product_searches(split_arg(self.keywords), split_arg(getattr(self, 'locations', ''))))
+        if not searches:
+            searches.append(Search('python'))
+        return build_frontier(searches)
+
+    def parse_search_results(self, response) -> Generator[Request, None, None]:
+        """
+        Parse response from search request. Then iterate through all jobs and request its description. The next page
+        is requested only while pages bring jobkeys which are new for this search, Indeed repeats the last page for
+        offsets after the end of results.
+        """
+        location = response.meta['location']
+        keyword = response.meta['keyword']
+        offset = response.meta['offset']
+        search = response.meta.get('search') or Search(keyword, location)
+        try:
+            search_page = parse_search_page(response.text)
+        except ExtractionError as error:
+            self.logger.warning(f'No job cards on {response.url}: {error}')
+            self.crawler.stats.inc_value('extraction/search_failed')
+            return
+        jobkeys = [jobkey for jobkey in search_page.jobkeys if jobkey is not None]
+
+        # paginate while pages bring new jobkeys
+        seen = set(response.meta.get('search_jobkeys', ()))
+        new_jobkeys = set(jobkeys) - seen
+        next_offset = offset + 10
+        total = search_page.total
+        if new_jobkeys and next_offset < self.max_pages * 10 and (not total or next_offset < total):
+            yield self.search_request(search, next_offset, seen | new_jobkeys)
+        else:
+            self.crawler.stats.inc_value('frontier/searches_done')
+            self.crawler.stats.inc_value('frontier/pages', offset // 10 + 1)
+
+        # extract jobs from search page
+        to_fetch = self.select_for_fetch(jobkeys)
+        for idx, jobkey in enumerate(search_page.jobkeys):
+            if jobkey in to_fetch:
+                job_url = 'https://www.indeed.com/m/basecamp/viewjob?viewtype=embedded&jk=' + jobkey
                 yield scrapy.Request(
-                        url=indeed_jobs_url,
-                        callback=self.parse_search_results,
+                        url=job_url,
+                        callback=self.parse_job,
+                        # job pages go before the next search pages, so queue doesn't grow with frontier
+                        priority=search.priority + 1,
                         meta={
                             'keyword': keyword,
                             'location': location,
-                            'offset': 0
+                            'page': round(offset / 10) + 1 if offset > 0 else 1,
+                            'position': idx,
+                            'jobKey': jobkey,
+                            # refresh flag travels with request, so it is right on any worker of distributed crawl
+                            'refresh': to_fetch[jobkey],
                         }
                 )
 
-    def parse_search_results(self, response) -> Generator[Request]:
-        """Parse response from search request. Then iterate through all jobs and request its description."""
-        location = response.meta['location']
-        keyword = response.meta['keyword']
-        offset = response.meta['offset']
-        script_tag = re.findall(
-                r'window.mosaic.providerData\["mosaic-provider-jobcards"]=(\{.+?\});',
-                response.text
-        )
-        if script_tag is not None:
-            json_all = json.loads(script_tag[0])
-
-            # paginate through pages
-            if offset == 0:
-                meta_data = json_all['metaData']['mosaicProviderJobCardsModel']['tierSummaries']
-                if len(meta_data) != 0:
-                    number_of_results = sum(category['jobCount'] for category in meta_data)
-                else:
-                    number_of_results = 990
-
-                if number_of_results > 1000:
-                    number_of_results = 50
-
-                for offset in range(10, number_of_results + 10, 10):
-                    url = self.get_indeed_search_url(keyword, location, offset)
-                    yield scrapy.Request(
-                            url=url,
-                            callback=self.parse_search_results,
-                            meta={
-                                'keyword': keyword,
-                                'location': location,
-                                'offset': offset
-                            }
-                    )
-
-            # extract jobs from search page
-            job_lst = json_all['metaData']['mosaicProviderJobCardsModel']['results']
-            for idx, job in enumerate(job_lst):
-                if job.get('jobkey') is not None:
-                    job_url = 'https://www.indeed.com/m/basecamp/viewjob?viewtype=embedded&jk=' + job.get('jobkey')
-                    yield scrapy.Request(
-                            url=job_url,
-                            callback=self.parse_job,
-                            meta={
-                                'keyword': keyword,
-                                'location': location,
-                                'page': round(offset / 10) + 1 if offset > 0 else 1,
-                                'position': idx,
-                                'jobKey': job.get('jobkey'),
-                            }
-                    )
-
-    def parse_job(self, response) -> Generator[dict]:
+    def parse_job(self, response) -> Generator[dict, None, None]:
         """Parse job description and return json-like dictionary with job data."""
         location = response.meta['location']
         keyword = response.meta['keyword']
         page = response.meta['page']
         position = response.meta['position']
-        script_tag = re.findall(r"_initialData=(\{.+?\});", response.text)
-
-        if script_tag is not None:
-            json_blob = json.loads(script_tag[0])
-            job = json_blob["jobInfoWrapperModel"]["jobInfoModel"]
-            job_salary = json_blob["salaryInfoModel"]
-            yield {
-                'keyword': keyword,
-                'location': location,
-                'page': page,
-                'position': position,
-                'company': job.get('companyName'),
-                'jobkey': response.meta['jobKey'],
-                'jobTitle': job.get('jobTitle'),
-                'jobDescription': job.get('sanitizedJobDescription') if job.get('sanitizedJobDescription') is not
-                                                                        None else 'noJobDescription',
-                'salaryMax': job_salary.get('salaryMax', 'noSalaryMaxInfo') if job_salary is not None else
-                'noSalaryInfoAtAll',
-                'salaryMin': job_salary.get('salaryMin', 'noSalaryMinInfo') if job_salary is not None else
-                'noSalaryInfoAtAll',
-                'salaryText': job_salary.get('salaryText', 'noSalaryText') if job_salary is not None else
-                'noSalaryInfoAtAll',
-            }
+        refresh = response.meta.get('refresh', False)
+        try:
+            job = parse_job_page(response.text)
+        except ExtractionError as error:
+            self.logger.warning(f'No job data on {response.url}: {error}')
+            self.crawler.stats.inc_value('extraction/job_failed')
+            return
+        # page which failed extraction stays unfetched, so the next crawl requests it again
+        if self.store is not None:
+            self.store.mark_fetched([response.meta['jobKey']])
+
+        job_salary = job.salary
+        yield {
+            'keyword': keyword,
+            'location': location,
+            'page': page,
+            'position': position,
+            'company': job.company,
+            'jobkey': response.meta['jobKey'],
+            'jobTitle': job.title,
+            'jobDescription': job.description if job.description is not None else 'noJobDescription',
+            'salaryMax': job_salary.get('salaryMax', 'noSalaryMaxInfo') if job_salary is not None else
+            'noSalaryInfoAtAll',
+            'salaryMin': job_salary.get('salaryMin', 'noSalaryMinInfo') if job_salary is not None else
+            'noSalaryInfoAtAll',
+            'salaryText': job_salary.get('salaryText', 'noSalaryText') if job_salary is not None else
+            'noSalaryInfoAtAll',
+            # not a feed column, pipeline pops it
+            'refresh': refresh,
+        }
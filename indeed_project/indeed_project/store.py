@@ -0,0 +1,2 @@
+# job store is shared with parser package of the repository root, it is installed with "pip install -e ."
+from parser.job_store import RAW_COLUMNS, JobStore  # noqa: F401
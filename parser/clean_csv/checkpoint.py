@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+from typing import Iterable
+
+
+class Checkpoint:
+    """
+    Durable journal of completed jobkeys for append-only output file. Every commit is one json line with the list of
+    jobkeys written since previous commit and the size of output file after they were flushed to disk. On resume the
+    output is cut back to the last committed size, so rows written after the last commit (e.g. before crash) are
+    dropped and requested again instead of being duplicated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed = set()
+        self.offset = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn write of the last record, everything before it is consistent
+                    logging.warning(f'Broken checkpoint record is ignored: {line!r}')
+                    break
+                self.offset = record['offset']
+                self.completed.update(record['jobkeys'])
+
+    def commit(self, offset: int, jobkeys: Iterable[str]) -> None:
+        """Save jobkeys which are already flushed to output file of given size"""
+        jobkeys = list(jobkeys)
+        with open(self.path, 'a') as journal:
+            journal.write(json.dumps({'offset': offset, 'jobkeys': jobkeys}) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.offset = offset
+        self.completed.update(jobkeys)
+
+    def restore(self, path_to_output: str) -> None:
+        """Cut output file back to the last committed size, ValueError is raised if output is shorter than that"""
+        if not os.path.exists(path_to_output):
+            if self.offset:
+                raise FileNotFoundError(f'Output {path_to_output} for checkpoint {self.path} is lost')
+            return
+        size = os.path.getsize(path_to_output)
+        if size < self.offset:
+            # truncate would pad the file with zero bytes, committed rows are lost anyway
+            raise ValueError(f'Output {path_to_output} has {size} bytes, but checkpoint {self.path} committed '
+                             f'{self.offset}: output is corrupted, restore it or run without resume')
+        with open(path_to_output, 'r+b') as output:
+            output.truncate(self.offset)
+
+    def reset(self) -> None:
+        """Forget all progress"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.completed = set()
+        self.offset = 0
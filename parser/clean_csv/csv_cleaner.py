@@ -1,62 +1,58 @@
+import argparse
 import csv
-import json
 import logging
 import os
-from typing import Generator
-
-import openai
-import tiktoken
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Generator, Iterator, Optional
 
 from datetime import datetime
-from statistics import mean
 
+import pandas as pd
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
+from lxml import html as lxml_html
+
+from ..job_store import RAW_COLUMNS, STORE_PATH, JobStore
+from ..raw_feed import iter_raw_rows
+from .checkpoint import Checkpoint
+from .extractors import SkillExtractor
+from .openai_client import get_client
+from .salary import PERIOD_FACTORS, normalize_salaries, salary_frame
+from .skill_cache import SkillCache
+from .skill_extractor import (
+    ExtractionConfig,
+    MODEL,
+    SkillExtractionEngine,
+    build_messages,
+)
+from .tokenizer import MAX_TOKENS, NUM_THREADS, truncate_batch, truncate_text
+from .vocabulary_extractor import VocabularyExtractor
 
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(BASE_DIR, 'cache', 'skill_cache.sqlite')
+SKILL_SETS_DIR = os.path.join(BASE_DIR, 'cleaned_data', 'skill_sets')
+# columns of crawled feed which clean_row uses, the rest is not decoded
+RAW_CLEANED_COLUMNS = ('keyword', 'location', 'jobkey', 'jobDescription', 'salaryMax', 'salaryMin', 'salaryText')
+
 # To see how many tokens are used by an API call, check the usage field in the API response (e.g., response['usage'][
 # 'total_tokens']).
 
 
-def truncate_text_for_max_tokens(text, max_tokens=3995):
+def truncate_text_for_max_tokens(text, max_tokens=MAX_TOKENS):
     """Truncate length of incoming text"""
-    encoding = tiktoken.get_encoding('cl100k_base')
-    tokens = encoding.encode(text)
-    num_tokens = len(tokens)
-
-    if num_tokens > max_tokens:
-        tokens_trunk = tokens[:max_tokens]
-        return encoding.decode(tokens_trunk)
-
-    return text
+    return truncate_text(text, max_tokens)
 
 
 def get_skill_from_description(description: str):
     """Call api of ChatGPT, prepare it for the role you want, thn send promt and get response"""
-    client = openai.OpenAI(
-            api_key=os.getenv('OPEN_AI_API'),
-    )
-    prompt = (f'Evaluate which skills are required in the following job description. Extract 10 skills from the '
-              f'following job description and return them in a json dict: '
-              f'{{"skills": ["skill_1", "skill_2", ..., "skill_n"]}}. '
-              f'Skills must be one or two words but also skills should be understandable what they mean. Here is '
-              f'the description: {description}')
-    model = 'gpt-3.5-turbo'
-    messages = [
-        {
-            'role': 'system',
-            'content': 'You are experienced datascientist, skilled in extracting precise skill from different data'
-        },
-        {
-            'role': 'user',
-            'content': prompt
-        }
-    ]
-    response = client.chat.completions.create(
-            model=model,
-            messages=messages,
+    response = get_client().chat.completions.create(
+            model=MODEL,
+            messages=build_messages(description),
             temperature=0
     )
 
@@ -65,89 +61,422 @@ def get_skill_from_description(description: str):
 
 def get_annual_salary(salary: float) -> float:
     """Compute annual salary from hour payment"""
-    return salary * 8 * 22 * 12
+    return salary * PERIOD_FACTORS['hour']
+
+
+def html_to_text(html: str, fast=True) -> str:
+    """
+    Get text from HTML description
+    :param html: HTML text
+    :param fast: use lxml text content without building BeautifulSoup tree
+    :return: text without tags and line breaks
+    """
+    if fast:
+        text = lxml_html.fromstring(html).text_content() if html.strip() else ''
+    else:
+        text = BeautifulSoup(html, 'lxml').text
+    return text.replace('\n', '').replace('\r', '')
+
+
+def clean_row(row: list, fast=True, truncate=True, salary: Optional[float] = None) -> Optional[list]:
+    """
+    Clean one row of raw data
+    :param row: row of crawled file
+    :param fast: fast HTML stripping, see html_to_text
+    :param truncate: truncate description to max tokens
+    :param salary: annual salary of row, it is computed when not given (clean_chunk computes salaries of chunk at once)
+    :return: keyword, jobkey, location, description, salary or None if row should be skipped
+    """
+    if len(row) == 0 or row[-3] == 'noSalaryInfoAtAll':
+        return None
+    if row[-1] == 'salaryText':
+        return [row[0], row[5], row[1], row[7], 'salary']
+    if salary is None:
+        salary = normalize_salaries(salary_frame([row]))['salary'].iloc[0]
+    if pd.isna(salary):
+        return None
+    text = html_to_text(row[7], fast)
+    if truncate:
+        text = truncate_text_for_max_tokens(text)
+    return [row[0], row[5], row[1], text, float(salary)]
 
 
-def clean_job_raw_data(path_to_file, aggregator_name) -> str:
+def clean_chunk(rows: list[list], fast=True, num_threads=1, drop_outliers=False) -> list[list]:
+    """
+    Clean chunk of rows, it is a unit of work for worker process. Salaries of the whole chunk are normalized in one
+    column-wise pass (see salary module) and descriptions are truncated with one batch call to tokenizer.
+    :param drop_outliers: skip rows with implausible annual salary
+    """
+    rows = [row for row in rows if len(row) != 0 and row[-3] != 'noSalaryInfoAtAll' and row[-1] != 'salaryText']
+    salaries = normalize_salaries(salary_frame(rows)) if rows else None
+    cleaned = []
+    for idx, row in enumerate(rows):
+        if drop_outliers and salaries['outlier'].iat[idx]:
+            continue
+        row = clean_row(row, fast, truncate=False, salary=salaries['salary'].iat[idx])
+        if row is not None:
+            cleaned.append(row)
+    for row, text in zip(cleaned, truncate_batch([row[-2] for row in cleaned], num_threads=num_threads)):
+        row[-2] = text
+    return cleaned
+
+
+def _read_chunks(reader: Iterator[list], chunk_size: int) -> Generator[list[list], None, None]:
+    """Read rows by chunks"""
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_job_raw_data(path_to_file, aggregator_name, workers=None, chunk_size=500, fast=True,
+                       output_dir=None, drop_outliers=False) -> str:
     """
     Main function for raw data preparing. The main purposue is to get raw line with correct length and skills
     description cleaned from HTML tags and truncated to the length for gpt-3.5-turbo model.
-    :param path_to_file: source file
+    Source file is read by chunks which are cleaned in process pool, only a few chunks are in flight at once, and
+    results are written in the same order as in source file.
+    :param path_to_file: crawled feed: csv, JSON lines or zstd compressed JSON lines file, see raw_feed
     :param aggregator_name: aggregator name
+    :param workers: number of worker processes, 1 cleans in current process, None uses all cores
+    :param chunk_size: number of rows sent to worker at once
+    :param fast: fast HTML stripping with lxml instead of BeautifulSoup
+    :param output_dir: directory for prepared data, cleaned_data by default
+    :param drop_outliers: skip postings with implausible annual salary, see salary.OUTLIER_BOUNDS
     :return: path to prepared raw data
     """
-    with open(path_to_file, 'r') as csv_file:
-        reader = csv.reader(csv_file)
-        path_to_raw_data = f'./cleaned_data/{aggregator_name}_cleaned_salary-{datetime.now()}.csv'
-        with open(path_to_raw_data, 'w', newline='') as cleaned_csv:
-            writer = csv.writer(cleaned_csv, delimiter=',')
-            for row in reader:
-                if len(row) != 0 and row[-3] != 'noSalaryInfoAtAll':
-                    if row[-1] == 'salaryText':
-                        row[-3] = 'salary'
-                        writer.writerow([row[0], row[5], row[7], row[-3]])
-                    elif 'an hour' in row[-1]:
-                        salary_max = float(row[-3])
-                        salary_min = float(row[-2])
-                        row[-3] = mean([get_annual_salary(salary_min), get_annual_salary(salary_max)])
-                        clean_text = BeautifulSoup(row[7], 'lxml').text.replace('\n', '').replace('\r', '')
-                        text = truncate_text_for_max_tokens(clean_text)
-                        writer.writerow([row[0], row[5], text, row[-3]])
-                    else:
-                        salary_max = float(row[-3])
-                        salary_min = float(row[-2])
-                        row[-3] = mean([salary_min, salary_max])
-                        clean_text = BeautifulSoup(row[7], 'lxml').text.replace('\n', '').replace('\r', '')
-                        text = truncate_text_for_max_tokens(clean_text)
-                        writer.writerow([row[0], row[5], text, row[-3]])
+    output_dir = output_dir or os.path.join(BASE_DIR, 'cleaned_data')
+    path_to_raw_data = os.path.join(output_dir, f'{aggregator_name}_cleaned_salary-{datetime.now()}.csv')
+    workers = workers or os.cpu_count() or 1
+    with open(path_to_raw_data, 'w', newline='') as cleaned_csv:
+        chunks = _read_chunks(iter_raw_rows(path_to_file, RAW_CLEANED_COLUMNS), chunk_size)
+        writer = csv.writer(cleaned_csv, delimiter=',')
+        writer.writerow(['keyword', 'jobkey', 'location', 'jobDescription', 'salary'])
+        if workers == 1:
+            for chunk in chunks:
+                writer.writerows(clean_chunk(chunk, fast, NUM_THREADS, drop_outliers))
+            return path_to_raw_data
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(executor.submit(clean_chunk, chunk, fast, 1, drop_outliers))
+                # keep memory bounded: wait for the oldest chunk when enough work is queued
+                if len(in_flight) >= workers * 2:
+                    writer.writerows(in_flight.popleft().result())
+            while in_flight:
+                writer.writerows(in_flight.popleft().result())
     return path_to_raw_data
 
 
-def get_skills(path_to_file, start_row=1) -> Generator[tuple]:
+def get_skill_batches(
+        path_to_file, extractor: SkillExtractor, batch_size=200, cache: SkillCache = None, skip_jobkeys=None
+) -> Generator[list[tuple], None, None]:
     """
-    Generate rows with skills from ChatGPT
+    Generate batches of rows with skills. Descriptions of a batch are given to extractor at once (ChatGPT backend
+    sends them concurrently), but rows are yielded in the same order as in source file. Header is yielded as a batch
+    of its own.
     :param path_to_file: source file with data
-    :param start_row: start row
-    :return: tuple which consists of cleaned data with skills
+    :param extractor: skill extraction backend
+    :param batch_size: number of rows which are sent to extractor at once
+    :param cache: skill cache, only descriptions missed in cache are sent to extractor
+    :param skip_jobkeys: jobkeys which are already processed
+    :return: list of tuples (keyword, jobkey, skills, salary, location), skills are 0 if extraction failed
     """
+    skip_jobkeys = skip_jobkeys or set()
     with open(path_to_file, 'r') as csv_file:
         reader = csv.reader(csv_file)
-
-        # skip rows before start row
-        for _ in range(start_row - 1):
-            next(reader)
-
+        batch = []
         for row in reader:
             if row[0] == 'keyword':
-                yield row[0], row[1], 'skills', row[-1]
-            else:
-                skills_raw = get_skill_from_description(row[-2])
-                try:
-                    skills_json = json.loads(get_skill_from_description(row[-2]))
-                    skills = ', '.join(skills_json['skills'])
-                    logging.info(f'Skills list: {skills}')
-                    yield row[0], row[1], skills, row[-1]
-                except Exception as e:
-                    logging.error(f'No skills list: {skills_raw}, error: {e}')
-                    yield row[0], row[1], 0, row[-1]
-
-
-def create_clean_file(path_to_source_file, aggregator_name, start_row=0) -> None:
-    """
-    Create file with cleaned data and skills, which are generated by ChatGPT
+                yield [(row[0], row[1], 'skills', row[-1], 'location')]
+                continue
+            if row[1] in skip_jobkeys:
+                continue
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield _extract_batch(extractor, batch, cache)
+                batch = []
+        if batch:
+            yield _extract_batch(extractor, batch, cache)
+
+
+def get_skills(
+        path_to_file, extractor: SkillExtractor = None, batch_size=200, cache: SkillCache = None, skip_jobkeys=None
+) -> Generator[tuple, None, None]:
+    """
+    Generate rows with skills
+    :param path_to_file: source file with data
+    :param extractor: skill extraction backend, ChatGPT with default settings if it is not set
+    :param batch_size: number of rows which are sent to extractor at once
+    :param cache: skill cache, only descriptions missed in cache are sent to extractor
+    :param skip_jobkeys: jobkeys which are already processed
+    :return: tuple which consists of cleaned data with skills
+    """
+    own_extractor = extractor is None
+    extractor = extractor or SkillExtractionEngine()
+    try:
+        for batch in get_skill_batches(path_to_file, extractor, batch_size, cache, skip_jobkeys):
+            yield from batch
+    finally:
+        if own_extractor:
+            extractor.close()
+
+
+def _location(row: list) -> str:
+    """Location of cleaned row, files cleaned before location was added have only 4 columns"""
+    return row[2] if len(row) == 5 else ''
+
+
+def _extract_skill_lists(
+        extractor: SkillExtractor, batch: list[list], cache: SkillCache = None
+) -> tuple[list[Optional[list[str]]], list[str]]:
+    """
+    Get skills for batch of cleaned rows, only descriptions which are not cached yet are given to extractor
+    :return: skills lists and prompt versions which gave them, extracted skills are cached under their prompt version
+    """
+    if cache is not None:
+        skills_lists = cache.get_many([(row[1], row[-2]) for row in batch])
+    else:
+        skills_lists = [None] * len(batch)
+    prompt_versions = [extractor.prompt_version] * len(batch)
+
+    missed = [idx for idx, skills_list in enumerate(skills_lists) if skills_list is None]
+    answers = (extractor.extract_skills_versioned([(batch[idx][1], batch[idx][-2]) for idx in missed])
+               if missed else [])
+    extracted = defaultdict(list)
+    for idx, (skills_list, prompt_version) in zip(missed, answers):
+        if skills_list is None:
+            logging.error(f'No skills list for jobkey {batch[idx][1]}')
+            continue
+        skills_lists[idx] = skills_list
+        prompt_versions[idx] = prompt_version
+        extracted[prompt_version].append((batch[idx][1], batch[idx][-2], skills_list))
+    if cache is not None:
+        for prompt_version, entries in extracted.items():
+            cache.put_many(entries, prompt_version)
+    return skills_lists, prompt_versions
+
+
+def _extract_batch(extractor: SkillExtractor, batch: list[list], cache: SkillCache = None) -> list[tuple]:
+    """Get skills for batch of rows, skills are 0 for rows which got no skills"""
+    result = []
+    skills_lists, _ = _extract_skill_lists(extractor, batch, cache)
+    for row, skills_list in zip(batch, skills_lists):
+        if skills_list is not None:
+            skills = ', '.join(skills_list)
+            logging.info(f'Skills list: {skills}')
+            result.append((row[0], row[1], skills, row[-1], _location(row)))
+        else:
+            result.append((row[0], row[1], 0, row[-1], _location(row)))
+    return result
+
+
+def _open_cache(cache_path: Optional[str], extractor: SkillExtractor, max_entries: Optional[int],
+                max_age_days: Optional[float]) -> Optional[SkillCache]:
+    """Skill cache of extractor model and prompt, None if cache is disabled"""
+    if not cache_path:
+        return None
+    return SkillCache(cache_path, extractor.model, extractor.prompt_version, max_entries, max_age_days)
+
+
+def _restore_source_order(path_to_output: str, path_to_source_file: str) -> bool:
+    """
+    Sort rows of output by position of their jobkeys in source file. Rows which failed in one run are appended by the
+    next one, so output is rewritten to keep source order, rows of jobkeys unknown to source go last.
+    :return: whether output was rewritten
+    """
+    with open(path_to_source_file, 'r') as csv_file:
+        positions = {row[1]: idx for idx, row in enumerate(csv.reader(csv_file)) if len(row) > 1}
+    with open(path_to_output, 'r', newline='') as csv_file:
+        rows = [row for row in csv.reader(csv_file) if len(row) != 0]
+    header = rows[:1] if rows and rows[0][0] == 'keyword' else []
+    rows = rows[len(header):]
+    ordered = sorted(rows, key=lambda row: positions.get(row[1], len(positions)))
+    if ordered == rows:
+        return False
+    temp_path = path_to_output + '.tmp'
+    with open(temp_path, 'w', newline='') as csv_file:
+        csv.writer(csv_file).writerows(header + ordered)
+        csv_file.flush()
+        os.fsync(csv_file.fileno())
+    os.replace(temp_path, path_to_output)
+    return True
+
+
+def _bootstrap_checkpoint(checkpoint: Checkpoint, path_to_output: str, path_to_source_file: str) -> None:
+    """
+    Take progress from output file which was written without checkpoint, so paid rows are kept. Output is rewritten
+    to the current schema first: failed rows (skills are 0) are dropped to be requested again, rows of old 4-column
+    files get location from source file and only the first row of a jobkey is kept.
+    """
+    with open(path_to_source_file, 'r') as csv_file:
+        locations = {row[1]: _location(row) for row in csv.reader(csv_file) if len(row) > 1}
+    with open(path_to_output, 'r', newline='') as csv_file:
+        rows = [row for row in csv.reader(csv_file) if len(row) != 0]
+    header = [['keyword', 'jobkey', 'skills', 'salary', 'location']] if rows and rows[0][0] == 'keyword' else []
+    done = {}
+    for row in rows[len(header):]:
+        if row[2] == '0' or row[1] in done:
+            continue
+        done[row[1]] = row if len(row) == 5 else row[:4] + [locations.get(row[1], '')]
+    temp_path = path_to_output + '.tmp'
+    with open(temp_path, 'w', newline='') as csv_file:
+        csv.writer(csv_file).writerows(header + list(done.values()))
+        csv_file.flush()
+        os.fsync(csv_file.fileno())
+    os.replace(temp_path, path_to_output)
+    checkpoint.commit(os.path.getsize(path_to_output), done)
+
+
+def create_clean_file(
+        path_to_source_file, aggregator_name, config: ExtractionConfig = None, cache_path=CACHE_PATH, resume=True,
+        extractor: SkillExtractor = None, cache_max_entries: Optional[int] = None,
+        cache_max_age_days: Optional[float] = None
+) -> str:
+    """
+    Create file with cleaned data and skills, which are generated by ChatGPT or other extractor. Progress is saved to
+    checkpoint after every batch, so after crash or rate limit abort the next run continues from the last completed
+    batch. Rows which failed to get skills are not saved and are requested again on the next run, after that output
+    is sorted back to source order.
     :param path_to_source_file: file with raw data after parsing jobsite
     :param aggregator_name: aggregator name
-    :param start_row: if something went wrong you can start from other row to avoid repetions in requests
-    """
-    file_path = f'./cleaned_data/skill_sets/{aggregator_name}_skill_set.csv'
-    with open(file_path, 'w') as csv_file:
-        writer = csv.writer(csv_file)
-        if not start_row:
-            for row in get_skills(path_to_source_file):
-                writer.writerow([row[0], row[1], row[2], row[3]])
-        else:
-            for row in get_skills(path_to_source_file, start_row):
-                writer.writerow([row[0], row[1], row[2], row[3]])
+    :param config: extraction engine settings (concurrency, rate limits, retries)
+    :param cache_path: sqlite file with cached skills, None disables cache
+    :param resume: continue from checkpoint, otherwise file is created from scratch
+    :param extractor: skill extraction backend, ChatGPT engine with config is used if it is not set
+    :param cache_max_entries: cache keeps only this number of recently used entries, unlimited if None
+    :param cache_max_age_days: cache entries older than this number of days are dropped, never if None
+    :return: path to file with skills
+    """
+    own_extractor = extractor is None
+    extractor = extractor or SkillExtractionEngine(config)
+    cache = _open_cache(cache_path, extractor, cache_max_entries, cache_max_age_days)
+    file_path = os.path.join(SKILL_SETS_DIR, f'{aggregator_name}_skill_set.csv')
+    checkpoint = Checkpoint(file_path + '.checkpoint')
+    if not resume:
+        checkpoint.reset()
+    elif checkpoint.offset == 0 and os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+        _bootstrap_checkpoint(checkpoint, file_path, path_to_source_file)
+    checkpoint.restore(file_path)
+    if checkpoint.completed:
+        logging.info(f'Resuming from checkpoint, {len(checkpoint.completed)} rows are already done')
+
+    failed = 0
+    try:
+        with open(file_path, 'a' if resume else 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            batches = get_skill_batches(path_to_source_file, extractor, cache=cache,
+                                        skip_jobkeys=checkpoint.completed)
+            for batch in batches:
+                done = []
+                for row in batch:
+                    if row[0] == 'keyword':
+                        if checkpoint.offset == 0:
+                            writer.writerow(row)
+                        continue
+                    if row[2] == 0:
+                        failed += 1
+                        continue
+                    writer.writerow(row)
+                    done.append(row[1])
+                csv_file.flush()
+                os.fsync(csv_file.fileno())
+                checkpoint.commit(os.fstat(csv_file.fileno()).st_size, done)
+        if _restore_source_order(file_path, path_to_source_file):
+            checkpoint.commit(os.path.getsize(file_path), [])
+    finally:
+        if own_extractor:
+            extractor.close()
+        if failed:
+            logging.warning(f'{failed} rows got no skills, run cleaner again to retry them')
+        if cache is not None:
+            logging.info(f'Skill cache stats: {cache.stats()}')
+            cache.evict()
+            cache.close()
+    return file_path
+
+
+def clean_store(store: JobStore, workers=None, chunk_size=500, fast=True, drop_outliers=False) -> int:
+    """
+    Clean raw postings of job store which are not cleaned yet, chunks are cleaned in process pool like in
+    clean_job_raw_data
+    :param store: job store
+    :param workers: number of worker processes, 1 cleans in current process, None uses all cores
+    :param chunk_size: number of rows sent to worker at once
+    :param fast: fast HTML stripping with lxml instead of BeautifulSoup
+    :param drop_outliers: skip postings with implausible annual salary, see salary.OUTLIER_BOUNDS
+    :return: number of cleaned postings
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = store.iter_new_raw(chunk_size)
+    jobkey_idx = RAW_COLUMNS.index('jobkey')
+    cleaned = 0
+
+    def save(chunk: list[list], rows: list[list]) -> None:
+        nonlocal cleaned
+        cleaned += store.add_cleaned(rows, [row[jobkey_idx] for row in chunk])
+
+    if workers == 1:
+        for chunk in chunks:
+            save(chunk, clean_chunk(chunk, fast, NUM_THREADS, drop_outliers))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append((chunk, executor.submit(clean_chunk, chunk, fast, 1, drop_outliers)))
+                if len(in_flight) >= workers * 2:
+                    done_chunk, future = in_flight.popleft()
+                    save(done_chunk, future.result())
+            while in_flight:
+                done_chunk, future = in_flight.popleft()
+                save(done_chunk, future.result())
+    logging.info(f'{cleaned} new postings are cleaned')
+    return cleaned
+
+
+def extract_store(store: JobStore, extractor: SkillExtractor = None, config: ExtractionConfig = None,
+                  cache_path=CACHE_PATH, batch_size=200, cache_max_entries: Optional[int] = None,
+                  cache_max_age_days: Optional[float] = None) -> int:
+    """
+    Extract skills of cleaned postings which have no skills yet. Every batch is saved right away, so after crash the
+    next run continues with postings which are not saved. Postings which failed to get skills are requested again on
+    the next run.
+    :param store: job store
+    :param extractor: skill extraction backend, ChatGPT engine with config is used if it is not set
+    :param config: extraction engine settings
+    :param cache_path: sqlite file with cached skills, None disables cache
+    :param batch_size: number of rows which are sent to extractor at once
+    :param cache_max_entries: cache keeps only this number of recently used entries, unlimited if None
+    :param cache_max_age_days: cache entries older than this number of days are dropped, never if None
+    :return: number of postings with extracted skills
+    """
+    own_extractor = extractor is None
+    extractor = extractor or SkillExtractionEngine(config)
+    cache = _open_cache(cache_path, extractor, cache_max_entries, cache_max_age_days)
+    done = failed = 0
+    try:
+        for batch in store.iter_unextracted(batch_size):
+            skills_lists, prompt_versions = _extract_skill_lists(extractor, batch, cache)
+            results = defaultdict(list)
+            for row, skills, prompt_version in zip(batch, skills_lists, prompt_versions):
+                if skills is not None:
+                    results[prompt_version].append((row[1], skills))
+            failed += len(batch) - sum(len(entries) for entries in results.values())
+            for prompt_version, entries in results.items():
+                done += store.add_skills(entries, extractor.model, prompt_version)
+    finally:
+        if own_extractor:
+            extractor.close()
+        if failed:
+            logging.warning(f'{failed} postings got no skills, run cleaner again to retry them')
+        if cache is not None:
+            logging.info(f'Skill cache stats: {cache.stats()}')
+            cache.evict()
+            cache.close()
+    logging.info(f'Skills are extracted for {done} postings')
+    return done
 
 
 if __name__ == '__main__':
@@ -155,6 +484,41 @@ if __name__ == '__main__':
             format='[%(asctime)s] %(levelname).1s %(message)s',
             level=logging.INFO, datefmt='%Y.%m.%d %H:%M:%S'
     )
-    path = '../../indeed_project/data/indeed_2023-11-28T21-27-52+00-00.csv'
-    source_file = clean_job_raw_data(path, 'indeed')
-    create_clean_file(source_file, 'indeed')
+    arg_parser = argparse.ArgumentParser(description='Clean crawled data and extract skills')
+    arg_parser.add_argument('--extractor', choices=['chatgpt', 'vocabulary'], default='chatgpt',
+                            help='chatgpt sends descriptions to OpenAI API, vocabulary matches known skills locally')
+    arg_parser.add_argument('--vocabulary-from', default=os.path.join(SKILL_SETS_DIR, 'indeed_skill_set_final.csv'),
+                            help='skill set file which vocabulary is built from')
+    arg_parser.add_argument('--store', nargs='?', const=STORE_PATH,
+                            help='read new postings from job store and save results there instead of csv files')
+    arg_parser.add_argument('--import-feed', '--import-csv', dest='import_feed',
+                            help='crawled feed file (csv or JSON lines) which is loaded into job store first')
+    arg_parser.add_argument('--cache-max-entries', type=int,
+                            help='keep only this number of recently used skill cache entries')
+    arg_parser.add_argument('--cache-max-age-days', type=float, help='drop skill cache entries older than this')
+    arg_parser.add_argument('--pack-size', type=int, default=1,
+                            help='chatgpt packed mode: send up to this number of descriptions in one request')
+    args = arg_parser.parse_args()
+    if args.pack_size < 1:
+        arg_parser.error('--pack-size must be at least 1')
+    extraction_config = ExtractionConfig(pack_size=args.pack_size)
+
+    skill_extractor = None
+    if args.extractor == 'vocabulary':
+        skill_extractor = VocabularyExtractor.from_skill_set(args.vocabulary_from)
+    if args.store:
+        job_store = JobStore(args.store)
+        try:
+            if args.import_feed:
+                job_store.import_raw_feed(args.import_feed)
+            clean_store(job_store)
+            extract_store(job_store, skill_extractor, extraction_config, cache_max_entries=args.cache_max_entries,
+                          cache_max_age_days=args.cache_max_age_days)
+            logging.info(f'Job store: {job_store.counts()}')
+        finally:
+            job_store.close()
+    else:
+        path = os.path.join(BASE_DIR, '../../indeed_project/data/indeed_2023-11-28T21-27-52+00-00.csv')
+        source_file = clean_job_raw_data(path, 'indeed')
+        create_clean_file(source_file, 'indeed', extraction_config, extractor=skill_extractor,
+                          cache_max_entries=args.cache_max_entries, cache_max_age_days=args.cache_max_age_days)
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class SkillExtractor(ABC):
+    """
+    Interface of skill extraction backend. Backend gets (jobkey, description) items and returns skills lists in the
+    same order, None means that skills for the item could not be extracted.
+    """
+
+    # model and prompt_version are parts of skill cache key, so answers of different backends never mix
+    model: str
+    prompt_version: str
+
+    @abstractmethod
+    def extract_skills(self, items: list[tuple[str, str]]) -> list[Optional[list[str]]]:
+        """Get skills lists for (jobkey, description) items"""
+
+    def extract_skills_versioned(self, items: list[tuple[str, str]]) -> list[tuple[Optional[list[str]], str]]:
+        """
+        Get skills lists together with prompt version which gave each of them, cache and store keep answers under
+        it. Backends with one prompt answer everything with prompt_version.
+        """
+        return [(skills, self.prompt_version) for skills in self.extract_skills(items)]
+
+    def close(self) -> None:
+        """Free resources of backend"""
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+import httpx
+import openai
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """Settings of OpenAI client and its HTTP connection pool"""
+    api_key: Optional[str] = None  # OPEN_AI_API environment variable is used by default
+    base_url: Optional[str] = None  # set it to local stand-in server for testing
+    timeout: float = 60.0
+    connect_timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    http2: bool = True
+    max_retries: int = 2
+
+
+_lock = threading.Lock()
+_clients: dict[ClientConfig, openai.OpenAI] = {}
+# async connections belong to event loop which opened them, so async clients are shared only inside one loop
+_async_clients: 'WeakKeyDictionary[asyncio.AbstractEventLoop, dict[ClientConfig, openai.AsyncOpenAI]]' = (
+    WeakKeyDictionary()
+)
+
+
+def _client_kwargs(config: ClientConfig) -> dict:
+    return {
+        'api_key': config.api_key or os.getenv('OPEN_AI_API'),
+        'base_url': config.base_url,
+        'timeout': httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        'max_retries': config.max_retries,
+    }
+
+
+def _http_kwargs(config: ClientConfig) -> dict:
+    return {
+        'http2': config.http2,
+        'timeout': httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        'limits': httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+        ),
+    }
+
+
+def get_client(config: ClientConfig = ClientConfig()) -> openai.OpenAI:
+    """
+    Get shared OpenAI client. All calls with the same config reuse one keep-alive connection pool, so TLS handshake is
+    done once instead of once per request.
+    """
+    with _lock:
+        client = _clients.get(config)
+        if client is None:
+            client = openai.OpenAI(http_client=httpx.Client(**_http_kwargs(config)), **_client_kwargs(config))
+            _clients[config] = client
+        return client
+
+
+def get_async_client(config: ClientConfig = ClientConfig()) -> openai.AsyncOpenAI:
+    """Get async OpenAI client shared inside running event loop"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(config)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                    http_client=httpx.AsyncClient(**_http_kwargs(config)), **_client_kwargs(config)
+            )
+            clients[config] = client
+        return client
+
+
+def close_clients() -> None:
+    """Close shared sync clients and their connections"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def close_async_clients() -> None:
+    """Close async clients of running event loop"""
+    with _lock:
+        clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+    for client in clients:
+        await client.close()
@@ -0,0 +1,129 @@
+import argparse
+import logging
+import os
+from collections.abc import Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..raw_feed import RAW_COLUMNS, iter_raw_rows
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SALARY_COLUMNS = ('jobkey', 'salaryMax', 'salaryMin', 'salaryText')
+# payments per year, hour factor is 8 hours * 22 days * 12 months as before
+PERIOD_FACTORS = {'hour': 8 * 22 * 12, 'day': 22 * 12, 'week': 52, 'month': 12, 'year': 1}
+# "a year", "per hr", "/mo" or adverb like "hourly"; both groups are mapped by PERIOD_ALIASES
+PERIOD_RE = (r'(?i)(?:(?:\ban?|\bper|/)\s*(hour|hr|day|week|wk|month|mo|year|yr|annum)s?'
+             r'|\b(hourly|daily|weekly|monthly|yearly|annually|annual))\b')
+PERIOD_ALIASES = {
+    'hour': 'hour', 'hr': 'hour', 'hourly': 'hour',
+    'day': 'day', 'daily': 'day',
+    'week': 'week', 'wk': 'week', 'weekly': 'week',
+    'month': 'month', 'mo': 'month', 'monthly': 'month',
+    'year': 'year', 'yr': 'year', 'annum': 'year', 'yearly': 'year', 'annually': 'year', 'annual': 'year',
+}
+# period of salaryText without any of known ones, such salary is not annualized
+UNKNOWN_PERIOD = 'unknown'
+CURRENCY_RE = r'(C\$|CA\$|A\$|AU\$|US\$|\$|£|€|₹|\b(?:USD|CAD|AUD|GBP|EUR|INR)\b)'
+CURRENCY_CODES = {
+    '$': 'USD', 'US$': 'USD', 'C$': 'CAD', 'CA$': 'CAD', 'A$': 'AUD', 'AU$': 'AUD', '£': 'GBP', '€': 'EUR',
+    '₹': 'INR',
+}
+# salaryText of indeed.com has no currency in most cases
+DEFAULT_CURRENCY = 'USD'
+# annual salaries outside of these bounds are flagged, usually they have wrong period in salaryText
+OUTLIER_BOUNDS = (10_000, 1_000_000)
+
+
+def normalize_salaries(frame: pd.DataFrame, bounds: tuple[float, float] = OUTLIER_BOUNDS) -> pd.DataFrame:
+    """
+    Annual salary of every posting in one column-wise pass: period and currency are parsed from salaryText, bounds
+    are annualized with factor of period, missed bound is taken from the other one.
+    :param frame: salaryMax, salaryMin and salaryText columns of crawled postings, bounds may be strings or markers
+                  like noSalaryMaxInfo
+    :param bounds: min and max plausible annual salary
+    :return: frame with period, currency, annual_min, annual_max, salary and outlier columns, salary is NaN when
+             posting has no numeric bounds or its text has no known period (period is UNKNOWN_PERIOD then), a guess
+             would mix hourly and annual salaries
+    """
+    text = frame['salaryText'].fillna('').astype(str)
+    salary_max = pd.to_numeric(frame['salaryMax'], errors='coerce')
+    salary_min = pd.to_numeric(frame['salaryMin'], errors='coerce')
+    salary_max, salary_min = salary_max.fillna(salary_min), salary_min.fillna(salary_max)
+
+    # salary texts repeat a lot, so only distinct ones are parsed
+    codes, texts = pd.factorize(text)
+    texts = pd.Series(texts)
+    period = texts.str.extract(PERIOD_RE).bfill(axis=1).iloc[:, 0].astype('string').str.lower()
+    period = period.map(PERIOD_ALIASES).fillna(UNKNOWN_PERIOD).astype(object)
+    currency = texts.str.extract(CURRENCY_RE, expand=False).str.upper()
+    currency = currency.map(CURRENCY_CODES).fillna(currency).fillna(DEFAULT_CURRENCY)
+    period = pd.Series(period.to_numpy()[codes], index=frame.index)
+    currency = pd.Series(currency.to_numpy()[codes], index=frame.index)
+    factor = period.map(PERIOD_FACTORS).astype(float)
+
+    annual_min = np.minimum(salary_min, salary_max) * factor
+    annual_max = np.maximum(salary_min, salary_max) * factor
+    salary = (annual_min + annual_max) / 2
+    return pd.DataFrame({
+        'period': period,
+        'currency': currency,
+        'annual_min': annual_min,
+        'annual_max': annual_max,
+        'salary': salary,
+        'outlier': salary.notna() & ~salary.between(*bounds),
+    }, index=frame.index)
+
+
+def salary_frame(rows: Sequence[list]) -> pd.DataFrame:
+    """Salary columns of rows in RAW_COLUMNS order"""
+    positions = [RAW_COLUMNS.index(column) for column in SALARY_COLUMNS]
+    return pd.DataFrame([[row[position] for position in positions] for row in rows], columns=list(SALARY_COLUMNS))
+
+
+def iter_salary_frames(path: str, chunk_size=100_000) -> Iterator[pd.DataFrame]:
+    """Normalized salaries of crawled feed by chunks, only salary columns of feed are read"""
+    rows = []
+    for row in iter_raw_rows(path, SALARY_COLUMNS):
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield _normalized(rows)
+            rows = []
+    if rows:
+        yield _normalized(rows)
+
+
+def _normalized(rows: list[list]) -> pd.DataFrame:
+    frame = salary_frame(rows)
+    return pd.concat([frame[['jobkey']], normalize_salaries(frame)], axis=1)
+
+
+def normalize_feed(path: str, output_path: str, chunk_size=100_000) -> str:
+    """
+    Write normalized salaries of crawled feed to csv, it is a stage of its own which doesn't touch descriptions
+    :return: output path
+    """
+    total = outliers = missed = unknown = 0
+    for idx, frame in enumerate(iter_salary_frames(path, chunk_size)):
+        frame.to_csv(output_path, mode='w' if idx == 0 else 'a', header=idx == 0, index=False)
+        total += len(frame)
+        outliers += int(frame['outlier'].sum())
+        missed += int(frame['salary'].isna().sum())
+        unknown += int((frame['period'] == UNKNOWN_PERIOD).sum())
+    logging.info(f'{total} salaries are normalized to {output_path}: {outliers} outliers, {missed} without salary '
+                 f'({unknown} of them have no known period)')
+    return output_path
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+            format='[%(asctime)s] %(levelname).1s %(message)s',
+            level=logging.INFO, datefmt='%Y.%m.%d %H:%M:%S'
+    )
+    arg_parser = argparse.ArgumentParser(description='Normalize salaries of crawled feed to annual ones')
+    arg_parser.add_argument('feed', help='crawled feed: csv, JSON lines or zstd compressed JSON lines file')
+    arg_parser.add_argument('--output', default=os.path.join(BASE_DIR, 'cleaned_data', 'salaries.csv'))
+    arg_parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = arg_parser.parse_args()
+    normalize_feed(args.feed, args.output, args.chunk_size)
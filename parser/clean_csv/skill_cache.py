@@ -0,0 +1,181 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+from .skill_extractor import MODEL, PROMPT_VERSION
+
+
+# sqlite has limit for number of parameters in one query
+QUERY_CHUNK = 500
+
+
+def normalize_description(description: str) -> str:
+    """Normalize description so the same text with other whitespaces or case gives the same key"""
+    return re.sub(r'\s+', ' ', description).strip().lower()
+
+
+class SkillCache:
+    """
+    On-disk cache of extracted skills. Entries are keyed by hash of normalized description, prompt version and model
+    name, so changing the promt or the model never returns stale answers. Entries which are warmed from skill set
+    without descriptions are keyed by jobkey.
+    """
+
+    def __init__(self, path: str, model: str = MODEL, prompt_version: str = PROMPT_VERSION,
+                 max_entries: Optional[int] = None, max_age_days: Optional[float] = None):
+        """
+        :param path: sqlite file, it is created if it doesn't exist
+        :param model: model name, part of the key
+        :param prompt_version: prompt version, part of the key
+        :param max_entries: keep only this number of recently used entries
+        :param max_age_days: drop entries older than this number of days
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.model = model
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS skills ('
+                'key TEXT PRIMARY KEY, '
+                'jobkey TEXT, '
+                'model TEXT NOT NULL, '
+                'prompt_version TEXT NOT NULL, '
+                'skills TEXT NOT NULL, '
+                'created_at REAL NOT NULL, '
+                'accessed_at REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS skills_accessed_at ON skills (accessed_at)')
+        self.connection.commit()
+
+    def make_key(self, description: str, prompt_version: Optional[str] = None) -> str:
+        """Content address of description, prompt version of cache by default"""
+        payload = '\0'.join([prompt_version or self.prompt_version, self.model, normalize_description(description)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _jobkey_key(self, jobkey: str) -> str:
+        """Key for entries which are known only by jobkey (e.g. warmed from skill set without descriptions)"""
+        payload = '\0'.join([self.prompt_version, self.model, 'jobkey', jobkey])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, items: list[tuple[str, str]]) -> list[Optional[list[str]]]:
+        """
+        Look up skills for many descriptions at once. Skills of other description of the same jobkey are never
+        returned, only entries which are known by jobkey alone (warmed without description) are found by jobkey.
+        :param items: list of (jobkey, description)
+        :return: list of skills (or None for misses) in the same order as items
+        """
+        keys = [self.make_key(description) for _, description in items]
+        jobkey_keys = [self._jobkey_key(jobkey) if jobkey else None for jobkey, _ in items]
+        wanted = list(dict.fromkeys([*keys, *filter(None, jobkey_keys)]))
+        found = {}
+        for start in range(0, len(wanted), QUERY_CHUNK):
+            chunk = wanted[start:start + QUERY_CHUNK]
+            query = f'SELECT key, skills FROM skills WHERE key IN ({",".join("?" * len(chunk))})'
+            found.update(self.connection.execute(query, chunk).fetchall())
+
+        result = []
+        used_keys = []
+        for key, jobkey_key in zip(keys, jobkey_keys):
+            key = key if key in found else jobkey_key
+            if key in found:
+                result.append(json.loads(found[key]))
+                used_keys.append(key)
+            else:
+                result.append(None)
+
+        hits = len(used_keys)
+        self.hits += hits
+        self.misses += len(items) - hits
+        if used_keys:
+            now = time.time()
+            self.connection.executemany('UPDATE skills SET accessed_at = ? WHERE key = ?',
+                                        [(now, key) for key in used_keys])
+            self.connection.commit()
+        return result
+
+    def put_many(self, entries: Iterable[tuple[str, Optional[str], list[str]]],
+                 prompt_version: Optional[str] = None) -> None:
+        """
+        Save extracted skills
+        :param entries: iterable of (jobkey, description, skills). If description is None entry is saved by jobkey only
+        :param prompt_version: prompt which gave the skills if it is not the one of cache (e.g. single prompt answers
+                               of packed mode), they are found only by cache of that prompt
+        """
+        now = time.time()
+        prompt_version = prompt_version or self.prompt_version
+        rows = []
+        for jobkey, description, skills in entries:
+            key = (self.make_key(description, prompt_version) if description is not None
+                   else self._jobkey_key(jobkey))
+            rows.append((key, jobkey, self.model, prompt_version, json.dumps(skills), now, now))
+        self.connection.executemany('INSERT OR REPLACE INTO skills VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        self.connection.commit()
+
+    def evict(self) -> int:
+        """Drop too old entries and least recently used entries above max_entries. Returns number of dropped rows"""
+        dropped = 0
+        if self.max_age_days is not None:
+            deadline = time.time() - self.max_age_days * 24 * 60 * 60
+            dropped += self.connection.execute('DELETE FROM skills WHERE created_at < ?', (deadline,)).rowcount
+        if self.max_entries is not None:
+            dropped += self.connection.execute(
+                    'DELETE FROM skills WHERE key IN '
+                    '(SELECT key FROM skills ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+            ).rowcount
+        self.connection.commit()
+        return dropped
+
+    def warm(self, path_to_skill_set: str, path_to_cleaned_data: Optional[str] = None) -> int:
+        """
+        Fill cache from existing skill set file (keyword, jobkey, skills, ...). If cleaned data file (keyword,
+        jobkey, ..., description, salary) is given, entries are also keyed by description content.
+        :return: number of warmed entries
+        """
+        descriptions = {}
+        if path_to_cleaned_data is not None:
+            with open(path_to_cleaned_data, 'r') as csv_file:
+                for row in csv.reader(csv_file):
+                    if len(row) != 0 and row[0] != 'keyword':
+                        descriptions[row[1]] = row[-2]
+
+        entries = []
+        with open(path_to_skill_set, 'r') as csv_file:
+            for row in csv.reader(csv_file):
+                if len(row) == 0 or row[0] == 'keyword' or row[2] in ('', '0'):
+                    continue
+                skills = [skill.strip() for skill in row[2].split(',')]
+                entries.append((row[1], descriptions.get(row[1]), skills))
+        self.put_many(entries)
+        logging.info(f'Skill cache warmed with {len(entries)} entries')
+        return len(entries)
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM skills').fetchone()[0]
+
+    def stats(self) -> dict:
+        """Hit/miss statistics of current session"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self),
+        }
+
+    def close(self) -> None:
+        self.connection.close()
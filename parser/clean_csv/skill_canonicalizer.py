@@ -0,0 +1,276 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from typing import Optional
+
+from .vocabulary_extractor import tokenize
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKILL_SETS_DIR = os.path.join(BASE_DIR, 'cleaned_data', 'skill_sets')
+ALIASES_PATH = os.path.join(SKILL_SETS_DIR, 'skill_aliases.json')
+
+# words which don't change the skill: "Python programming", "SQL skills", "Excel knowledge"
+GENERIC_WORDS = frozenset({
+    'programming', 'language', 'languages', 'skill', 'skills', 'experience', 'knowledge', 'proficiency',
+    'proficient', 'basic', 'basics', 'advanced', 'strong', 'expert', 'expertise',
+})
+# trailing words which are dropped only when the rest is already a known skill: "AWS Cloud" -> "AWS", but
+# "Google Cloud" stays as is when there is no "Google" skill
+QUALIFIER_WORDS = frozenset({
+    'cloud', 'services', 'service', 'platform', 'framework', 'library', 'suite', 'software', 'tools', 'tool',
+    'database',
+})
+VERSION_RE = re.compile(r'v?\d+(?:\.(?:\d+|x))*')
+# trailing version of word: html5, css3, python3, but not s3 or ec2
+WORD_VERSION_RE = re.compile(r'([a-z]{3,})\d+')
+COMPACT_RE = re.compile(r'[^a-z0-9+#]')
+
+
+def _singular(token: str) -> str:
+    """Rule-based lemma of plural noun, it is only used as lookup key, so rare wrong lemmas are harmless"""
+    if not token.isalpha():
+        return token
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith(('sses', 'ches', 'shes', 'xes')):
+        return token[:-2]
+    # analysis, redis, nodejs are not plurals
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is', 'js')):
+        return token[:-1]
+    return token
+
+
+def skill_key(skill: str) -> str:
+    """
+    Normalized lookup key of skill: case folding, version numbers and generic words are dropped, the last word is
+    lemmatized, e.g. "Python 3 programming" -> "python", "Relational Databases" -> "relational database"
+    """
+    tokens = [WORD_VERSION_RE.fullmatch(token).group(1) if WORD_VERSION_RE.fullmatch(token) else token
+              for token in tokenize(skill.casefold())]
+    tokens = [token for token in tokens if not VERSION_RE.fullmatch(token)] or tokens
+    tokens = [token for token in tokens if token not in GENERIC_WORDS] or tokens
+    if tokens:
+        tokens[-1] = _singular(tokens[-1])
+    return ' '.join(tokens)
+
+
+def _compact(key: str) -> str:
+    """Key without spaces and punctuation: "node js", "node.js" and "nodejs" are the same"""
+    return COMPACT_RE.sub('', key)
+
+
+def _edit_distance(first: str, second: str) -> int:
+    """Levenshtein distance where transposition of adjacent chars is one edit too"""
+    previous2, previous = None, list(range(len(second) + 1))
+    for idx, char in enumerate(first, 1):
+        current = [idx]
+        for jdx, other in enumerate(second, 1):
+            distance = min(previous[jdx] + 1, current[jdx - 1] + 1, previous[jdx - 1] + (char != other))
+            if idx > 1 and jdx > 1 and char == second[jdx - 2] and first[idx - 2] == other:
+                distance = min(distance, previous2[jdx - 2] + 1)
+            current.append(distance)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def is_misspelling(key: str, other: str, max_edits=1, min_length=5) -> bool:
+    """
+    Whether two skill keys are spellings of the same skill: they have the same number of words, only one word differs
+    by at most max_edits edits ("kubernets", "postgressql") and it isn't the other word with a prefix, which usually
+    gives another skill ("unstructured", "inorganic", "non-functional", "evaluation")
+    :param min_length: shorter words are never treated as misspelled, "mi" and "ai" differ by one char
+    """
+    words, other_words = key.split(), other.split()
+    if len(words) != len(other_words):
+        return False
+    differ = [(word, other_word) for word, other_word in zip(words, other_words) if word != other_word]
+    if len(differ) != 1:
+        return False
+    shorter, longer = sorted(differ[0], key=len)
+    if len(shorter) < min_length or longer.endswith(shorter):
+        return False
+    return _edit_distance(shorter, longer) <= max_edits
+
+
+class NgramIndex:
+    """Character trigram index of skill keys for fuzzy lookup by Dice similarity"""
+
+    def __init__(self, n=3):
+        self.n = n
+        self.postings = defaultdict(list)
+        self.sizes = {}
+
+    def grams(self, key: str) -> set[str]:
+        padded = f'${_compact(key)}$'
+        return {padded[idx:idx + self.n] for idx in range(max(len(padded) - self.n + 1, 1))}
+
+    def add(self, key: str) -> None:
+        grams = self.grams(key)
+        self.sizes[key] = len(grams)
+        for gram in grams:
+            self.postings[gram].append(key)
+
+    def best(self, key: str, threshold: float, accept: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        The most similar indexed key with similarity >= threshold
+        :param accept: candidates which it rejects are skipped
+        """
+        grams = self.grams(key)
+        shared = Counter(candidate for gram in grams for candidate in self.postings.get(gram, ()))
+        scores = ((2 * count / (len(grams) + self.sizes[candidate]), candidate) for candidate, count in shared.items())
+        for score, candidate in sorted(scores, reverse=True):
+            if score < threshold:
+                return None
+            if accept is None or accept(candidate):
+                return candidate
+        return None
+
+
+class SkillCanonicalizer:
+    """
+    Maps free-text skills to canonical ones: "python programming", "Python 3" and "python" -> "Python". Learned aliases
+    are built from extracted skill sets, manual ones are edited by hand in the same JSON file and win over learned.
+    After build every lookup is one key normalization and one dict hit.
+    """
+
+    def __init__(self, learned: Optional[dict[str, str]] = None, manual: Optional[dict[str, str]] = None):
+        """
+        :param learned: skill key -> canonical skill
+        :param manual: skill (any spelling) -> canonical skill
+        """
+        self.learned = dict(learned or {})
+        self.manual = dict(manual or {})
+        self.index = {**self.learned, **{skill_key(skill): canonical for skill, canonical in self.manual.items()}}
+        self._memo = {}
+
+    @staticmethod
+    def learn(skill_lists: Iterable[Sequence[str]], threshold=0.8, max_edits=1, min_length=5) -> dict[str, str]:
+        """
+        Group spellings of the same skill, the most frequent group member is canonical. Keys are processed from the
+        most frequent: key is merged into a known one when compact forms are equal, when it is a known key with
+        qualifier words ("aws cloud") or when it is a misspelling of similar known key (typos, "kubernets")
+        :param skill_lists: skills of every posting
+        :param threshold: min Dice similarity of trigrams of fuzzy merge candidates
+        :param max_edits: max edit distance of misspelled word, see is_misspelling
+        :param min_length: shorter words are never merged fuzzily, "mi" and "ai" differ by one char
+        :return: skill key -> canonical skill in its most common spelling
+        """
+        counts = Counter()
+        spelling = defaultdict(Counter)
+        for skills in skill_lists:
+            for skill in skills:
+                skill = skill.strip()
+                key = skill_key(skill)
+                if key:
+                    counts[key] += 1
+                    spelling[key][skill] += 1
+
+        index = NgramIndex()
+        compact = {}
+        targets = {}
+        for key, _ in counts.most_common():
+            tokens = key.split()
+            target = compact.get(_compact(key))
+            while target is None and len(tokens) > 1 and tokens[-1] in QUALIFIER_WORDS:
+                tokens = tokens[:-1]
+                target = targets.get(' '.join(tokens))
+            if target is None and len(_compact(key)) >= min_length:
+                target = index.best(key, threshold,
+                                    lambda candidate: is_misspelling(key, candidate, max_edits, min_length))
+            if target is None:
+                target = key
+                index.add(key)
+                compact[_compact(key)] = key
+            targets[key] = target
+        return {key: spelling[target].most_common(1)[0][0] for key, target in targets.items()}
+
+    @classmethod
+    def from_skill_set(cls, path_to_skill_set: str, aliases_path: Optional[str] = None,
+                       **kwargs) -> 'SkillCanonicalizer':
+        """
+        Learn aliases from skill set file (keyword, jobkey, skills, ... file), manual aliases of existing aliases file
+        are kept
+        """
+        manual = cls.load(aliases_path).manual if aliases_path and os.path.exists(aliases_path) else {}
+        with open(path_to_skill_set, 'r') as source:
+            learned = cls.learn((row['skills'].split(',') for row in csv.DictReader(source)
+                                 if row['skills'] not in ('', '0')), **kwargs)
+        return cls(learned, manual)
+
+    @classmethod
+    def load(cls, path: str) -> 'SkillCanonicalizer':
+        """Load aliases from json file with manual and learned sections"""
+        with open(path, 'r') as source:
+            aliases = json.load(source)
+        return cls(aliases.get('learned'), aliases.get('manual'))
+
+    def save(self, path: str) -> None:
+        """Save aliases as json, manual section is the place for hand edits"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as dest:
+            json.dump({'manual': self.manual, 'learned': dict(sorted(self.learned.items()))}, dest, indent=2,
+                      ensure_ascii=False)
+
+    def canonical(self, skill: str) -> str:
+        """Canonical spelling of skill, unknown skills are returned stripped"""
+        canonical = self._memo.get(skill)
+        if canonical is None:
+            canonical = self.index.get(skill_key(skill)) or skill.strip()
+            self._memo[skill] = canonical
+        return canonical
+
+    def canonicalize(self, skills: Iterable[str]) -> list[str]:
+        """Canonical skills without duplicates, order is kept"""
+        return list(dict.fromkeys(self.canonical(skill) for skill in skills if skill.strip()))
+
+
+def canonicalize_skill_set(path_to_skill_set: str, output_path: str, canonicalizer: SkillCanonicalizer) -> str:
+    """
+    Write copy of skill set file with canonical skills, other columns are kept as is
+    :return: output path
+    """
+    raw, canonical = set(), set()
+    with open(path_to_skill_set, 'r') as source, open(output_path, 'w', newline='') as dest:
+        reader = csv.DictReader(source)
+        writer = csv.DictWriter(dest, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        for row in reader:
+            if row['skills'] not in ('', '0'):
+                skills = [skill.strip() for skill in row['skills'].split(',') if skill.strip()]
+                raw.update(skills)
+                skills = canonicalizer.canonicalize(skills)
+                canonical.update(skills)
+                row['skills'] = ', '.join(skills)
+            writer.writerow(row)
+    logging.info(f'{len(raw)} distinct skills are mapped to {len(canonical)} canonical ones in {output_path}')
+    return output_path
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+            format='[%(asctime)s] %(levelname).1s %(message)s',
+            level=logging.INFO, datefmt='%Y.%m.%d %H:%M:%S'
+    )
+    arg_parser = argparse.ArgumentParser(description='Learn skill aliases and write skill set with canonical skills')
+    arg_parser.add_argument('--skill-set', default=os.path.join(SKILL_SETS_DIR, 'indeed_skill_set.csv'))
+    arg_parser.add_argument('--aliases', default=ALIASES_PATH,
+                            help='aliases file, its manual section is kept when aliases are learned again')
+    arg_parser.add_argument('--output', default=os.path.join(SKILL_SETS_DIR, 'indeed_skill_set_canonical.csv'))
+    arg_parser.add_argument('--threshold', type=float, default=0.8, help='min trigram similarity for fuzzy merge')
+    arg_parser.add_argument('--max-edits', type=int, default=1, help='max edit distance of misspelled skill')
+    arg_parser.add_argument('--no-learn', action='store_true', help='use aliases file as is')
+    args = arg_parser.parse_args()
+
+    if args.no_learn:
+        skill_canonicalizer = SkillCanonicalizer.load(args.aliases)
+    else:
+        skill_canonicalizer = SkillCanonicalizer.from_skill_set(args.skill_set, args.aliases, threshold=args.threshold,
+                                                               max_edits=args.max_edits)
+        skill_canonicalizer.save(args.aliases)
+    canonicalize_skill_set(args.skill_set, args.output, skill_canonicalizer)
@@ -0,0 +1,339 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import openai
+
+from .extractors import SkillExtractor
+from .openai_client import ClientConfig, close_async_clients, get_async_client
+from .tokenizer import get_encoding
+
+
+MODEL = 'gpt-3.5-turbo'
+# change it every time when prompt is changed, cached answers for old prompt won't be used then
+PROMPT_VERSION = '1'
+PACKED_PROMPT_VERSION = '1-packed'
+SYSTEM_PROMPT = 'You are experienced datascientist, skilled in extracting precise skill from different data'
+
+# errors which are worth another try after a pause
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def build_prompt(description: str) -> str:
+    """Build user promt for one job description"""
+    return (f'Evaluate which skills are required in the following job description. Extract 10 skills from the '
+            f'following job description and return them in a json dict: '
+            f'{{"skills": ["skill_1", "skill_2", ..., "skill_n"]}}. '
+            f'Skills must be one or two words but also skills should be understandable what they mean. Here is '
+            f'the description: {description}')
+
+
+def build_messages(description: str) -> list[dict]:
+    """Build chat messages for one job description"""
+    return [
+        {
+            'role': 'system',
+            'content': SYSTEM_PROMPT
+        },
+        {
+            'role': 'user',
+            'content': build_prompt(description)
+        }
+    ]
+
+
+def build_packed_prompt(items: list[tuple[str, str]]) -> str:
+    """Build user promt for several job descriptions keyed by jobkey"""
+    descriptions = '\n\n'.join(f'jobkey: {jobkey}\ndescription: {description}' for jobkey, description in items)
+    return (f'Evaluate which skills are required in each of the following job descriptions. Extract 10 skills from '
+            f'every job description and return them in one json dict where keys are jobkeys: '
+            f'{{"jobkey_1": ["skill_1", "skill_2", ..., "skill_n"], "jobkey_2": [...]}}. '
+            f'Skills must be one or two words but also skills should be understandable what they mean. Here are '
+            f'the descriptions:\n\n{descriptions}')
+
+
+def build_packed_messages(items: list[tuple[str, str]]) -> list[dict]:
+    """Build chat messages for several job descriptions"""
+    return [
+        {
+            'role': 'system',
+            'content': SYSTEM_PROMPT
+        },
+        {
+            'role': 'user',
+            'content': build_packed_prompt(items)
+        }
+    ]
+
+
+def parse_skills(content: Optional[str]) -> Optional[list[str]]:
+    """Get skills list from ChatGPT answer or None if answer is broken"""
+    if content is None:
+        return None
+    try:
+        skills = json.loads(content)['skills']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(skills, list):
+        return None
+    return [str(skill) for skill in skills]
+
+
+def parse_packed_skills(content: Optional[str], jobkeys: list[str]) -> dict[str, list[str]]:
+    """Get skills lists by jobkey from packed answer. Jobkeys with missing or broken skills are not in result."""
+    if content is None:
+        return {}
+    try:
+        answer = json.loads(content)
+    except ValueError:
+        return {}
+    if not isinstance(answer, dict):
+        return {}
+    result = {}
+    for jobkey in jobkeys:
+        skills = answer.get(jobkey)
+        if isinstance(skills, list):
+            result[jobkey] = [str(skill) for skill in skills]
+    return result
+
+
+@dataclass
+class ExtractionConfig:
+    """Settings for SkillExtractionEngine. Limits are taken from your OpenAI account tier."""
+    model: str = MODEL
+    concurrency: int = 8
+    requests_per_minute: int = 3500
+    tokens_per_minute: int = 60000
+    completion_tokens: int = 150  # expected answer length, counted against tokens per minute
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    # retries are done by engine with its own backoff, so client itself doesn't retry
+    client: ClientConfig = field(default_factory=lambda: ClientConfig(max_retries=0))
+    # packed mode: up to pack_size descriptions in one request if prompt fits into pack_token_budget
+    pack_size: int = 1
+    pack_token_budget: int = 12000
+
+    @property
+    def prompt_version(self) -> str:
+        return PACKED_PROMPT_VERSION if self.pack_size > 1 else PROMPT_VERSION
+
+
+class RateLimiter:
+    """
+    Token bucket limiter for requests per minute and tokens per minute. Both buckets are refilled continuously, so
+    requests are spread over the minute instead of being sent in bursts.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, period: float = 60.0):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.period = period
+        self.request_allowance = self.request_capacity
+        self.token_allowance = self.token_capacity
+        self.updated_at = time.monotonic()
+        # lock is bound to the loop which uses it first, engine may run its batches on a new loop
+        self._lock = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.request_allowance = min(
+                self.request_capacity,
+                self.request_allowance + elapsed * self.request_capacity / self.period
+        )
+        self.token_allowance = min(
+                self.token_capacity,
+                self.token_allowance + elapsed * self.token_capacity / self.period
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until request with given number of tokens could be sent"""
+        # request bigger than the whole bucket would wait forever
+        tokens = min(float(tokens), self.token_capacity)
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self.request_allowance >= 1 and self.token_allowance >= tokens:
+                    self.request_allowance -= 1
+                    self.token_allowance -= tokens
+                    return
+                request_wait = (1 - self.request_allowance) * self.period / self.request_capacity
+                token_wait = (tokens - self.token_allowance) * self.period / self.token_capacity
+                await asyncio.sleep(max(request_wait, token_wait, 0.001))
+
+
+class SkillExtractionEngine(SkillExtractor):
+    """
+    ChatGPT backend. Send job descriptions to ChatGPT concurrently. Every description is requested exactly once (plus
+    retries on temporary errors), number of requests in flight is bounded by config.concurrency and results are
+    returned in the same order as descriptions.
+    """
+
+    def __init__(self, config: Optional[ExtractionConfig] = None):
+        self.config = config or ExtractionConfig()
+        self.encoding = get_encoding()
+        self.limiter = RateLimiter(self.config.requests_per_minute, self.config.tokens_per_minute)
+        # one loop for the whole engine life, so pooled connections are kept alive between batches
+        self._loop = None
+
+    @property
+    def model(self) -> str:
+        return self.config.model
+
+    @property
+    def prompt_version(self) -> str:
+        return self.config.prompt_version
+
+    def count_tokens(self, messages: list[dict]) -> int:
+        """Number of prompt tokens in messages"""
+        return sum(len(self.encoding.encode_ordinary(message['content'])) for message in messages)
+
+    def estimate_tokens(self, description: str) -> int:
+        """Estimate tokens of one request for rate limiting"""
+        return self.count_tokens(build_messages(description)) + self.config.completion_tokens
+
+    def pack(self, items: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+        """
+        Split (jobkey, description) items into packs. Pack has at most config.pack_size items and its prompt together
+        with expected answers fits into config.pack_token_budget. Too long description goes to a pack of its own.
+        """
+        preamble_tokens = self.count_tokens(build_packed_messages([]))
+        packs = []
+        pack, pack_tokens = [], preamble_tokens
+        for jobkey, description in items:
+            item_tokens = (len(self.encoding.encode_ordinary(f'jobkey: {jobkey}\ndescription: {description}\n\n'))
+                           + self.config.completion_tokens)
+            if pack and (len(pack) == self.config.pack_size
+                         or pack_tokens + item_tokens > self.config.pack_token_budget):
+                packs.append(pack)
+                pack, pack_tokens = [], preamble_tokens
+            pack.append((jobkey, description))
+            pack_tokens += item_tokens
+        if pack:
+            packs.append(pack)
+        return packs
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        delay = min(self.config.backoff_max, self.config.backoff_base * 2 ** attempt)
+        return random.uniform(0, delay)
+
+    async def _complete(self, client, semaphore, messages: list[dict], tokens: int) -> Optional[str]:
+        async with semaphore:
+            for attempt in range(self.config.max_retries + 1):
+                await self.limiter.acquire(tokens)
+                try:
+                    response = await client.chat.completions.create(
+                            model=self.config.model,
+                            messages=messages,
+                            temperature=0
+                    )
+                    return response.choices[0].message.content
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.config.max_retries:
+                        logging.error(f'Giving up after {attempt + 1} attempts, error: {e}')
+                        return None
+                    delay = self.backoff_delay(attempt)
+                    logging.warning(f'Request failed: {e}, retry in {delay:.1f}s')
+                    await asyncio.sleep(delay)
+                except openai.APIError as e:
+                    logging.error(f'Request failed: {e}')
+                    return None
+        return None
+
+    async def _request(self, client, semaphore, description: str) -> Optional[str]:
+        return await self._complete(client, semaphore, build_messages(description), self.estimate_tokens(description))
+
+    async def _request_pack(self, client, semaphore, pack: list[tuple[str, str]]) -> Optional[dict[str, list[str]]]:
+        """Skills by jobkey from packed answer, None if the request itself failed after all retries"""
+        messages = build_packed_messages(pack)
+        tokens = self.count_tokens(messages) + self.config.completion_tokens * len(pack)
+        content = await self._complete(client, semaphore, messages, tokens)
+        if content is None:
+            return None
+        return parse_packed_skills(content, [jobkey for jobkey, _ in pack])
+
+    async def extract_all(self, descriptions: list[str]) -> list[Optional[str]]:
+        """Get raw ChatGPT answers for all descriptions. Failed requests give None."""
+        client = get_async_client(self.config.client)
+        semaphore = asyncio.Semaphore(self.config.concurrency)
+        return await asyncio.gather(*(self._request(client, semaphore, description) for description in descriptions))
+
+    async def extract_packed(self, items: list[tuple[str, str]]) -> list[tuple[Optional[list[str]], str]]:
+        """
+        Get skills for (jobkey, description) items with several descriptions per request. Descriptions which are
+        missed in packed answer (or whole pack if answer is malformed) are requested one by one right away. Pack which
+        failed after all retries is not requested again one by one, it would only double the cost; its items are None
+        and are retried by the next run.
+        :return: skills list (or None) and prompt version which gave it for every item
+        """
+        client = get_async_client(self.config.client)
+        semaphore = asyncio.Semaphore(self.config.concurrency)
+        packs = self.pack(items)
+        answers = await asyncio.gather(*(self._request_pack(client, semaphore, pack) for pack in packs))
+        found = {}
+        failed = set()
+        for pack, answer in zip(packs, answers):
+            if answer is None:
+                failed.update(jobkey for jobkey, _ in pack)
+            else:
+                found.update(answer)
+
+        missed = [idx for idx, (jobkey, _) in enumerate(items) if jobkey not in found and jobkey not in failed]
+        if missed:
+            logging.warning(f'{len(missed)} of {len(items)} descriptions are missed in packed answers, '
+                            f'requesting them one by one')
+        single = await asyncio.gather(*(self._request(client, semaphore, items[idx][1]) for idx in missed))
+        result = [(found.get(jobkey), PACKED_PROMPT_VERSION) for jobkey, _ in items]
+        for idx, content in zip(missed, single):
+            result[idx] = (parse_skills(content), PROMPT_VERSION)
+        return result
+
+    def _run(self, coroutine):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+
+    def run(self, descriptions: list[str]) -> list[Optional[str]]:
+        """Synchronous wrapper around extract_all"""
+        return self._run(self.extract_all(descriptions))
+
+    def extract_skills(self, items: list[tuple[str, str]]) -> list[Optional[list[str]]]:
+        """
+        Get skills lists for (jobkey, description) items in the same order. Packed mode is used if config.pack_size
+        is bigger than 1. Failed descriptions give None.
+        """
+        return [skills for skills, _ in self.extract_skills_versioned(items)]
+
+    def extract_skills_versioned(self, items: list[tuple[str, str]]) -> list[tuple[Optional[list[str]], str]]:
+        """Skills lists with prompt version of every item, packed mode answers some items with single prompt"""
+        if self.config.pack_size > 1:
+            return self._run(self.extract_packed(items))
+        contents = self.run([description for _, description in items])
+        return [(parse_skills(content), PROMPT_VERSION) for content in contents]
+
+    def close(self) -> None:
+        """Close pooled connections and event loop of engine"""
+        if self._loop is not None:
+            self._loop.run_until_complete(close_async_clients())
+            self._loop.close()
+            self._loop = None
@@ -0,0 +1,55 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+ENCODING_NAME = 'cl100k_base'
+MAX_TOKENS = 3995
+# cl100k_base token is about 4 characters of english text on average, so text longer than max_tokens * 8 characters
+# practically always has more than max_tokens tokens. Tail after this limit is never tokenized.
+CHARS_PER_TOKEN = 8
+NUM_THREADS = 8
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = ENCODING_NAME) -> tiktoken.Encoding:
+    """Load encoding once per process"""
+    return tiktoken.get_encoding(name)
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    return len(get_encoding().encode_ordinary(text))
+
+
+def pre_trim(text: str, max_tokens: int = MAX_TOKENS, chars_per_token: int = CHARS_PER_TOKEN) -> str:
+    """Cut text by characters, so oversized text is not fully tokenized"""
+    return text[:max_tokens * chars_per_token]
+
+
+def _truncate_tokens(text: str, trimmed: str, tokens: list[int], max_tokens: int) -> str:
+    if len(tokens) > max_tokens:
+        return get_encoding().decode(tokens[:max_tokens])
+    return trimmed if len(trimmed) < len(text) else text
+
+
+def truncate_text(text: str, max_tokens: int = MAX_TOKENS) -> str:
+    """Truncate text to max_tokens tokens"""
+    trimmed = pre_trim(text, max_tokens)
+    return _truncate_tokens(text, trimmed, get_encoding().encode_ordinary(trimmed), max_tokens)
+
+
+def truncate_batch(texts: list[str], max_tokens: int = MAX_TOKENS, num_threads: int = NUM_THREADS) -> list[str]:
+    """
+    Truncate many texts at once. Texts are tokenized by tiktoken batch encoding in several threads.
+    :param texts: list of texts
+    :param max_tokens: max number of tokens for every text
+    :param num_threads: number of threads for tiktoken, use 1 inside worker processes
+    :return: list of truncated texts in the same order
+    """
+    trimmed = [pre_trim(text, max_tokens) for text in texts]
+    tokens_batch = get_encoding().encode_ordinary_batch(trimmed, num_threads=num_threads)
+    return [
+        _truncate_tokens(text, trimmed_text, tokens, max_tokens)
+        for text, trimmed_text, tokens in zip(texts, trimmed, tokens_batch)
+    ]
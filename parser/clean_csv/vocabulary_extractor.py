@@ -0,0 +1,104 @@
+import csv
+import hashlib
+import json
+import re
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from .extractors import SkillExtractor
+
+
+# words with dots, pluses and hashes inside are kept whole: node.js, c++, c#, ci/cd
+TOKEN_RE = re.compile(r'[a-z0-9+#]+(?:[./-][a-z0-9+#]+)*')
+# skills which are common english words and give too many false matches in plain text
+STOP_SKILLS = frozenset({'go', 'it', 'access', 'time', 'office', 'support'})
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lower-cased word tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class VocabularyExtractor(SkillExtractor):
+    """
+    Local skill extractor which finds known skills in description text without network. Skills are matched as whole
+    word phrases: description is tokenized once and every position is looked up in a phrase index (first token ->
+    possible phrase lengths), the longest phrase wins, e.g. "machine learning" over "machine". Lookups are plain dict
+    hits, so thousands of descriptions per second are processed on one core.
+    """
+
+    model = 'vocabulary'
+
+    def __init__(self, skills: Iterable[str], max_skills: Optional[int] = 10, stop_skills=STOP_SKILLS):
+        """
+        :param skills: known skills, their spelling is used in output
+        :param max_skills: max number of skills for description (most mentioned first), None gives all
+        :param stop_skills: lower-cased skills which are never matched
+        """
+        self.max_skills = max_skills
+        self.phrases = {}
+        self.lengths = defaultdict(set)
+        for skill in skills:
+            tokens = tuple(tokenize(skill))
+            if not tokens or ' '.join(tokens) in stop_skills or len(''.join(tokens)) < 2:
+                continue
+            self.phrases.setdefault(tokens, skill.strip())
+            self.lengths[tokens[0]].add(len(tokens))
+        # longest phrases are checked first
+        self.lengths = {token: sorted(lengths, reverse=True) for token, lengths in self.lengths.items()}
+        digest = hashlib.sha256('\n'.join(sorted(self.phrases.values())).encode('utf-8')).hexdigest()
+        self.prompt_version = f'vocabulary-{digest[:12]}-{max_skills}'
+
+    @classmethod
+    def from_skill_set(cls, path_to_skill_set: str, min_count=2, **kwargs) -> 'VocabularyExtractor':
+        """
+        Build vocabulary from skills which were already extracted by ChatGPT (keyword, jobkey, skills, ... file)
+        :param path_to_skill_set: skill set file
+        :param min_count: skill must be extracted at least this number of times
+        """
+        counts = Counter()
+        spelling = defaultdict(Counter)
+        with open(path_to_skill_set, 'r') as csv_file:
+            for row in csv.reader(csv_file):
+                if len(row) == 0 or row[0] == 'keyword' or row[2] in ('', '0'):
+                    continue
+                for skill in row[2].split(','):
+                    skill = skill.strip()
+                    key = ' '.join(tokenize(skill))
+                    if key:
+                        counts[key] += 1
+                        spelling[key][skill] += 1
+        # the most common spelling is used in output
+        skills = [spelling[key].most_common(1)[0][0] for key, count in counts.most_common() if count >= min_count]
+        return cls(skills, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'VocabularyExtractor':
+        """Load vocabulary from json list, it could be edited by hand"""
+        with open(path, 'r') as source:
+            return cls(json.load(source), **kwargs)
+
+    def save(self, path: str) -> None:
+        """Save vocabulary as json list"""
+        with open(path, 'w') as dest:
+            json.dump(sorted(self.phrases.values(), key=str.lower), dest, indent=2)
+
+    def match(self, description: str) -> list[str]:
+        """Find skills in description, most mentioned first"""
+        tokens = tokenize(description)
+        found = Counter()
+        idx = 0
+        while idx < len(tokens):
+            step = 1
+            for length in self.lengths.get(tokens[idx], ()):
+                skill = self.phrases.get(tuple(tokens[idx:idx + length]))
+                if skill is not None:
+                    found[skill] += 1
+                    step = length
+                    break
+            idx += step
+        # Counter keeps first occurrence order for equal counts
+        return [skill for skill, _ in found.most_common(self.max_skills)]
+
+    def extract_skills(self, items: list[tuple[str, str]]) -> list[Optional[list[str]]]:
+        return [self.match(description) for _, description in items]
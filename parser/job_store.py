@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from typing import Optional
+
+from .raw_feed import RAW_COLUMNS, iter_raw_rows
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(BASE_DIR, '..', 'data', 'jobs.sqlite')
+
+CLEANED_COLUMNS = ('keyword', 'jobkey', 'location', 'description', 'salary')
+# sqlite has limit for number of parameters in one query
+QUERY_CHUNK = 500
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS raw_postings ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'keyword TEXT, location TEXT, page INTEGER, position INTEGER, company TEXT, '
+    'jobkey TEXT NOT NULL UNIQUE, '
+    'jobTitle TEXT, jobDescription TEXT, salaryMax TEXT, salaryMin TEXT, salaryText TEXT, '
+    'crawled_at TEXT NOT NULL, '
+    'cleaned_at TEXT)',
+    'CREATE INDEX IF NOT EXISTS raw_postings_not_cleaned ON raw_postings (id) WHERE cleaned_at IS NULL',
+
+    'CREATE TABLE IF NOT EXISTS cleaned_postings ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'jobkey TEXT NOT NULL UNIQUE, '
+    'keyword TEXT, location TEXT, description TEXT, salary REAL, '
+    'cleaned_at TEXT NOT NULL, '
+    'extracted_at TEXT, model TEXT, prompt_version TEXT)',
+    'CREATE INDEX IF NOT EXISTS cleaned_postings_not_extracted ON cleaned_postings (id) WHERE extracted_at IS NULL',
+
+    'CREATE TABLE IF NOT EXISTS skills ('
+    'jobkey TEXT NOT NULL, '
+    'skill TEXT NOT NULL, '
+    'PRIMARY KEY (jobkey, skill)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS skills_skill ON skills (skill)',
+
+    'CREATE TABLE IF NOT EXISTS crawl_index ('
+    'jobkey TEXT PRIMARY KEY, '
+    'first_seen_at TEXT NOT NULL, '
+    'last_seen_at TEXT NOT NULL, '
+    'fetched_at TEXT)',
+
+    'CREATE TABLE IF NOT EXISTS datasets ('
+    'name TEXT PRIMARY KEY, '
+    'path TEXT NOT NULL, '
+    'postings INTEGER NOT NULL, '
+    'created_at TEXT NOT NULL)',
+]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore:
+    """
+    Embedded SQLite store of all pipeline stages: raw postings from spider, cleaned postings, extracted skills and
+    built datasets, every table is keyed by jobkey. Every stage marks rows it has processed, so the next run of a stage
+    reads only new rows. Crawled again posting with changed description is cleaned and extracted again.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        """
+        :param path: sqlite file, it is created if it doesn't exist
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def add_raw(self, items: Iterable[dict]) -> int:
+        """
+        Insert or update crawled postings in one transaction
+        :param items: spider items
+        :return: number of written rows
+        """
+        now = _now()
+        rows = [tuple(item.get(column) for column in RAW_COLUMNS) + (now,) for item in items]
+        updates = ', '.join(f'{column} = excluded.{column}' for column in RAW_COLUMNS if column != 'jobkey')
+        self.connection.executemany(
+                f'INSERT INTO raw_postings ({", ".join(RAW_COLUMNS)}, crawled_at) '
+                f'VALUES ({", ".join("?" * (len(RAW_COLUMNS) + 1))}) '
+                f'ON CONFLICT (jobkey) DO UPDATE SET {updates}, crawled_at = excluded.crawled_at, '
+                f'cleaned_at = CASE WHEN excluded.jobDescription IS jobDescription '
+                f'AND excluded.salaryText IS salaryText THEN cleaned_at END',
+                rows
+        )
+        self.connection.commit()
+        return len(rows)
+
+    def import_raw_feed(self, path: str, batch_size=1000) -> int:
+        """Load crawled feed (csv or JSON lines file, see raw_feed) into store, it is a way to move old crawls there"""
+        total = 0
+        batch = []
+        for row in iter_raw_rows(path):
+            batch.append(dict(zip(RAW_COLUMNS, row)))
+            if len(batch) == batch_size:
+                total += self.add_raw(batch)
+                batch = []
+        total += self.add_raw(batch)
+        logging.info(f'{total} postings are imported from {path}')
+        return total
+
+    def iter_jobkeys(self) -> Iterator[str]:
+        """Jobkeys of all crawled postings"""
+        for (jobkey,) in self.connection.execute('SELECT jobkey FROM raw_postings'):
+            yield jobkey
+
+    def mark_seen(self, jobkeys: Iterable[str]) -> None:
+        """Remember that jobkeys are listed on search page now"""
+        now = _now()
+        self.connection.executemany(
+                'INSERT INTO crawl_index (jobkey, first_seen_at, last_seen_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (jobkey) DO UPDATE SET last_seen_at = excluded.last_seen_at',
+                [(jobkey, now, now) for jobkey in jobkeys]
+        )
+        self.connection.commit()
+
+    def mark_fetched(self, jobkeys: Iterable[str]) -> None:
+        """Remember that job pages are fetched and parsed now, whatever happens with their items later"""
+        now = _now()
+        self.connection.executemany(
+                'INSERT INTO crawl_index (jobkey, first_seen_at, last_seen_at, fetched_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (jobkey) DO UPDATE SET fetched_at = excluded.fetched_at',
+                [(jobkey, now, now, now) for jobkey in jobkeys]
+        )
+        self.connection.commit()
+
+    def fetched_at(self, jobkeys: list[str]) -> dict[str, datetime]:
+        """Last fetch time of jobkeys, jobkeys which were never fetched are missed"""
+        fetched = {}
+        for start in range(0, len(jobkeys), QUERY_CHUNK):
+            chunk = jobkeys[start:start + QUERY_CHUNK]
+            query = (f'SELECT jobkey, fetched_at FROM crawl_index '
+                     f'WHERE fetched_at IS NOT NULL AND jobkey IN ({",".join("?" * len(chunk))})')
+            fetched.update((jobkey, datetime.fromisoformat(at)) for jobkey, at in self.connection.execute(query, chunk))
+        return fetched
+
+    def _iter_batches(self, query: str, batch_size: int) -> Iterator[list[tuple]]:
+        """
+        Read by keyset pagination on id, so rows could be marked as processed between batches without skipping
+        anything. First column of query must be id.
+        """
+        last_id = 0
+        while True:
+            rows = self.connection.execute(query, (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    def iter_new_raw(self, batch_size=500) -> Iterator[list[list]]:
+        """Batches of raw postings which are not cleaned yet, rows are lists in the order of RAW_COLUMNS"""
+        query = (f'SELECT id, {", ".join(RAW_COLUMNS)} FROM raw_postings '
+                 f'WHERE cleaned_at IS NULL AND id > ? ORDER BY id LIMIT ?')
+        for batch in self._iter_batches(query, batch_size):
+            yield [['' if value is None else str(value) for value in row] for row in batch]
+
+    def add_cleaned(self, rows: Iterable[list], processed_jobkeys: Iterable[str]) -> int:
+        """
+        Save cleaned postings and mark raw postings as cleaned
+        :param rows: cleaned rows in the order of CLEANED_COLUMNS
+        :param processed_jobkeys: all raw jobkeys of the batch, including skipped ones (e.g. without salary)
+        :return: number of cleaned rows
+        """
+        now = _now()
+        rows = [tuple(row) + (now,) for row in rows]
+        self.connection.executemany(
+                f'INSERT INTO cleaned_postings ({", ".join(CLEANED_COLUMNS)}, cleaned_at) VALUES (?, ?, ?, ?, ?, ?) '
+                f'ON CONFLICT (jobkey) DO UPDATE SET keyword = excluded.keyword, location = excluded.location, '
+                f'description = excluded.description, salary = excluded.salary, cleaned_at = excluded.cleaned_at, '
+                f'extracted_at = CASE WHEN excluded.description IS description THEN extracted_at END',
+                rows
+        )
+        self.connection.executemany('UPDATE raw_postings SET cleaned_at = ? WHERE jobkey = ?',
+                                    [(now, jobkey) for jobkey in processed_jobkeys])
+        self.connection.commit()
+        return len(rows)
+
+    def iter_unextracted(self, batch_size=200) -> Iterator[list[list]]:
+        """Batches of cleaned postings without skills, rows are lists in the order of CLEANED_COLUMNS"""
+        query = (f'SELECT id, {", ".join(CLEANED_COLUMNS)} FROM cleaned_postings '
+                 f'WHERE extracted_at IS NULL AND id > ? ORDER BY id LIMIT ?')
+        for batch in self._iter_batches(query, batch_size):
+            yield [list(row) for row in batch]
+
+    def add_skills(self, results: Iterable[tuple[str, list[str]]], model: str, prompt_version: str) -> int:
+        """
+        Replace skills of postings and mark them as extracted
+        :param results: (jobkey, skills) pairs, postings whose extraction failed must not be given
+        :return: number of postings
+        """
+        results = list(results)
+        jobkeys = [(jobkey,) for jobkey, _ in results]
+        now = _now()
+        self.connection.executemany('DELETE FROM skills WHERE jobkey = ?', jobkeys)
+        self.connection.executemany(
+                'INSERT OR IGNORE INTO skills (jobkey, skill) VALUES (?, ?)',
+                [(jobkey, skill.strip()) for jobkey, skills in results for skill in skills if skill.strip()]
+        )
+        self.connection.executemany(
+                'UPDATE cleaned_postings SET extracted_at = ?, model = ?, prompt_version = ? WHERE jobkey = ?',
+                [(now, model, prompt_version, jobkey) for (jobkey,) in jobkeys]
+        )
+        self.connection.commit()
+        return len(results)
+
+    def iter_skill_sets(self, batch_size=50000) -> Iterator[list[dict]]:
+        """Batches of postings with their skills, postings without skills are skipped"""
+        query = (
+            'SELECT c.id, c.jobkey, c.keyword, c.location, c.salary, json_group_array(s.skill) '
+            'FROM cleaned_postings c JOIN skills s ON s.jobkey = c.jobkey '
+            'WHERE c.extracted_at IS NOT NULL AND c.id > ? GROUP BY c.id ORDER BY c.id LIMIT ?'
+        )
+        for batch in self._iter_batches(query, batch_size):
+            yield [
+                {
+                    'jobkey': jobkey,
+                    'keyword': keyword or '',
+                    'location': location or '',
+                    'salary': round(float(salary), 2),
+                    'skills': json.loads(skills),
+                }
+                for jobkey, keyword, location, salary, skills in batch
+            ]
+
+    def register_dataset(self, name: str, path: str, postings: int) -> None:
+        """Remember built dataset"""
+        self.connection.execute('INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?)', (name, path, postings, _now()))
+        self.connection.commit()
+
+    def skill_stats(self, min_count=1, limit: Optional[int] = None) -> list[tuple[str, int, float]]:
+        """
+        Number of postings and average salary of every skill, computed in sqlite without loading postings
+        :return: (skill, postings, average salary), the most frequent first
+        """
+        query = ('SELECT s.skill, COUNT(*) AS postings, AVG(c.salary) FROM skills s '
+                 'JOIN cleaned_postings c ON c.jobkey = s.jobkey '
+                 'GROUP BY s.skill HAVING postings >= ? ORDER BY postings DESC, s.skill LIMIT ?')
+        return self.connection.execute(query, (min_count, -1 if limit is None else limit)).fetchall()
+
+    def counts(self) -> dict:
+        """Number of rows on every stage"""
+        query = {
+            'raw': 'SELECT COUNT(*) FROM raw_postings',
+            'not_cleaned': 'SELECT COUNT(*) FROM raw_postings WHERE cleaned_at IS NULL',
+            'cleaned': 'SELECT COUNT(*) FROM cleaned_postings',
+            'not_extracted': 'SELECT COUNT(*) FROM cleaned_postings WHERE extracted_at IS NULL',
+            'with_skills': 'SELECT COUNT(DISTINCT jobkey) FROM skills',
+        }
+        return {name: self.connection.execute(sql).fetchone()[0] for name, sql in query.items()}
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,10 @@
+import logging
+
+from .predictor import main
+
+
+logging.basicConfig(
+        format='[%(asctime)s] %(levelname).1s %(message)s',
+        level=logging.INFO, datefmt='%Y.%m.%d %H:%M:%S'
+)
+main()
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import joblib
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+LATEST = 'LATEST'
+
+
+@dataclass
+class Artifacts:
+    """Everything needed to answer salary queries without retraining"""
+    version: str
+    models: dict
+    vocabulary: list[str]
+    # fitted clusterer pipeline and its vocabulary
+    clustering: Optional[dict] = None
+    metadata: dict = field(default_factory=dict)
+
+
+def save_artifacts(models: dict, vocabulary: list[str], clustering: Optional[dict] = None,
+                   metrics: Optional[dict] = None, models_dir=MODELS_DIR) -> str:
+    """
+    Save fitted models, skill vocabulary and clustering as a new version. Models are dumped without compression, so
+    their arrays could be memory-mapped on load.
+    :return: version name
+    """
+    import sklearn
+
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    version_dir = os.path.join(models_dir, version)
+    os.makedirs(version_dir)
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(version_dir, f'{name}.joblib'))
+    if clustering is not None:
+        joblib.dump(clustering, os.path.join(version_dir, 'clustering.joblib'))
+    with open(os.path.join(version_dir, 'vocabulary.json'), 'w') as dest:
+        json.dump(vocabulary, dest)
+    with open(os.path.join(version_dir, 'metadata.json'), 'w') as dest:
+        json.dump({
+            'version': version,
+            'models': sorted(models),
+            'n_skills': len(vocabulary),
+            'metrics': metrics or {},
+            'sklearn_version': sklearn.__version__,
+        }, dest, indent=2)
+
+    # pointer is replaced atomically, so readers never see half-written version
+    tmp_path = os.path.join(models_dir, LATEST + '.tmp')
+    with open(tmp_path, 'w') as dest:
+        dest.write(version)
+    os.replace(tmp_path, os.path.join(models_dir, LATEST))
+    logging.info(f'Artifacts are saved to {version_dir}')
+    return version
+
+
+def latest_version(models_dir=MODELS_DIR) -> str:
+    """Name of the last saved version"""
+    with open(os.path.join(models_dir, LATEST), 'r') as source:
+        return source.read().strip()
+
+
+def load_artifacts(version: Optional[str] = None, models_dir=MODELS_DIR, mmap_mode: Optional[str] = 'r') -> Artifacts:
+    """
+    Load saved version of artifacts
+    :param version: version name, the latest one by default
+    :param models_dir: directory with versions
+    :param mmap_mode: numpy arrays of models are memory-mapped in this mode, None loads them into memory
+    """
+    version = version or latest_version(models_dir)
+    version_dir = os.path.join(models_dir, version)
+    with open(os.path.join(version_dir, 'metadata.json'), 'r') as source:
+        metadata = json.load(source)
+    with open(os.path.join(version_dir, 'vocabulary.json'), 'r') as source:
+        vocabulary = json.load(source)
+    models = {
+        name: joblib.load(os.path.join(version_dir, f'{name}.joblib'), mmap_mode=mmap_mode)
+        for name in metadata['models']
+    }
+    clustering_path = os.path.join(version_dir, 'clustering.joblib')
+    clustering = joblib.load(clustering_path) if os.path.exists(clustering_path) else None
+    return Artifacts(version, models, vocabulary, clustering, metadata)
@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+from .dataset import POSTINGS_PATH, ROW_GROUP_SIZE, iter_postings
+from .features import build_vocabulary, encode_skill_lists, skill_index
+
+
+# dense blocks given to IncrementalPCA are limited by number of cells, not rows, so wide vocabulary doesn't blow memory
+MAX_DENSE_CELLS = 20_000_000
+SILHOUETTE_SAMPLE = 10000
+
+Chunks = Callable[[], Iterator[tuple[sparse.csr_matrix, np.ndarray]]]
+
+
+@dataclass
+class ClusterSummary:
+    """Salary and the most typical skills of one cluster"""
+    label: int
+    size: int
+    mean_salary: float
+    median_salary: float
+    # (skill, share of cluster postings with skill, lift against all postings)
+    top_skills: list[tuple[str, float, float]] = field(default_factory=list)
+
+
+@dataclass
+class Clustering:
+    """Cluster of every posting, 2D projection for plots and fitted models"""
+    labels: np.ndarray
+    projection: np.ndarray
+    salary: np.ndarray
+    vocabulary: list[str]
+    summaries: list[ClusterSummary]
+    scores: dict = field(default_factory=dict)
+    clusterer: Optional[object] = None
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.summaries)
+
+
+def matrix_chunks(matrix: sparse.csr_matrix, salary: np.ndarray, chunk_size=ROW_GROUP_SIZE) -> Chunks:
+    """Chunks of in-memory skill matrix"""
+    def read():
+        for start in range(0, matrix.shape[0], chunk_size):
+            yield matrix[start:start + chunk_size], salary[start:start + chunk_size]
+    return read
+
+
+def parquet_chunks(path_to_dataset: str, vocabulary: list[str], chunk_size=ROW_GROUP_SIZE) -> Chunks:
+    """Chunks of posting-level dataset, only one chunk is in memory"""
+    index = skill_index(vocabulary)
+
+    def read():
+        for df in iter_postings(path_to_dataset, chunk_size, columns=['skills', 'salary']):
+            yield encode_skill_lists(df['skills'].tolist(), index), df['salary'].to_numpy()
+    return read
+
+
+def _dense_rows(n_features: int, min_rows: int) -> int:
+    return max(min_rows, MAX_DENSE_CELLS // max(n_features, 1))
+
+
+def fit_reducer(chunks: Chunks, n_components=20, reducer='incremental_pca', random_state=0):
+    """
+    Fit dimensionality reduction of skill matrix
+    :param chunks: chunks of skill matrix and salaries
+    :param n_components: number of components
+    :param reducer: incremental_pca is fitted chunk by chunk, so memory doesn't depend on number of postings;
+                    svd is TruncatedSVD over the whole sparse matrix, memory is proportional to (posting, skill) pairs
+    """
+    from sklearn.decomposition import IncrementalPCA, TruncatedSVD
+
+    if reducer == 'svd':
+        matrix = sparse.vstack([X for X, _ in chunks()], format='csr')
+        n_components = min(n_components, matrix.shape[1] - 1)
+        return TruncatedSVD(n_components=n_components, random_state=random_state).fit(matrix)
+    if reducer != 'incremental_pca':
+        raise ValueError(f'Unknown reducer: {reducer}')
+
+    model, pending = None, []
+    for X, _ in chunks():
+        if model is None:
+            n_components = min(n_components, X.shape[1])
+            # transform densifies sparse input by batch_size rows too
+            model = IncrementalPCA(n_components=n_components, batch_size=_dense_rows(X.shape[1], n_components))
+        for start in range(0, X.shape[0], model.batch_size):
+            pending.append(X[start:start + model.batch_size].toarray())
+            # partial_fit needs at least n_components rows, small tail blocks are merged with the next ones
+            if sum(len(block) for block in pending) >= n_components:
+                model.partial_fit(np.vstack(pending))
+                pending = []
+    # tail with fewer than n_components rows is left out of the fit
+    if model is None or not hasattr(model, 'components_'):
+        raise ValueError(f'At least {n_components} postings are needed to cluster')
+    # fit() sets it, partial_fit() doesn't, but transform() of sparse input needs it
+    model.batch_size_ = model.batch_size
+    return model
+
+
+def embed(chunks: Chunks, reducer) -> tuple[np.ndarray, np.ndarray]:
+    """Reduced matrix and salaries of all postings, it takes n_postings x n_components floats"""
+    embeddings, salaries = [], []
+    for X, salary in chunks():
+        embeddings.append(reducer.transform(X))
+        salaries.append(salary)
+    return np.vstack(embeddings), np.concatenate(salaries)
+
+
+def choose_k(embedding: np.ndarray, k_range=range(2, 11), random_state=0, batch_size=4096) -> tuple[object, dict]:
+    """
+    Fit MiniBatchKMeans for every k and choose k with the best silhouette score on a sample of postings
+    :return: fitted model with the best k and silhouette score by k
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    sample_size = min(SILHOUETTE_SAMPLE, len(embedding))
+    best, scores = None, {}
+    for k in k_range:
+        if k >= len(embedding):
+            break
+        model = MiniBatchKMeans(n_clusters=k, batch_size=batch_size, n_init=3, random_state=random_state)
+        labels = model.fit_predict(embedding)
+        if len(np.unique(labels)) < 2:
+            continue
+        scores[k] = float(silhouette_score(embedding, labels, sample_size=sample_size, random_state=random_state))
+        logging.info(f'k={k}: silhouette {scores[k]:.4f}')
+        if best is None or scores[k] > scores[best.n_clusters]:
+            best = model
+    if best is None:
+        raise ValueError('Not enough distinct postings to cluster')
+    return best, scores
+
+
+def summarize(chunks: Chunks, labels: np.ndarray, salary: np.ndarray, vocabulary: list[str], n_clusters: int,
+              top_n=10) -> list[ClusterSummary]:
+    """Salary statistics and top skills of every cluster, skill counts are accumulated chunk by chunk"""
+    counts = np.zeros((n_clusters, len(vocabulary)), dtype=np.float64)
+    start = 0
+    for X, _ in chunks():
+        chunk_labels = labels[start:start + X.shape[0]]
+        membership = sparse.csr_matrix(
+                (np.ones(len(chunk_labels)), (chunk_labels, np.arange(len(chunk_labels)))),
+                shape=(n_clusters, len(chunk_labels))
+        )
+        counts += (membership @ X).toarray()
+        start += X.shape[0]
+
+    sizes = np.bincount(labels, minlength=n_clusters)
+    overall = counts.sum(axis=0) / max(len(labels), 1)
+    summaries = []
+    for label in range(n_clusters):
+        if sizes[label] == 0:
+            continue
+        share = counts[label] / sizes[label]
+        lift = np.divide(share, overall, out=np.zeros_like(share), where=overall > 0)
+        top = np.argsort(-share, kind='stable')[:top_n]
+        cluster_salary = salary[labels == label]
+        summaries.append(ClusterSummary(
+                label, int(sizes[label]), float(cluster_salary.mean()), float(np.median(cluster_salary)),
+                [(vocabulary[idx], float(share[idx]), float(lift[idx])) for idx in top if share[idx] > 0]
+        ))
+    return summaries
+
+
+def cluster_postings(chunks: Chunks, vocabulary: list[str], n_clusters: Optional[int] = None,
+                     k_range=range(2, 11), n_components=20, reducer='incremental_pca',
+                     random_state=0) -> Clustering:
+    """
+    Out-of-core clustering of postings by all skills: skill matrix is reduced chunk by chunk, postings are clustered
+    with MiniBatchKMeans in reduced space
+    :param chunks: chunks of skill matrix and salaries, it is read several times
+    :param vocabulary: skill of every matrix column
+    :param n_clusters: number of clusters, it is chosen from k_range by silhouette score if it is not set
+    :param k_range: candidates for number of clusters
+    :param n_components: size of reduced space
+    :param reducer: incremental_pca or svd, see fit_reducer
+    :param random_state: seed of reducer and KMeans
+    """
+    from sklearn.pipeline import Pipeline
+
+    reduction = fit_reducer(chunks, n_components, reducer, random_state)
+    embedding, salary = embed(chunks, reduction)
+    logging.info(f'Clustering {len(embedding)} postings by {len(vocabulary)} skills '
+                 f'in {embedding.shape[1]} components')
+    kmeans, scores = choose_k(embedding, [n_clusters] if n_clusters else k_range, random_state)
+    labels = kmeans.predict(embedding)
+    summaries = summarize(chunks, labels, salary, vocabulary, kmeans.n_clusters)
+    for summary in summaries:
+        skills = ', '.join(skill for skill, _, _ in summary.top_skills[:5])
+        logging.info(f'Cluster {summary.label} - {summary.size} postings, Average Salary: {summary.mean_salary:.2f}, '
+                     f'Median Salary: {summary.median_salary:.2f}, top skills: {skills}')
+    clusterer = Pipeline([('reduce', reduction), ('kmeans', kmeans)])
+    return Clustering(labels, embedding[:, :2], salary, vocabulary, summaries, scores, clusterer)
+
+
+def cluster_dataset(path_to_dataset: str = POSTINGS_PATH, min_count=2, chunk_size=ROW_GROUP_SIZE,
+                    **kwargs) -> Clustering:
+    """
+    Cluster posting-level dataset by the whole vocabulary without loading it into memory
+    :param path_to_dataset: parquet dataset made by prepare stage
+    :param min_count: skills from fewer postings are not used
+    :param chunk_size: postings per chunk
+    :param kwargs: arguments of cluster_postings
+    """
+    chunks = iter_postings(path_to_dataset, chunk_size, columns=['skills'])
+    vocabulary = build_vocabulary((skills for df in chunks for skills in df['skills']), min_count)
+    return cluster_postings(parquet_chunks(path_to_dataset, vocabulary, chunk_size), vocabulary, **kwargs)
+
+
+def save_summaries(clustering: Clustering, path: str) -> str:
+    """Write cluster summaries and silhouette scores as JSON report"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as dest:
+        json.dump({
+            'n_clusters': clustering.n_clusters,
+            'silhouette': clustering.scores,
+            'clusters': [asdict(summary) for summary in clustering.summaries],
+        }, dest, indent=2)
+    logging.info(f'Cluster summaries are saved to {path}')
+    return path
@@ -0,0 +1,125 @@
+import csv
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+POSTINGS_PATH = os.path.join(BASE_DIR, 'dataset', 'postings.parquet')
+
+# keyword and location are loaded as categoricals. Parquet dictionary-encodes string columns on disk, so every skill
+# string is stored once per row group anyway.
+SCHEMA = pa.schema([
+    ('jobkey', pa.string()),
+    ('keyword', pa.dictionary(pa.int32(), pa.string())),
+    ('location', pa.dictionary(pa.int32(), pa.string())),
+    ('salary', pa.float64()),
+    ('skills', pa.list_(pa.string())),
+])
+ROW_GROUP_SIZE = 50000
+
+
+def _read_skill_set(path_to_skillset, canonicalizer=None) -> Iterator[dict]:
+    """Read postings with extracted skills, postings without skills are skipped"""
+    with open(path_to_skillset, 'r') as source:
+        for row in csv.DictReader(source):
+            if row['skills'] in ('', '0'):
+                continue
+            skills = [skill.strip() for skill in row['skills'].split(',') if skill.strip()]
+            yield {
+                'jobkey': row['jobkey'],
+                'keyword': row['keyword'],
+                'location': row.get('location') or '',
+                'salary': round(float(row['salary']), 2),
+                'skills': canonicalizer.canonicalize(skills) if canonicalizer else skills,
+            }
+
+
+def _to_table(records: list[dict]) -> pa.Table:
+    arrays = [
+        pa.array([record['jobkey'] for record in records], pa.string()),
+        pa.array([record['keyword'] for record in records], pa.string()).dictionary_encode(),
+        pa.array([record['location'] for record in records], pa.string()).dictionary_encode(),
+        pa.array([record['salary'] for record in records], pa.float64()),
+        pa.array([record['skills'] for record in records], pa.list_(pa.string())),
+    ]
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+def _write_dataset(records: Iterable[dict], path_to_dataset: str) -> int:
+    """Write records by row groups, so memory doesn't depend on number of postings. Returns number of postings"""
+    os.makedirs(os.path.dirname(path_to_dataset), exist_ok=True)
+    total = 0
+    with pq.ParquetWriter(path_to_dataset, SCHEMA) as writer:
+        for batch in _batched(records, ROW_GROUP_SIZE):
+            writer.write_table(_to_table(batch))
+            total += len(batch)
+    return total
+
+
+def _batched(records: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def prepare_data(path_to_skillset, path_to_dataset=POSTINGS_PATH, canonicalizer=None) -> str:
+    """
+    Write posting-level dataset: one row per posting with its skills list, salary, keyword, jobkey and location.
+    Postings are written by row groups, so memory doesn't depend on skill set size.
+    :param path_to_skillset: skill set file made by csv_cleaner
+    :param path_to_dataset: parquet file
+    :param canonicalizer: SkillCanonicalizer, skills are mapped to canonical ones if it is set
+    :return: path to dataset
+    """
+    _write_dataset(_read_skill_set(path_to_skillset, canonicalizer), path_to_dataset)
+    return path_to_dataset
+
+
+def prepare_data_from_store(store, path_to_dataset=POSTINGS_PATH, canonicalizer=None) -> str:
+    """
+    Write posting-level dataset from job store, skills are aggregated by sqlite and read by batches
+    :param store: JobStore
+    :param path_to_dataset: parquet file, it is registered in store as dataset
+    :param canonicalizer: SkillCanonicalizer, skills are mapped to canonical ones if it is set
+    :return: path to dataset
+    """
+    def records():
+        for batch in store.iter_skill_sets(ROW_GROUP_SIZE):
+            for record in batch:
+                if canonicalizer:
+                    record['skills'] = canonicalizer.canonicalize(record['skills'])
+                yield record
+
+    postings = _write_dataset(records(), path_to_dataset)
+    store.register_dataset(os.path.splitext(os.path.basename(path_to_dataset))[0], path_to_dataset, postings)
+    return path_to_dataset
+
+
+def load_postings(path_to_dataset=POSTINGS_PATH, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Load posting-level dataset, keyword and location are categorical, skills are lists of strings
+    :param path_to_dataset: parquet file
+    :param columns: load only these columns
+    """
+    table = pq.read_table(path_to_dataset, columns=columns)
+    df = table.to_pandas()
+    if 'skills' in df.columns:
+        df['skills'] = df['skills'].map(list)
+    return df
+
+
+def iter_postings(path_to_dataset=POSTINGS_PATH, batch_size=ROW_GROUP_SIZE,
+                  columns: Optional[list[str]] = None) -> Iterator[pd.DataFrame]:
+    """Read posting-level dataset by batches, so only one batch is in memory"""
+    parquet_file = pq.ParquetFile(path_to_dataset)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        df = batch.to_pandas()
+        if 'skills' in df.columns:
+            df['skills'] = df['skills'].map(list)
+        yield df
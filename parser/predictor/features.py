@@ -0,0 +1,80 @@
+from collections.abc import Iterable, Sequence
+from itertools import chain
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def build_vocabulary(skill_lists: Iterable[Sequence[str]], min_count=1) -> list[str]:
+    """
+    Get vocabulary of skills, the most frequent first
+    :param skill_lists: skills of every posting
+    :param min_count: skill must be in this number of postings at least
+    """
+    counts = {}
+    for skills in skill_lists:
+        for skill in set(skills):
+            counts[skill] = counts.get(skill, 0) + 1
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [skill for skill, count in ranked if count >= min_count]
+
+
+def build_skill_matrix(
+        skill_lists: Sequence[Sequence[str]], vocabulary: Optional[Sequence[str]] = None, min_count=1
+) -> tuple[sparse.csr_matrix, list[str]]:
+    """
+    Build one-hot posting x skill matrix in one pass. Skills are matched exactly (so "R" never matches "React"),
+    skills which are not in vocabulary are ignored. Memory is proportional to number of (posting, skill) pairs and
+    doesn't depend on vocabulary size.
+    :param skill_lists: skills of every posting
+    :param vocabulary: column names, it is built from skill_lists if it is not set
+    :param min_count: min number of postings for skill when vocabulary is built
+    :return: CSR matrix of float32 ones and vocabulary
+    """
+    if vocabulary is None:
+        vocabulary = build_vocabulary(skill_lists, min_count)
+    vocabulary = list(vocabulary)
+    return encode_skill_lists(skill_lists, skill_index(vocabulary)), vocabulary
+
+
+def skill_index(vocabulary: Sequence[str]) -> pd.Index:
+    """Skill -> column index for encode_skill_lists, build it once when the same vocabulary is used many times"""
+    return pd.Index(list(vocabulary))
+
+
+def encode_skill_lists(
+        skill_lists: Sequence[Sequence[str]], index: Union[pd.Index, dict[str, int]]
+) -> sparse.csr_matrix:
+    """
+    Build one-hot matrix with already built skill -> column index, it is cheaper than build_skill_matrix when the same
+    vocabulary is used many times. All skills are flattened and looked up in one vectorized pass, row of every skill is
+    taken from lengths of skill lists.
+    :param index: skill_index of vocabulary or dict skill -> column
+    """
+    if isinstance(index, dict):
+        columns = np.fromiter(index.values(), dtype=np.int64, count=len(index))
+        index = pd.Index(list(index))
+    else:
+        columns = None
+    lengths = np.fromiter((len(skills) for skills in skill_lists), dtype=np.int64, count=len(skill_lists))
+    codes = index.get_indexer(list(chain.from_iterable(skill_lists)))
+    rows = np.repeat(np.arange(len(skill_lists)), lengths)
+    known = codes >= 0
+    rows, codes = rows[known], codes[known]
+    if columns is not None:
+        codes = columns[codes]
+    matrix = sparse.csr_matrix((np.ones(len(codes), dtype=np.float32), (rows, codes)),
+                               shape=(len(skill_lists), len(index)))
+    # repeated skill of a posting is summed by the constructor, it is still one-hot
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def top_skill_indices(matrix: sparse.spmatrix, n: int) -> np.ndarray:
+    """Columns of n most frequent skills"""
+    counts = np.asarray(matrix.sum(axis=0)).ravel()
+    # stable sort keeps vocabulary order for equal counts
+    return np.argsort(-counts, kind='stable')[:n]
@@ -1,160 +1,364 @@
-import csv
+"""
+Salary predictor for skill sets. Stages could be run separately:
+
+    python -m parser.predictor --stages prepare,train,evaluate,plot
+    python -m parser.predictor --stages predict --skills "Python, SQL, AWS"
+    python -m parser.predictor --stages recommend --skills "Python, SQL" --add 3
+    python -m parser.predictor --stages serve --port 8000
+
+Train stage saves models, vocabulary and clustering model as a new artifacts version. Evaluate, plot, predict and
+serve stages without train load the latest version (or --model-version), so they never retrain.
+
+Heavy libraries (sklearn submodules and matplotlib) are imported inside stages which use them, plots are written to
+files with Agg backend, so predictor works on a headless box and could be imported without side effects.
+"""
+import argparse
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-
-
-def prepare_data(path_to_skillset):
-    """Get only skills and salaries from prepared skillset."""
-    with open(path_to_skillset, 'r') as source:
-        reader = csv.reader(source)
-        with open('./dataset/skill_dataset.csv', 'w') as dest:
-            writer = csv.writer(dest)
-            writer.writerow(['skill', 'salary'])
-            for row in reader:
-                if row[0] != 'keyword':
-                    skills_lst = [skill.strip() for skill in row[2].split(',')]
-                    for sk in skills_lst:
-                        writer.writerow([sk, round(float(row[-1]), 2)])
-
-
-# prepare_data('../clean_csv/cleaned_data/skill_sets/indeed_skill_set_final.csv')
-# For now it is hardcoded. Will be changed in future
-prepare_data('../clean_csv/cleaned_data/skill_sets/indeed_skill_set.csv')
-
-df = pd.read_csv('./dataset/skill_dataset.csv')
-
-skills_series = df['skill'].str.split(',', expand=True).stack()
-top_10_skills = skills_series.value_counts().head(10).index.tolist()
-print(top_10_skills)
-
-# Filter the dataset to include only the top 10 skills
-df_filtered = df.copy()
-for skill in top_10_skills:
-    df_filtered[skill] = df['skill'].str.contains(skill).astype(int)
-
-# Preparing X and y
-X = df_filtered[top_10_skills]
-y = df_filtered['salary']
-
-# Standardizing the features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Perform K-Means clustering
-kmeans = KMeans(n_clusters=3, random_state=0)
-clusters = kmeans.fit_predict(X_scaled)
-df_filtered['cluster'] = clusters
-
-# Visualizing the clusters
-plt.scatter(df_filtered.iloc[:, 0], df_filtered.iloc[:, 1], c=df_filtered['cluster'], cmap='viridis')
-plt.title('Clusters of Top 10 Skills')
-plt.xlabel('Skill')
-plt.ylabel('Salary')
-plt.show()
-
-# Analyze clusters
-for i in range(kmeans.n_clusters):
-    cluster_data = df_filtered[df_filtered['cluster'] == i]
-    avg_salary = cluster_data['salary'].mean()
-    print(f'Cluster {i} - Average Salary: {avg_salary}')
-
-# Using PCA to reduce dimensions to 2 for visualization
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X_scaled)
-
-# Visualizing the clusters with PCA components
-plt.scatter(X_pca[:, 0], X_pca[:, 1], c=df_filtered['cluster'], cmap='viridis')
-plt.title('Clusters of Top 10 Skills (PCA)')
-plt.xlabel('PCA Component 1')
-plt.ylabel('PCA Component 2')
-plt.show()
-
-plt.figure(figsize=(8, 6))
-for i in np.unique(clusters):
-    plt.scatter(X_pca[clusters == i, 0], X_pca[clusters == i, 1], label=f'Cluster {i}')
-plt.title('Clusters of Skills (PCA)')
-plt.xlabel('PCA Component 1')
-plt.ylabel('PCA Component 2')
-plt.legend()
-plt.show()
-
-
-# Assuming df_filtered is your DataFrame with one-hot encoded top 10 skills and salary
-X = pd.get_dummies(df_filtered[top_10_skills])
-y = df_filtered['salary']
-
-# Splitting the dataset into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=0)
-
-# Training the Linear Regression model
-model = LinearRegression()
-model.fit(X_train, y_train)
-
-# Making predictions
-y_pred = model.predict(X_test)
-
-# Evaluating the model
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-print(f"Mean Squared Error: {mse}")
-print(f"R-squared: {r2}")
-
-plt.scatter(y_test, y_pred, alpha=0.5)
-plt.title('Actual vs Predicted Salaries')
-plt.xlabel('Actual Salary')
-plt.ylabel('Predicted Salary')
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2)  # Diagonal line for reference
-plt.show()
-
-# Splitting the dataset into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
-
-# Instantiate the Random Forest Regressor
-random_forest_model = RandomForestRegressor(n_estimators=100, random_state=0)  # n_estimators can be tuned
-
-# Train the model
-random_forest_model.fit(X_train, y_train)
-
-# Make predictions
-y_pred_rf = random_forest_model.predict(X_test)
-
-# Evaluate the model
-mse_rf = mean_squared_error(y_test, y_pred_rf)
-r2_rf = r2_score(y_test, y_pred_rf)
-
-print(f"Random Forest - Mean Squared Error: {mse_rf}")
-print(f"Random Forest - R-squared: {r2_rf}")
-
-# Scatter plot of actual vs predicted salaries
-plt.scatter(y_test, y_pred_rf, alpha=0.5)
-plt.title('Random Forest: Actual vs Predicted Salaries')
-plt.xlabel('Actual Salary')
-plt.ylabel('Predicted Salary')
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2)  # Diagonal line for reference
-plt.show()
-
-# Filter the dataset for entries that include top 10 skills
-top_10_skills_mask = X_test[top_10_skills].sum(axis=1) > 0
-X_top_10 = X_test[top_10_skills_mask]
-y_top_10_actual = y_test[top_10_skills_mask]
-
-# Predict salaries for these entries
-y_top_10_pred = random_forest_model.predict(X_top_10)
-
-# Compare predictions with actual values
-plt.scatter(y_top_10_actual, y_top_10_pred, alpha=0.5)
-plt.title('Random Forest: Actual vs Predicted Salaries for Top 10 Skills')
-plt.xlabel('Actual Salary')
-plt.ylabel('Predicted Salary')
-plt.plot([y_top_10_actual.min(), y_top_10_actual.max()], [y_top_10_actual.min(), y_top_10_actual.max()], 'k--', lw=2)
-plt.show()
+from scipy import sparse
+
+from ..job_store import STORE_PATH, JobStore
+from .artifacts import MODELS_DIR, Artifacts, load_artifacts, save_artifacts
+from .clustering import Clustering, cluster_dataset, save_summaries
+from .dataset import POSTINGS_PATH, load_postings, prepare_data, prepare_data_from_store
+from .features import build_skill_matrix, top_skill_indices
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKILL_SET_PATH = os.path.join(BASE_DIR, '../clean_csv/cleaned_data/skill_sets/indeed_skill_set.csv')
+PLOTS_DIR = os.path.join(BASE_DIR, 'plots')
+CLUSTERS_PATH = os.path.join(BASE_DIR, 'dataset', 'clusters.json')
+STAGES = ('prepare', 'train', 'evaluate', 'cluster', 'plot', 'predict', 'recommend', 'serve')
+
+
+@dataclass
+class Features:
+    """One-hot posting x skill matrix with salaries"""
+    matrix: sparse.csr_matrix
+    salary: np.ndarray
+    vocabulary: list[str]
+    top_skills: list[str] = field(default_factory=list)
+
+
+@dataclass
+class TrainResult:
+    """Fitted models and hold-out split they are evaluated on"""
+    models: dict
+    X_test: sparse.csr_matrix
+    y_test: np.ndarray
+    metrics: dict = field(default_factory=dict)
+    cv_report: dict = field(default_factory=dict)
+
+
+def build_features(path_to_dataset=POSTINGS_PATH, top_n: Optional[int] = 10,
+                   vocabulary: Optional[list[str]] = None, min_count=1) -> Features:
+    """
+    Load posting-level dataset and build features
+    :param path_to_dataset: parquet dataset made by prepare stage
+    :param top_n: use only top_n most frequent skills as features, None uses the whole vocabulary
+    :param vocabulary: skills of saved models, all of them are features then and top_n only picks top skills
+    :param min_count: skills of fewer postings are not used, e.g. to keep search on the whole vocabulary cheap
+    """
+    df = load_postings(path_to_dataset, columns=['skills', 'salary'])
+    fixed_vocabulary = vocabulary is not None
+    matrix, vocabulary = build_skill_matrix(df['skills'].tolist(), vocabulary, min_count)
+    top_idx = top_skill_indices(matrix, top_n if top_n else len(vocabulary))
+    top_skills = [vocabulary[idx] for idx in top_idx]
+    if top_n and not fixed_vocabulary:
+        matrix, vocabulary = matrix[:, top_idx], top_skills
+    logging.info(f'Features: {matrix.shape[0]} postings, {matrix.shape[1]} skills, top skills: {top_skills[:10]}')
+    return Features(matrix.tocsr(), df['salary'].to_numpy(), vocabulary, top_skills[:10])
+
+
+def train(features: Features, test_size=0.2, random_state=0, search=False, cv=5,
+          models: Optional[list[str]] = None, cpu_budget: Optional[float] = None) -> TrainResult:
+    """
+    Fit regressors on the same train split
+    :param features: features
+    :param test_size: part of postings which is held out for evaluate stage
+    :param random_state: seed of split and models
+    :param search: run cross-validated hyperparameter search on all cores (see training.search_models), otherwise
+                   linear regression and random forest are fitted with default parameters
+    :param cv: number of folds for search
+    :param models: model names for search, training.DEFAULT_MODELS by default
+    :param cpu_budget: max CPU seconds of one fit, the best model of search is chosen among models within it
+    """
+    X_train, X_test, y_train, y_test = _split(features, test_size, random_state)
+    if search:
+        from .training import best_model, search_models
+
+        estimators, reports = search_models(X_train, y_train, models, cv=cv, random_state=random_state)
+        logging.info(f'Best model: {best_model(reports)}')
+        if cpu_budget is not None:
+            logging.info(f'Best model within {cpu_budget} CPU s per fit: {best_model(reports, cpu_budget)}')
+        return TrainResult(estimators, X_test, y_test, cv_report=reports)
+
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    models = {
+        'linear': LinearRegression(),
+        'random_forest': RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=-1),
+    }
+    for name, model in models.items():
+        model.fit(X_train, y_train)
+        logging.info(f'Model {name} is trained on {X_train.shape[0]} postings')
+    return TrainResult(models, X_test, y_test)
+
+
+def _split(features: Features, test_size: float, random_state: int) -> list:
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(features.matrix, features.salary, test_size=test_size, random_state=random_state)
+
+
+def load_holdout(artifacts: Artifacts, path_to_dataset=POSTINGS_PATH, test_size=0.2,
+                 random_state=0) -> tuple[Features, TrainResult]:
+    """
+    Features and hold-out split of saved models, so evaluate and plot stages don't retrain. Split is the same as in
+    train stage if dataset and split arguments are not changed since then.
+    :param artifacts: saved models and their vocabulary
+    """
+    features = build_features(path_to_dataset, vocabulary=artifacts.vocabulary)
+    _, X_test, _, y_test = _split(features, test_size, random_state)
+    cv_report = artifacts.metadata.get('metrics', {}).get('cv', {})
+    return features, TrainResult(artifacts.models, X_test, y_test, cv_report=cv_report)
+
+
+def evaluate(result: TrainResult) -> dict:
+    """Compute mean squared error and R-squared of every model on hold-out split"""
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    for name, model in result.models.items():
+        y_pred = model.predict(result.X_test)
+        result.metrics[name] = {
+            'mse': mean_squared_error(result.y_test, y_pred),
+            'r2': r2_score(result.y_test, y_pred),
+        }
+        logging.info(f'{name} - Mean Squared Error: {result.metrics[name]["mse"]}, '
+                     f'R-squared: {result.metrics[name]["r2"]}')
+    return result.metrics
+
+
+def _pyplot():
+    """Import pyplot with file-only backend"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _save(plt, plots_dir: str, name: str) -> str:
+    os.makedirs(plots_dir, exist_ok=True)
+    path = os.path.join(plots_dir, name)
+    plt.savefig(path)
+    plt.close()
+    logging.info(f'Plot is saved to {path}')
+    return path
+
+
+def plot_clusters(clustering: Clustering, plots_dir=PLOTS_DIR, max_points=20000, random_state=0) -> list[str]:
+    """Plot clusters against salary and in 2D projection, at most max_points random postings are drawn"""
+    plt = _pyplot()
+    rows = np.arange(len(clustering.labels))
+    if len(rows) > max_points:
+        rows = np.sort(np.random.default_rng(random_state).choice(rows, max_points, replace=False))
+    labels, projection, salary = clustering.labels[rows], clustering.projection[rows], clustering.salary[rows]
+    paths = []
+
+    plt.scatter(labels, salary, c=labels, cmap='viridis', alpha=0.5)
+    plt.title('Clusters of Skills')
+    plt.xlabel('Cluster')
+    plt.ylabel('Salary')
+    paths.append(_save(plt, plots_dir, 'top_10_skill_clusters.png'))
+
+    plt.scatter(projection[:, 0], projection[:, 1], c=labels, cmap='viridis', alpha=0.5)
+    plt.title('Clusters of Skills (PCA)')
+    plt.xlabel('PCA Component 1')
+    plt.ylabel('PCA Component 2')
+    paths.append(_save(plt, plots_dir, 'PCA_top_10_skill_clusters.png'))
+
+    plt.figure(figsize=(8, 6))
+    for summary in clustering.summaries:
+        mask = labels == summary.label
+        plt.scatter(projection[mask, 0], projection[mask, 1], alpha=0.5,
+                    label=f'Cluster {summary.label} ({summary.mean_salary:.0f})')
+    plt.title('Clusters of Skills (PCA)')
+    plt.xlabel('PCA Component 1')
+    plt.ylabel('PCA Component 2')
+    plt.legend()
+    paths.append(_save(plt, plots_dir, 'PCA_top_10_skill_clusters_with_legend.png'))
+    return paths
+
+
+def _plot_actual_vs_predicted(plt, y_actual, y_pred, title: str) -> None:
+    plt.scatter(y_actual, y_pred, alpha=0.5)
+    plt.title(title)
+    plt.xlabel('Actual Salary')
+    plt.ylabel('Predicted Salary')
+    plt.plot([y_actual.min(), y_actual.max()], [y_actual.min(), y_actual.max()], 'k--', lw=2)  # Diagonal line
+
+
+def plot_predictions(features: Features, result: TrainResult, plots_dir=PLOTS_DIR) -> list[str]:
+    """Plot actual against predicted salaries for every model"""
+    plt = _pyplot()
+    paths = []
+    for name, model in result.models.items():
+        _plot_actual_vs_predicted(plt, result.y_test, model.predict(result.X_test),
+                                  f'{name}: Actual vs Predicted Salaries')
+        paths.append(_save(plt, plots_dir, f'{name}_actual_vs_predicted.png'))
+
+    # postings which have at least one of top 10 skills
+    columns = [features.vocabulary.index(skill) for skill in features.top_skills]
+    mask = np.asarray(result.X_test[:, columns].sum(axis=1)).ravel() > 0
+    if mask.any() and 'random_forest' in result.models:
+        y_pred = result.models['random_forest'].predict(result.X_test[mask])
+        _plot_actual_vs_predicted(plt, result.y_test[mask], y_pred,
+                                  'Random Forest: Actual vs Predicted Salaries for Top 10 Skills')
+        paths.append(_save(plt, plots_dir, 'random_forest_top_10_actual_vs_predicted.png'))
+    return paths
+
+
+def predict(model, vocabulary: list[str], skill_sets: list[list[str]]) -> np.ndarray:
+    """
+    Predict salaries for skill sets
+    :param model: fitted regressor
+    :param vocabulary: skills which model was trained on, unknown skills are ignored
+    :param skill_sets: list of skills lists
+    """
+    matrix, _ = build_skill_matrix(skill_sets, vocabulary)
+    return model.predict(matrix)
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(description='Predict salary by skills')
+    arg_parser.add_argument('--stages', default='prepare,train,evaluate,plot',
+                            help=f'comma separated stages: {", ".join(STAGES)}')
+    arg_parser.add_argument('--skill-set', default=SKILL_SET_PATH, help='skill set file made by csv_cleaner')
+    arg_parser.add_argument('--dataset', default=POSTINGS_PATH, help='posting-level parquet dataset')
+    arg_parser.add_argument('--store', nargs='?', const=STORE_PATH,
+                            help='prepare stage reads postings with skills from job store instead of skill set file')
+    arg_parser.add_argument('--aliases', help='skill aliases file made by skill_canonicalizer, prepare stage maps '
+                                              'skills to canonical ones with it')
+    arg_parser.add_argument('--plots-dir', default=PLOTS_DIR)
+    arg_parser.add_argument('--clusters', type=int, default=0,
+                            help='number of clusters for cluster stage, 0 chooses it by silhouette score')
+    arg_parser.add_argument('--max-clusters', type=int, default=10, help='max number of clusters which is tried')
+    arg_parser.add_argument('--components', type=int, default=20, help='size of reduced space for clustering')
+    arg_parser.add_argument('--reducer', choices=('incremental_pca', 'svd'), default='incremental_pca')
+    arg_parser.add_argument('--clusters-report', default=CLUSTERS_PATH, help='JSON with summaries of clusters')
+    arg_parser.add_argument('--top-n', type=int, default=10, help='number of top skills used as features, 0 for all')
+    arg_parser.add_argument('--search', action='store_true',
+                            help='train with cross-validated hyperparameter search on all cores')
+    arg_parser.add_argument('--cv-folds', type=int, default=5)
+    arg_parser.add_argument('--models', help='comma separated models for search: linear, random_forest, '
+                                             'hist_gradient_boosting; linear and random_forest by default')
+    arg_parser.add_argument('--cpu-budget', type=float,
+                            help='max CPU seconds of one fit, search reports the best model within it')
+    arg_parser.add_argument('--min-skill-count', type=int, default=5,
+                            help='skills of fewer postings are not used as features')
+    arg_parser.add_argument('--skills', action='append', default=[],
+                            help='comma separated skill set for predict and recommend stages, could be repeated')
+    arg_parser.add_argument('--add', type=int, default=3, help='number of skills which recommend stage adds')
+    arg_parser.add_argument('--beam-width', type=int, default=5, help='skill sets kept on every step of recommend')
+    arg_parser.add_argument('--models-dir', default=MODELS_DIR, help='directory with saved artifacts versions')
+    arg_parser.add_argument('--model-version',
+                            help='artifacts version for predict, recommend and serve, the latest by default')
+    arg_parser.add_argument('--model', default='random_forest',
+                            help='model used by predict, recommend and serve stages')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8000)
+    args = arg_parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        arg_parser.error(f'unknown stages: {", ".join(sorted(unknown))}')
+    if args.models and 'train' in stages:
+        from .training import PARAM_GRIDS
+        unknown = [name for name in args.models.split(',') if name not in PARAM_GRIDS]
+        if unknown:
+            arg_parser.error(f'unknown models: {", ".join(unknown)}, available models: {", ".join(PARAM_GRIDS)}')
+
+    if 'prepare' in stages:
+        canonicalizer = None
+        if args.aliases:
+            from ..clean_csv.skill_canonicalizer import SkillCanonicalizer
+            canonicalizer = SkillCanonicalizer.load(args.aliases)
+        if args.store:
+            job_store = JobStore(args.store)
+            try:
+                prepare_data_from_store(job_store, args.dataset, canonicalizer)
+            finally:
+                job_store.close()
+        else:
+            prepare_data(args.skill_set, args.dataset, canonicalizer)
+
+    clustering = None
+    if {'cluster', 'plot'} & set(stages):
+        clustering = cluster_dataset(args.dataset, n_clusters=args.clusters or None,
+                                     k_range=range(2, args.max_clusters + 1), n_components=args.components,
+                                     reducer=args.reducer)
+        save_summaries(clustering, args.clusters_report)
+        if 'plot' in stages:
+            plot_clusters(clustering, args.plots_dir)
+
+    artifacts = None
+    if 'train' in stages:
+        features = build_features(args.dataset, args.top_n or None, min_count=args.min_skill_count)
+        result = train(features, search=args.search, cv=args.cv_folds,
+                       models=args.models.split(',') if args.models else None, cpu_budget=args.cpu_budget)
+        if 'evaluate' in stages:
+            evaluate(result)
+        if 'plot' in stages:
+            plot_predictions(features, result, args.plots_dir)
+        version = save_artifacts(
+                result.models, features.vocabulary,
+                {'model': clustering.clusterer, 'vocabulary': clustering.vocabulary} if clustering else None,
+                {'holdout': result.metrics, 'cv': result.cv_report}, args.models_dir
+        )
+        artifacts = Artifacts(version, result.models, features.vocabulary)
+    elif {'evaluate', 'plot'} & set(stages):
+        artifacts = load_artifacts(args.model_version, args.models_dir)
+        logging.info(f'Evaluating saved artifacts version {artifacts.version}')
+        features, result = load_holdout(artifacts, args.dataset)
+        if 'evaluate' in stages:
+            evaluate(result)
+        if 'plot' in stages:
+            plot_predictions(features, result, args.plots_dir)
+
+    if {'predict', 'recommend', 'serve'} & set(stages):
+        if artifacts is None:
+            artifacts = load_artifacts(args.model_version, args.models_dir)
+        if args.model not in artifacts.models:
+            arg_parser.error(f'model {args.model} is not in artifacts version {artifacts.version}, available models: '
+                             f'{", ".join(sorted(artifacts.models))}')
+        skill_sets = [[skill.strip() for skill in skills.split(',') if skill.strip()] for skills in args.skills]
+        if 'predict' in stages:
+            salaries = predict(artifacts.models[args.model], artifacts.vocabulary, skill_sets)
+            for skills, salary in zip(skill_sets, salaries):
+                print(f'{", ".join(skills)}: {salary:.2f}')
+        if 'recommend' in stages:
+            from .recommender import recommend_skills
+            for skills in skill_sets or [[]]:
+                recommendations = recommend_skills(artifacts.models[args.model], artifacts.vocabulary, skills,
+                                                   k=args.add, beam_width=args.beam_width)
+                print(f'{", ".join(skills) or "no skills"}:')
+                for recommendation in recommendations:
+                    print(f'  + {", ".join(recommendation.skills)}: {recommendation.salary:.2f} '
+                          f'(+{recommendation.gain:.2f})')
+        if 'serve' in stages:
+            from .service import PredictionService, serve
+            serve(PredictionService(artifacts, args.model), args.host, args.port)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+            format='[%(asctime)s] %(levelname).1s %(message)s',
+            level=logging.INFO, datefmt='%Y.%m.%d %H:%M:%S'
+    )
+    main()
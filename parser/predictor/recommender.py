@@ -0,0 +1,82 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+from .features import encode_skill_lists
+
+
+@dataclass
+class Recommendation:
+    """Skills to add to current skill set and predicted salary with them"""
+    skills: list[str]
+    salary: float
+    gain: float
+
+
+def _candidate_matrix(columns: np.ndarray, candidates: np.ndarray, n_features: int) -> sparse.csr_matrix:
+    """
+    One row for every candidate: columns of skill set plus candidate column. Matrix is built from index arrays
+    directly, without python loop over candidates.
+    """
+    n_rows = len(candidates)
+    row_size = len(columns) + 1
+    indices = np.column_stack([np.tile(columns, (n_rows, 1)), candidates[:, None]]).ravel().astype(np.int32)
+    indptr = np.arange(n_rows + 1, dtype=np.int64) * row_size
+    data = np.ones(len(indices), dtype=np.float32)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_features))
+    matrix.sort_indices()
+    return matrix
+
+
+def _predict(model, matrix: sparse.csr_matrix, batch_size: int) -> np.ndarray:
+    return np.concatenate([model.predict(matrix[start:start + batch_size])
+                           for start in range(0, matrix.shape[0], batch_size)])
+
+
+def recommend_skills(model, vocabulary: list[str], current_skills: list[str], k=3, beam_width=5, top=5,
+                     candidates: Optional[list[str]] = None, batch_size=50000) -> list[Recommendation]:
+    """
+    Search combinations of k new skills with the highest predicted salary. Beam search adds one skill per step and
+    keeps beam_width best skill sets, every step is evaluated by batched model calls over one candidate matrix
+    (beam_width x number of candidates rows), so thousands of skills in vocabulary are fine. beam_width=1 is greedy
+    search.
+    :param model: fitted regressor
+    :param vocabulary: skills which model was trained on
+    :param current_skills: skills which are already known, unknown ones are ignored
+    :param k: number of new skills
+    :param beam_width: number of skill sets kept after every step
+    :param top: number of returned combinations
+    :param candidates: skills which could be added, the whole vocabulary by default
+    :param batch_size: max number of rows for one predict call
+    :return: best combinations, the highest salary first
+    """
+    index = {skill: idx for idx, skill in enumerate(vocabulary)}
+    base = sorted({index[skill] for skill in current_skills if skill in index})
+    unknown = [skill for skill in current_skills if skill not in index]
+    if unknown:
+        logging.warning(f'Skills are not in model vocabulary and ignored: {unknown}')
+    pool = np.array(sorted({index[skill] for skill in candidates if skill in index}) if candidates is not None
+                    else range(len(vocabulary)), dtype=np.int32)
+    pool = pool[~np.isin(pool, base)]
+
+    base_salary = float(model.predict(encode_skill_lists([[vocabulary[idx] for idx in base]], index))[0])
+
+    beam = {(): base_salary}
+    for _ in range(min(k, len(pool))):
+        states = sorted(beam.items(), key=lambda item: -item[1])[:beam_width]
+        blocks, keys = [], []
+        for added, _ in states:
+            columns = np.array(sorted(base + list(added)), dtype=np.int32)
+            step_candidates = pool[~np.isin(pool, added)] if added else pool
+            blocks.append(_candidate_matrix(columns, step_candidates, len(vocabulary)))
+            keys.extend(tuple(sorted(added + (candidate,))) for candidate in step_candidates.tolist())
+        # candidates of all skill sets in beam are predicted together
+        salaries = _predict(model, sparse.vstack(blocks, format='csr'), batch_size)
+        # the same set reached in other order is kept once
+        beam = dict(zip(keys, salaries.tolist()))
+
+    best = sorted(beam.items(), key=lambda item: -item[1])[:top]
+    return [Recommendation([vocabulary[idx] for idx in added], salary, salary - base_salary) for added, salary in best]
@@ -0,0 +1,198 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+
+from .artifacts import Artifacts
+from .features import encode_skill_lists, skill_index
+
+
+def validate_skills(skills) -> list[str]:
+    """Skill set of request as list of strings, TypeError is raised for anything else (e.g. one string of skills)"""
+    if not isinstance(skills, (list, tuple)) or not all(isinstance(skill, str) for skill in skills):
+        raise TypeError(f'skills must be a list of strings, got {skills!r:.100}')
+    return list(skills)
+
+
+class LatencyStats:
+    """Latencies of recent requests and sizes of model batches"""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def add_request(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+            self.requests += 1
+
+    def add_batch(self, size: int) -> None:
+        with self._lock:
+            self.batch_sizes.append(size)
+
+    def summary(self) -> dict:
+        with self._lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = np.array(self.batch_sizes)
+            requests = self.requests
+        if len(latencies) == 0:
+            return {'requests': requests}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'requests': requests,
+            'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99, 'max': float(latencies.max())},
+            'mean_batch_size': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+        }
+
+
+class PredictionService:
+    """
+    In-process salary prediction service. Artifacts are loaded once, concurrent requests are collected into
+    micro-batches (up to max_batch_size requests or max_wait_ms after the first one) and every batch is predicted with
+    one model call on one sparse matrix.
+    """
+
+    def __init__(self, artifacts: Artifacts, model_name='random_forest', max_batch_size=64, max_wait_ms=2.0):
+        self.artifacts = artifacts
+        self.model = artifacts.models[model_name]
+        self.index = skill_index(artifacts.vocabulary)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = LatencyStats()
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+        self._worker.start()
+
+    def _collect(self) -> list[tuple[list[str], Future]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            batch = [item for item in self._collect() if item is not None]
+            if not batch:
+                continue
+            try:
+                salaries = self._predict([skills for skills, _ in batch])
+            except Exception:
+                # one broken request must not fail other requests of its batch
+                self._predict_one_by_one(batch)
+                continue
+            self.stats.add_batch(len(batch))
+            for (_, future), salary in zip(batch, salaries):
+                future.set_result(float(salary))
+
+    def _predict(self, skill_sets: list[list[str]]) -> np.ndarray:
+        return self.model.predict(encode_skill_lists(skill_sets, self.index))
+
+    def _predict_one_by_one(self, batch: list[tuple[list[str], Future]]) -> None:
+        for skills, future in batch:
+            try:
+                future.set_result(float(self._predict([skills])[0]))
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, skills: list[str]) -> Future:
+        """Queue skill set and get future with predicted salary, malformed skill set raises TypeError right away"""
+        skills = validate_skills(skills)
+        future = Future()
+        self._queue.put((skills, future))
+        return future
+
+    def predict(self, skills: list[str], timeout: Optional[float] = None) -> float:
+        """Predicted salary for skill set"""
+        started = time.perf_counter()
+        salary = self.submit(skills).result(timeout)
+        self.stats.add_request(time.perf_counter() - started)
+        return salary
+
+    def predict_many(self, skill_sets: list[list[str]], timeout: Optional[float] = None) -> list[float]:
+        """Predicted salaries for several skill sets, they are batched together with other requests"""
+        started = time.perf_counter()
+        if not isinstance(skill_sets, (list, tuple)):
+            raise TypeError(f'skill_sets must be a list of skill lists, got {skill_sets!r:.100}')
+        # the whole request is rejected before any of its skill sets is queued
+        skill_sets = [validate_skills(skills) for skills in skill_sets]
+        futures = [self.submit(skills) for skills in skill_sets]
+        salaries = [future.result(timeout) for future in futures]
+        self.stats.add_request(time.perf_counter() - started)
+        return salaries
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._queue.put(None)
+        self._worker.join()
+
+
+def _make_handler(service: PredictionService):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        """
+        POST /predict with {"skills": ["Python", "SQL"]} or {"skill_sets": [[...], [...]]}
+        GET /metrics with latency statistics
+        """
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, {'version': service.artifacts.version, **service.stats.summary()})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                if not isinstance(request, dict):
+                    raise TypeError('request must be a JSON object')
+                if 'skill_sets' in request:
+                    self._send_json(200, {'salaries': service.predict_many(request['skill_sets'])})
+                else:
+                    self._send_json(200, {'salary': service.predict(request['skills'])})
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return PredictionHandler
+
+
+def serve(service: PredictionService, host='127.0.0.1', port=8000) -> None:
+    """Run HTTP API over prediction service until interrupted"""
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    logging.info(f'Serving artifacts {service.artifacts.version} on http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
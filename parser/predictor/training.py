@@ -0,0 +1,158 @@
+import logging
+import os
+import time
+from typing import Optional
+
+import joblib
+import numpy as np
+from joblib import Memory, Parallel, delayed
+from scipy import sparse
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+
+# hyperparameter grids of regressors, model names are the same as in predictor.train
+PARAM_GRIDS = {
+    'linear': {
+        'fit_intercept': [True, False],
+    },
+    'random_forest': {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 20],
+        'min_samples_leaf': [1, 5],
+    },
+    'hist_gradient_boosting': {
+        'model__learning_rate': [0.05, 0.1],
+        'model__max_leaf_nodes': [15, 31],
+        'model__l2_regularization': [0.0, 1.0],
+    },
+}
+# gradient boosting works on dense matrix, so it is searched only when it is asked for
+DEFAULT_MODELS = ('linear', 'random_forest')
+
+
+def to_dense(X):
+    """HistGradientBoosting doesn't accept sparse input"""
+    return X.toarray() if sparse.issparse(X) else X
+
+
+def make_estimator(name: str, random_state=0):
+    """Base estimator for model name"""
+    from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer
+
+    if name == 'linear':
+        return LinearRegression()
+    if name == 'random_forest':
+        # candidates and folds are already run in parallel, so every forest uses one core
+        return RandomForestRegressor(random_state=random_state, n_jobs=1)
+    if name == 'hist_gradient_boosting':
+        return Pipeline([
+            ('dense', FunctionTransformer(to_dense, accept_sparse=True)),
+            ('model', HistGradientBoostingRegressor(
+                    max_iter=1000, early_stopping=True, validation_fraction=0.1, n_iter_no_change=20,
+                    random_state=random_state
+            )),
+        ])
+    raise ValueError(f'Unknown model: {name}')
+
+
+def _fit_fold(name: str, params: dict, X, y, train_idx: np.ndarray, test_idx: np.ndarray, random_state: int,
+              data_digest: str) -> dict:
+    """
+    Fit one candidate on one fold and score it. Results are cached by joblib.Memory per fold, data is keyed by its
+    digest instead of being hashed for every fold.
+    :return: fold RMSE, CPU seconds of fit and of fit with scoring
+    """
+    estimator = make_estimator(name, random_state).set_params(**params)
+    # process time of worker includes threads of estimator, e.g. OpenMP of HistGradientBoosting
+    started = time.process_time()
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_cpu_seconds = time.process_time() - started
+    y_pred = estimator.predict(X[test_idx])
+    return {
+        'rmse': float(np.sqrt(np.mean((y[test_idx] - y_pred) ** 2))),
+        'fit_cpu_seconds': fit_cpu_seconds,
+        'cpu_seconds': time.process_time() - started,
+    }
+
+
+def _refit(name: str, params: dict, X, y, random_state: int, data_digest: str):
+    """Fit the best candidate on all data"""
+    return make_estimator(name, random_state).set_params(**params).fit(X, y)
+
+
+def search_models(X, y, models: Optional[list[str]] = None, cv=5, random_state=0, n_jobs=-1,
+                  cache_dir: Optional[str] = CACHE_DIR) -> tuple[dict, dict]:
+    """
+    Run k-fold cross-validated grid search for every model, all candidates and folds of a model are fitted in parallel
+    on all cores
+    :param X: features
+    :param y: salaries
+    :param models: model names from PARAM_GRIDS, DEFAULT_MODELS by default
+    :param cv: number of folds
+    :param random_state: seed of folds and models
+    :param n_jobs: joblib workers, -1 uses all cores
+    :param cache_dir: results of every fold are cached here, so repeated run with the same data computes only new
+                      candidates of changed grid. None disables cache
+    :return: best fitted estimators and report by model name: CV RMSE of the best candidate, its mean CPU seconds per
+             fit and the CPU and wall time of the whole search
+    """
+    from sklearn.model_selection import KFold, ParameterGrid
+
+    models = list(models or DEFAULT_MODELS)
+    unknown = [name for name in models if name not in PARAM_GRIDS]
+    if unknown:
+        raise ValueError(f'Unknown models: {", ".join(unknown)}, available models: {", ".join(PARAM_GRIDS)}')
+
+    memory = Memory(cache_dir, verbose=0)
+    fit_fold = memory.cache(_fit_fold, ignore=['X', 'y'])
+    refit = memory.cache(_refit, ignore=['X', 'y'])
+    data_digest = joblib.hash((X, y))
+    folds = list(KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X))
+    # error of mean salary, models are compared with it
+    baseline_rmse = float(np.mean([np.sqrt(np.mean((y[test_idx] - y[train_idx].mean()) ** 2))
+                                   for train_idx, test_idx in folds]))
+
+    estimators, reports = {}, {}
+    for name in models:
+        candidates = list(ParameterGrid(PARAM_GRIDS[name]))
+        started = time.perf_counter()
+        results = Parallel(n_jobs=n_jobs)(
+                delayed(fit_fold)(name, params, X, y, train_idx, test_idx, random_state, data_digest)
+                for params in candidates for train_idx, test_idx in folds
+        )
+        wall_seconds = time.perf_counter() - started
+        rmse = np.array([result['rmse'] for result in results]).reshape(len(candidates), cv)
+        fit_cpu = np.array([result['fit_cpu_seconds'] for result in results]).reshape(len(candidates), cv)
+        best = int(np.argmin(rmse.mean(axis=1)))
+        estimators[name] = refit(name, candidates[best], X, y, random_state, data_digest)
+        reports[name] = report = {
+            'best_params': candidates[best],
+            'rmse': float(rmse[best].mean()),
+            'rmse_std': float(rmse[best].std()),
+            'baseline_rmse': baseline_rmse,
+            'fit_cpu_seconds': float(fit_cpu[best].mean()),
+            'cpu_seconds': float(sum(result['cpu_seconds'] for result in results)),
+            'wall_seconds': wall_seconds,
+            'candidates': len(candidates),
+        }
+        logging.info(f'{name}: RMSE {report["rmse"]:.2f} ± {report["rmse_std"]:.2f} (mean salary gives '
+                     f'{baseline_rmse:.2f}), best params {report["best_params"]}, best candidate fit '
+                     f'{report["fit_cpu_seconds"]:.2f} CPU s, search {report["cpu_seconds"]:.1f} CPU s, '
+                     f'{wall_seconds:.1f}s wall')
+    return estimators, reports
+
+
+def best_model(reports: dict, cpu_budget: Optional[float] = None) -> Optional[str]:
+    """
+    Name of the model with the lowest cross-validated error
+    :param reports: reports of search_models
+    :param cpu_budget: max mean CPU seconds of one fit of the best candidate, slower models are not considered
+    :return: None if no model fits into the budget
+    """
+    allowed = [name for name in reports if cpu_budget is None or reports[name]['fit_cpu_seconds'] <= cpu_budget]
+    return min(allowed, key=lambda name: reports[name]['rmse']) if allowed else None
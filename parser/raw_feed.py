@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import logging
+from collections.abc import Collection, Iterable, Iterator
+from typing import BinaryIO, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_ERRORS = (zstandard.ZstdError,) if zstandard is not None else ()
+
+
+# schema of spider items: field names in the order of rows which are given to the cleaner and the job store, feeds
+# are read by names, so order of fields in a feed file doesn't matter
+RAW_COLUMNS = (
+    'keyword', 'location', 'page', 'position', 'company', 'jobkey', 'jobTitle', 'jobDescription', 'salaryMax',
+    'salaryMin', 'salaryText',
+)
+JSON_LINES_SUFFIXES = ('.jsonl', '.jl')
+ZSTD_SUFFIX = '.zst'
+
+
+def _loads(line: bytes) -> dict:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _iter_csv(path: str, columns: Collection[str]) -> Iterator[list]:
+    """Rows of csv feed, only wanted cells are taken from parsed rows"""
+    with open(path, 'r', newline='') as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, None) or []
+        if 'jobkey' not in header:
+            raise ValueError(f'{path} has no header with jobkey column, header: {header}')
+        positions = [(idx, header.index(column)) for idx, column in enumerate(RAW_COLUMNS)
+                     if column in columns and column in header]
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            record = [None] * len(RAW_COLUMNS)
+            for idx, position in positions:
+                record[idx] = row[position]
+            yield record
+
+
+def _iter_json_lines(source: BinaryIO, path: str, columns: Collection[str]) -> Iterator[list]:
+    """Rows of JSON lines feed, incomplete last line of interrupted crawl is skipped"""
+    wanted = [(idx, column) for idx, column in enumerate(RAW_COLUMNS) if column in columns]
+    try:
+        for line in source:
+            if not line.strip():
+                continue
+            try:
+                item = _loads(line)
+            except ValueError:
+                logging.warning(f'Broken line in {path} is skipped')
+                continue
+            record = [None] * len(RAW_COLUMNS)
+            for idx, column in wanted:
+                record[idx] = item.get(column)
+            yield record
+    except ZSTD_ERRORS:
+        logging.warning(f'{path} ends with incomplete zstd frame, the rest of it is skipped')
+
+
+def iter_raw_rows(path: str, columns: Optional[Iterable[str]] = None) -> Iterator[list]:
+    """
+    Stream rows of crawled feed: csv, JSON lines (.jsonl, .jl) or zstd compressed JSON lines (.jsonl.zst). Rows are
+    lists in RAW_COLUMNS order without header, cells are taken by column name.
+    :param path: feed file
+    :param columns: columns which are decoded, other cells are None; all columns by default
+    """
+    columns = set(columns or RAW_COLUMNS)
+    name = path[:-len(ZSTD_SUFFIX)] if path.endswith(ZSTD_SUFFIX) else path
+    if not name.endswith(JSON_LINES_SUFFIXES):
+        if name != path:
+            raise ValueError(f'Only JSON lines feeds may be zstd compressed: {path}')
+        yield from _iter_csv(path, columns)
+        return
+    with open(path, 'rb') as feed_file:
+        if name == path:
+            yield from _iter_json_lines(feed_file, path, columns)
+            return
+        if zstandard is None:
+            raise ImportError(f'zstandard package is required to read {path}')
+        # feed may be appended by several crawls, so it is a series of frames
+        reader = zstandard.ZstdDecompressor().stream_reader(feed_file, read_across_frames=True)
+        yield from _iter_json_lines(io.BufferedReader(reader), path, columns)
@@ -0,0 +1,121 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from parser.clean_csv import skill_extractor
+from parser.clean_csv.openai_client import ClientConfig
+
+
+class CompletionServer:
+    """
+    Local stand-in of OpenAI chat completions endpoint. Answer skills are the description itself, so order of results
+    is checked easily; packed prompts get skills by jobkey. Requests and opened connections are recorded.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.descriptions = []
+        self.connections = 0
+        # description -> number of 429 answers before success
+        self.rate_limited = {}
+        # description -> seconds to wait before answer
+        self.delays = {}
+        # jobkeys of every packed request; jobkeys which packed answers leave out; packed answers are not JSON
+        self.packs = []
+        self.omitted = set()
+        self.malformed = False
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}/v1'
+
+    def client_config(self, **kwargs) -> ClientConfig:
+        return ClientConfig(api_key='test', base_url=self.base_url, max_retries=0, **kwargs)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive connections, so reuse of them is visible
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['messages'][-1]['content']
+                description = prompt.rsplit('description: ', 1)[-1]
+                pack = dict(re.findall(r'jobkey: (\S+)\ndescription: (.*?)(?=\n\njobkey: |$)', prompt, re.DOTALL))
+                with server.lock:
+                    if pack:
+                        server.packs.append(list(pack))
+                    else:
+                        server.descriptions.append(description)
+                    limited = server.rate_limited.get(description, 0)
+                    if limited:
+                        server.rate_limited[description] = limited - 1
+                if limited:
+                    self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': None}})
+                    return
+                time.sleep(server.delays.get(description, 0))
+                if pack:
+                    answer = {jobkey: [text] for jobkey, text in pack.items() if jobkey not in server.omitted}
+                    content = 'not a json' if server.malformed else json.dumps(answer)
+                else:
+                    content = json.dumps({'skills': [description]})
+                self._send(200, {
+                    'id': 'chatcmpl-test',
+                    'object': 'chat.completion',
+                    'created': 0,
+                    'model': body['model'],
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': content},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+                })
+
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def completion_server():
+    server = CompletionServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+class CharEncoding:
+    """Stand-in of tiktoken encoding, one token per char; BPE files of tiktoken are downloaded on first use"""
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [ord(char) for char in text]
+
+
+@pytest.fixture
+def offline_encoding(monkeypatch):
+    monkeypatch.setattr(skill_extractor, 'get_encoding', CharEncoding)
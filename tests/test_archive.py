@@ -0,0 +1,110 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from scrapy import Request
+from scrapy.core.downloader.middleware import DownloaderMiddlewareManager
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+from indeed_project.archive import ResponseArchive
+from indeed_project.middlewares import PROXY_ENDPOINT, ResponseArchiveMiddleware
+from indeed_project.settings import DOWNLOADER_MIDDLEWARES
+from indeed_project.spiders.indeed_spider import IndeedSpider
+
+JOB_URL = 'https://www.indeed.com/m/basecamp/viewjob?viewtype=embedded&jk=abc'
+BODY = b'<html><script>window._initialData={"jobInfoWrapperModel": {}};</script></html>'
+
+
+class Downloader:
+    """Downloader middlewares of settings.py (archive and proxy) over fake network which records fetched urls"""
+
+    def __init__(self, archive_path: str, mode: str):
+        self.crawler = get_crawler(IndeedSpider, {
+            'DOWNLOADER_MIDDLEWARES': DOWNLOADER_MIDDLEWARES, 'ARCHIVE_MODE': mode, 'ARCHIVE_PATH': archive_path,
+            'SCRAPEOPS_API_KEY': 'key', 'SCRAPEOPS_PROXY_ENABLED': True,
+        })
+        self.spider = IndeedSpider.from_crawler(self.crawler, incremental='0')
+        self.manager = DownloaderMiddlewareManager.from_crawler(self.crawler)
+        self.fetched = []
+
+    def network(self, request, spider):
+        self.fetched.append(request.url)
+        return defer.succeed(HtmlResponse(request.url, body=BODY, encoding='utf-8', request=request))
+
+    def download(self, request: Request):
+        """Response of request, request replaced by proxy goes through middlewares again as engine schedules it"""
+        results = []
+        self.manager.download(self.network, request, self.spider).addBoth(results.append)
+        [result] = results
+        if isinstance(result, Failure):
+            result.raiseException()
+        return self.download(result) if isinstance(result, Request) else result
+
+    def close(self) -> None:
+        [archive] = [middleware for middleware in self.manager.middlewares
+                     if isinstance(middleware, ResponseArchiveMiddleware)]
+        archive.spider_closed(self.spider)
+
+    def stat(self, key: str) -> int:
+        return self.crawler.stats.get_value(f'archive/{key}', 0)
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    return str(tmp_path / 'responses.sqlite')
+
+
+def test_response_is_recorded_by_target_url(archive_path):
+    downloader = Downloader(archive_path, 'record')
+
+    response = downloader.download(Request(JOB_URL))
+    downloader.close()
+
+    [fetched] = downloader.fetched
+    assert fetched.startswith(PROXY_ENDPOINT)
+    assert parse_qs(urlparse(fetched).query)['url'] == [JOB_URL]
+    assert response.url == JOB_URL
+    assert downloader.stat('recorded') == 1
+
+    archive = ResponseArchive(archive_path)
+    fingerprint = downloader.crawler.request_fingerprinter.fingerprint(Request(JOB_URL))
+    archived = archive.get(fingerprint)
+    archive.close()
+    assert (archived.url, archived.status, archived.body) == (JOB_URL, 200, BODY)
+
+
+def test_replayed_response_skips_downloader(archive_path):
+    recorder = Downloader(archive_path, 'record')
+    recorder.download(Request(JOB_URL))
+    recorder.close()
+
+    downloader = Downloader(archive_path, 'replay')
+    response = downloader.download(Request(JOB_URL, meta={'jobKey': 'abc'}))
+
+    assert downloader.fetched == []
+    assert isinstance(response, HtmlResponse)
+    assert (response.url, response.status, response.body) == (JOB_URL, 200, BODY)
+    assert 'archive' in response.flags
+    assert response.meta['jobKey'] == 'abc'
+    assert downloader.stat('replayed') == 1
+
+    with pytest.raises(IgnoreRequest):
+        downloader.download(Request(JOB_URL.replace('abc', 'missed')))
+    downloader.close()
+    assert downloader.fetched == []
+    assert downloader.stat('missed') == 1
+
+
+def test_failed_responses_are_not_recorded(archive_path):
+    downloader = Downloader(archive_path, 'record')
+    downloader.network = lambda request, spider: defer.succeed(HtmlResponse(request.url, status=503, request=request))
+
+    assert downloader.download(Request(JOB_URL)).status == 503
+    downloader.close()
+
+    archive = ResponseArchive(archive_path)
+    assert len(archive) == 0
+    archive.close()
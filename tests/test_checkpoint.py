@@ -0,0 +1,44 @@
+import pytest
+
+from parser.clean_csv.checkpoint import Checkpoint
+
+
+def test_restore_cuts_uncommitted_rows(tmp_path):
+    output = tmp_path / 'output.csv'
+    checkpoint = Checkpoint(str(tmp_path / 'output.checkpoint'))
+    output.write_text('a,1\n')
+    checkpoint.commit(4, ['a'])
+    output.write_text('a,1\nb,2\n')
+
+    resumed = Checkpoint(checkpoint.path)
+    resumed.restore(str(output))
+
+    assert output.read_text() == 'a,1\n'
+    assert resumed.completed == {'a'}
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'output.checkpoint'))
+    checkpoint.commit(4, ['a'])
+    with open(checkpoint.path, 'a') as journal:
+        journal.write('{"offset": 8, "jobk')
+
+    resumed = Checkpoint(checkpoint.path)
+
+    assert (resumed.offset, resumed.completed) == (4, {'a'})
+
+
+def test_output_shorter_than_checkpoint_is_reported(tmp_path):
+    output = tmp_path / 'output.csv'
+    checkpoint = Checkpoint(str(tmp_path / 'output.checkpoint'))
+    output.write_text('a,1\nb,2\n')
+    checkpoint.commit(8, ['a', 'b'])
+    output.write_text('a,1\n')
+
+    with pytest.raises(ValueError):
+        checkpoint.restore(str(output))
+    assert output.read_bytes() == b'a,1\n'
+
+    output.unlink()
+    with pytest.raises(FileNotFoundError):
+        checkpoint.restore(str(output))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from parser.predictor.clustering import cluster_postings, matrix_chunks
+from parser.predictor.features import build_skill_matrix, encode_skill_lists, skill_index
+
+VOCABULARY = ['Python', 'SQL', 'Spark', 'Excel', 'Word', 'PowerPoint']
+# data postings with high salaries and office postings with low ones
+SKILL_LISTS = [['Python', 'SQL', 'Spark']] * 16 + [['Python', 'SQL']] * 4 + \
+    [['Excel', 'Word', 'PowerPoint']] * 16 + [['Excel', 'Word']] * 4
+SALARY = np.array([120000.0] * 20 + [50000.0] * 20)
+
+
+@pytest.fixture(scope='module')
+def matrix():
+    return build_skill_matrix(SKILL_LISTS, VOCABULARY)[0]
+
+
+@pytest.mark.parametrize('reducer, chunk_size', [('incremental_pca', 7), ('svd', 100)])
+def test_postings_are_clustered_by_skills(matrix, reducer, chunk_size):
+    clustering = cluster_postings(matrix_chunks(matrix, SALARY, chunk_size), VOCABULARY, n_clusters=2,
+                                  n_components=3, reducer=reducer)
+
+    assert clustering.n_clusters == 2
+    data, office = clustering.labels[0], clustering.labels[-1]
+    assert data != office
+    assert (clustering.labels[:20] == data).all() and (clustering.labels[20:] == office).all()
+    assert clustering.projection.shape == (40, 2)
+    summaries = {summary.label: summary for summary in clustering.summaries}
+    assert (summaries[data].size, summaries[data].mean_salary) == (20, 120000)
+    assert summaries[office].median_salary == 50000
+    assert {skill for skill, _, _ in summaries[data].top_skills} == {'Python', 'SQL', 'Spark'}
+    assert summaries[office].top_skills[:2] == [('Excel', 1.0, 2.0), ('Word', 1.0, 2.0)]
+    assert summaries[office].top_skills[2] == ('PowerPoint', 0.8, 2.0)
+
+    new_postings = encode_skill_lists([['Python', 'SQL'], ['Word'], ['Spark']], skill_index(VOCABULARY))
+    assert clustering.clusterer.predict(new_postings).tolist() == [data, office, data]
+
+
+def test_number_of_clusters_is_chosen_by_silhouette(matrix):
+    # four distinct skill sets are four perfect clusters
+    clustering = cluster_postings(matrix_chunks(matrix, SALARY), VOCABULARY, k_range=range(2, 6), n_components=3)
+
+    assert clustering.n_clusters == 4
+    assert set(clustering.scores) == {2, 3, 4, 5}
+    assert max(clustering.scores.values()) == clustering.scores[4] == pytest.approx(1)
+    assert sorted(summary.size for summary in clustering.summaries) == [4, 4, 16, 16]
+
+
+def test_too_few_postings(matrix):
+    with pytest.raises(ValueError):
+        cluster_postings(matrix_chunks(matrix[:2], SALARY[:2]), VOCABULARY, n_components=3)
+    with pytest.raises(ValueError, match='Unknown reducer'):
+        cluster_postings(matrix_chunks(matrix, SALARY), VOCABULARY, reducer='umap')
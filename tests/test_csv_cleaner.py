@@ -0,0 +1,118 @@
+import csv
+
+import pytest
+
+from parser.clean_csv import csv_cleaner
+from parser.clean_csv.extractors import SkillExtractor
+from parser.clean_csv.skill_cache import SkillCache
+from parser.clean_csv.skill_extractor import (
+    MODEL,
+    PACKED_PROMPT_VERSION,
+    PROMPT_VERSION,
+    ExtractionConfig,
+    SkillExtractionEngine,
+)
+
+
+class FlakyExtractor(SkillExtractor):
+    """Fails descriptions of given jobkeys once"""
+
+    model = 'test'
+    prompt_version = 'test'
+
+    def __init__(self, failing: set[str]):
+        self.failing = set(failing)
+
+    def extract_skills(self, items):
+        result = []
+        for jobkey, description in items:
+            if jobkey in self.failing:
+                self.failing.discard(jobkey)
+                result.append(None)
+            else:
+                result.append([description.split()[0]])
+        return result
+
+
+def test_retried_rows_keep_source_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_cleaner, 'SKILL_SETS_DIR', str(tmp_path))
+    source = tmp_path / 'cleaned.csv'
+    with open(source, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['keyword', 'jobkey', 'location', 'description', 'salary'])
+        writer.writerows([['python', f'job{idx}', 'Remote', f'Skill{idx} text', 100000] for idx in range(6)])
+
+    extractor = FlakyExtractor({'job1', 'job4'})
+    output = csv_cleaner.create_clean_file(str(source), 'test', cache_path=None, extractor=extractor)
+    with open(output, 'r') as csv_file:
+        assert [row[1] for row in csv.reader(csv_file)] == ['jobkey', 'job0', 'job2', 'job3', 'job5']
+
+    csv_cleaner.create_clean_file(str(source), 'test', cache_path=None, extractor=extractor)
+    with open(output, 'r') as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert [row[1] for row in rows] == ['jobkey'] + [f'job{idx}' for idx in range(6)]
+    assert [row[2] for row in rows[1:]] == [f'Skill{idx}' for idx in range(6)]
+
+    # nothing to do on the third run, output is kept as is
+    csv_cleaner.create_clean_file(str(source), 'test', cache_path=None, extractor=extractor)
+    with open(output, 'r') as csv_file:
+        assert list(csv.reader(csv_file)) == rows
+
+
+def test_legacy_output_is_rewritten_to_current_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_cleaner, 'SKILL_SETS_DIR', str(tmp_path))
+    source = tmp_path / 'cleaned.csv'
+    with open(source, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['keyword', 'jobkey', 'location', 'description', 'salary'])
+        writer.writerows([['python', f'job{idx}', f'City{idx}', f'Skill{idx} text', 100000] for idx in range(4)])
+    # output of cleaner without checkpoint: 4 columns, failed extraction saved as 0, jobkey written twice
+    with open(tmp_path / 'test_skill_set.csv', 'w', newline='') as csv_file:
+        csv.writer(csv_file).writerows([
+            ['keyword', 'jobkey', 'skills', 'salary'],
+            ['python', 'job0', 'Paid0', 100000],
+            ['python', 'job1', 0, 100000],
+            ['python', 'job2', 'Paid2', 100000],
+            ['python', 'job2', 'Paid2', 100000],
+        ])
+
+    extractor = FlakyExtractor(set())
+    output = csv_cleaner.create_clean_file(str(source), 'test', cache_path=None, extractor=extractor)
+
+    with open(output, 'r') as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows == [
+        ['keyword', 'jobkey', 'skills', 'salary', 'location'],
+        ['python', 'job0', 'Paid0', '100000', 'City0'],
+        ['python', 'job1', 'Skill1', '100000', 'City1'],
+        ['python', 'job2', 'Paid2', '100000', 'City2'],
+        ['python', 'job3', 'Skill3', '100000', 'City3'],
+    ]
+
+
+@pytest.mark.usefixtures('offline_encoding')
+def test_packed_answers_and_single_fallbacks_are_cached_by_prompt(tmp_path, completion_server):
+    completion_server.omitted = {'job1'}
+    engine = SkillExtractionEngine(ExtractionConfig(client=completion_server.client_config(http2=False), pack_size=3))
+    cache_path = str(tmp_path / 'cache.sqlite')
+    batch = [['python', f'job{idx}', 'Remote', f'description {idx}', 100000] for idx in range(3)]
+    cache = csv_cleaner._open_cache(cache_path, engine, None, None)
+    try:
+        skills_lists, prompt_versions = csv_cleaner._extract_skill_lists(engine, batch, cache)
+        # the second run is answered by cache
+        assert csv_cleaner._extract_skill_lists(engine, batch[::2], cache)[0] == [skills_lists[0], skills_lists[2]]
+    finally:
+        engine.close()
+        cache.close()
+
+    assert prompt_versions == [PACKED_PROMPT_VERSION, PROMPT_VERSION, PACKED_PROMPT_VERSION]
+    assert len(completion_server.packs) == 1
+    items = [(row[1], row[3]) for row in batch]
+    single_cache = SkillCache(cache_path, MODEL, PROMPT_VERSION)
+    packed_cache = SkillCache(cache_path, MODEL, PACKED_PROMPT_VERSION)
+    try:
+        assert single_cache.get_many(items) == [None, ['description 1'], None]
+        assert packed_cache.get_many(items) == [['description 0'], None, ['description 2']]
+    finally:
+        single_cache.close()
+        packed_cache.close()
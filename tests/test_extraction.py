@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from indeed_project import extraction
+from indeed_project.extraction import ExtractionError, JobPage, parse_job_page, parse_search_page
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def decoder(request, monkeypatch):
+    """Pages are parsed with orjson when it is installed and with Python json decoder otherwise"""
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(extraction, 'orjson', None)
+    return request.param
+
+
+def job_page(data) -> str:
+    return f'<html><script>window._initialData={json.dumps(data)};window.other={{"a": 1}};</script></html>'
+
+
+def search_page(data) -> str:
+    return f'<script>window.mosaic.providerData["mosaic-provider-jobcards"]={json.dumps(data)};</script>'
+
+
+def test_job_page(decoder):
+    data = {
+        'jobInfoWrapperModel': {'jobInfoModel': {
+            'companyName': 'Acme', 'jobTitle': 'Developer', 'sanitizedJobDescription': '<p>"};" in text</p>',
+        }},
+        'salaryInfoModel': {'salaryMin': 1, 'salaryMax': 2, 'salaryText': '$1 - $2 an hour'},
+    }
+
+    assert parse_job_page(job_page(data)) == JobPage(
+            company='Acme', title='Developer', description='<p>"};" in text</p>',
+            salary={'salaryMin': 1, 'salaryMax': 2, 'salaryText': '$1 - $2 an hour'},
+    )
+    assert parse_job_page(job_page({'salaryInfoModel': None})) == JobPage()
+
+
+def test_search_page(decoder):
+    model = {
+        'results': [{'jobkey': 'a'}, {'title': 'no jobkey'}, {'jobkey': 'b'}],
+        'tierSummaries': [{'jobCount': 10}, {'jobCount': 5}, {}],
+    }
+
+    page = parse_search_page(search_page({'metaData': {'mosaicProviderJobCardsModel': model}}))
+
+    assert page.jobkeys == ['a', None, 'b']
+    assert page.total == 15
+    assert parse_search_page(search_page({'metaData': {'mosaicProviderJobCardsModel': {}}})).jobkeys == []
+
+
+@pytest.mark.parametrize('text', [
+    '<html><script>window.other={"a": 1};</script></html>',
+    '<script>window._initialData=null;</script>',
+])
+def test_job_page_without_data(decoder, text):
+    with pytest.raises(ExtractionError, match='_initialData'):
+        parse_job_page(text)
+
+
+def test_malformed_json(decoder):
+    with pytest.raises(ExtractionError, match='Broken JSON'):
+        parse_job_page('<script>window._initialData={"jobInfoWrapperModel": {"jobTitle": "Devel</script>')
+    with pytest.raises(ExtractionError, match='Broken JSON'):
+        parse_search_page(search_page({'metaData': {}})[:-12])
+
+
+def test_search_page_without_job_cards(decoder):
+    with pytest.raises(ExtractionError):
+        parse_search_page(job_page({'metaData': {}}))
+    with pytest.raises(ExtractionError, match='mosaicProviderJobCardsModel'):
+        parse_search_page(search_page({'metaData': {'otherModel': {}}}))
@@ -0,0 +1,58 @@
+import numpy as np
+
+from parser.predictor.features import (
+    build_skill_matrix,
+    build_vocabulary,
+    encode_skill_lists,
+    skill_index,
+    top_skill_indices,
+)
+
+
+def test_skills_are_matched_exactly():
+    matrix, vocabulary = build_skill_matrix([['React'], ['R', 'SQL'], ['r', 'React Native']], ['R', 'React', 'SQL'])
+
+    assert matrix.toarray().tolist() == [[0, 1, 0], [1, 0, 1], [0, 0, 0]]
+    assert vocabulary == ['R', 'React', 'SQL']
+
+
+def test_repeated_and_unknown_skills():
+    matrix = encode_skill_lists([['SQL', 'SQL', 'Cobol'], [], ['Python', 'SQL']], skill_index(['Python', 'SQL']))
+
+    assert matrix.toarray().tolist() == [[0, 1], [0, 0], [1, 1]]
+    assert matrix.dtype == np.float32
+    assert matrix.has_sorted_indices
+
+
+def test_dict_index_gives_the_same_matrix():
+    skill_lists = [['b', 'a'], ['c'], ['a', 'x']]
+    index = {'c': 0, 'a': 1, 'b': 2}
+
+    by_dict = encode_skill_lists(skill_lists, index)
+    by_index = encode_skill_lists(skill_lists, skill_index(['c', 'a', 'b']))
+
+    assert (by_dict != by_index).nnz == 0
+    assert by_dict.toarray().tolist() == [[0, 1, 1], [1, 0, 0], [0, 1, 0]]
+
+
+def test_large_vocabulary_shape():
+    vocabulary = [f'skill {idx}' for idx in range(50_000)]
+    rng = np.random.default_rng(0)
+    skill_lists = [[vocabulary[idx] for idx in rng.choice(len(vocabulary), 10, replace=False)] for _ in range(1000)]
+
+    matrix = encode_skill_lists(skill_lists, skill_index(vocabulary))
+
+    assert matrix.shape == (1000, 50_000)
+    assert matrix.nnz == 10_000
+    assert (np.diff(matrix.indptr) == 10).all()
+    row = skill_lists[7]
+    assert sorted(vocabulary[idx] for idx in matrix[7].indices) == sorted(row)
+
+
+def test_vocabulary_is_ranked_by_postings():
+    skill_lists = [['SQL', 'SQL', 'Python'], ['Python'], ['Excel', 'Python'], ['Excel']]
+
+    assert build_vocabulary(skill_lists) == ['Python', 'Excel', 'SQL']
+    assert build_vocabulary(skill_lists, min_count=2) == ['Python', 'Excel']
+    matrix, vocabulary = build_skill_matrix(skill_lists)
+    assert [vocabulary[idx] for idx in top_skill_indices(matrix, 2)] == ['Python', 'Excel']
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from scrapy.extensions.postprocessing import PostProcessingManager
+
+from parser.raw_feed import RAW_COLUMNS, iter_raw_rows
+
+zstandard = pytest.importorskip('zstandard')
+
+PLUGIN = 'indeed_project.feeds.ZstdPlugin'
+
+
+def item(idx: int) -> dict:
+    return {column: f'{column}-{idx}' for column in RAW_COLUMNS}
+
+
+def write_feed(path, items, mode='wb', **feed_options) -> None:
+    """Write items as JSON lines through plugin the way scrapy feed exporter does"""
+    feed = open(path, mode)
+    manager = PostProcessingManager([PLUGIN], feed, feed_options)
+    for record in items:
+        manager.write(json.dumps(record).encode('utf-8') + b'\n')
+    manager.close()
+    assert feed.closed
+
+
+def test_feed_round_trip(tmp_path):
+    path = str(tmp_path / 'feed.jsonl.zst')
+    items = [item(idx) for idx in range(100)]
+
+    write_feed(path, items, zstd_frame_size=1000)
+
+    assert [row for row in iter_raw_rows(path)] == [[record[column] for column in RAW_COLUMNS] for record in items]
+
+
+def test_appended_crawls_are_read_as_one_feed(tmp_path):
+    path = str(tmp_path / 'feed.jsonl.zst')
+
+    write_feed(path, [item(0), item(1)])
+    write_feed(path, [item(2)], mode='ab')
+
+    assert [row[RAW_COLUMNS.index('jobkey')] for row in iter_raw_rows(path)] == ['jobkey-0', 'jobkey-1', 'jobkey-2']
+
+
+def test_only_wanted_columns_are_decoded(tmp_path):
+    path = str(tmp_path / 'feed.jsonl.zst')
+    write_feed(path, [item(0)])
+
+    [row] = iter_raw_rows(path, ['jobkey', 'salaryText'])
+
+    assert row[RAW_COLUMNS.index('jobkey')] == 'jobkey-0'
+    assert row[RAW_COLUMNS.index('salaryText')] == 'salaryText-0'
+    assert row[RAW_COLUMNS.index('jobDescription')] is None
+
+
+def test_incomplete_last_frame_is_skipped(tmp_path):
+    path = tmp_path / 'feed.jsonl.zst'
+    write_feed(str(path), [item(idx) for idx in range(50)], zstd_frame_size=500)
+    complete = len(list(iter_raw_rows(str(path))))
+
+    # crawl was killed in the middle of the last frame
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+    rows = list(iter_raw_rows(str(path)))
+
+    assert complete == 50
+    assert 0 < len(rows) < 50
+    assert rows == list(iter_raw_rows(str(path)))[:len(rows)]
+
+
+def test_plain_feeds_are_read_by_column_names(tmp_path):
+    jsonl = tmp_path / 'feed.jsonl'
+    jsonl.write_text(json.dumps(item(0)) + '\n{"broken\n')
+    csv = tmp_path / 'feed.csv'
+    columns = list(reversed(RAW_COLUMNS))
+    csv.write_text(','.join(columns) + '\n' + ','.join(item(1)[column] for column in columns) + '\n')
+
+    assert list(iter_raw_rows(str(jsonl))) == [[item(0)[column] for column in RAW_COLUMNS]]
+    assert list(iter_raw_rows(str(csv))) == [[item(1)[column] for column in RAW_COLUMNS]]
+
+
+def test_only_json_lines_may_be_compressed(tmp_path):
+    path = tmp_path / 'feed.csv.zst'
+    path.write_bytes(b'')
+
+    with pytest.raises(ValueError):
+        list(iter_raw_rows(str(path)))
@@ -0,0 +1,80 @@
+import json
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from indeed_project.frontier import Search, build_frontier, product_searches, read_searches, split_arg
+from indeed_project.spiders.indeed_spider import IndeedSpider
+
+
+def make_spider(**kwargs) -> IndeedSpider:
+    return IndeedSpider.from_crawler(get_crawler(IndeedSpider), incremental='0', **kwargs)
+
+
+def search_response(request: Request, jobkeys: list[str], total=0) -> HtmlResponse:
+    model = {'results': [{'jobkey': jobkey} for jobkey in jobkeys], 'tierSummaries': [{'jobCount': total}]}
+    data = json.dumps({'metaData': {'mosaicProviderJobCardsModel': model}})
+    body = f'<script>window.mosaic.providerData["mosaic-provider-jobcards"]={data};</script>'
+    return HtmlResponse(request.url, body=body.encode('utf-8'), encoding='utf-8', request=request)
+
+
+def test_frontier_is_ordered_by_priority():
+    frontier = build_frontier([
+        Search('python', '', 1),
+        Search('java', 'Remote', 5),
+        Search('sql'),
+        Search(' Python ', ''),
+        Search('JAVA', ' remote', 10),
+    ])
+
+    assert [(search.keyword, search.priority) for search in frontier] == [('JAVA', 10), ('python', 1), ('sql', 0)]
+
+
+def test_searches_from_file_and_arguments(tmp_path):
+    path = tmp_path / 'frontier.csv'
+    path.write_text('keyword,location,priority\npython,"New York, NY",10\n,Remote,99\njava,,\n')
+
+    assert list(read_searches(str(path))) == [Search('python', 'New York, NY', 10), Search('java')]
+    assert split_arg('python; data engineer;') == ['python', 'data engineer', '']
+    assert list(product_searches(['python', ''], ['New York, NY', 'Remote'], 2)) == [
+        Search('python', 'New York, NY', 2), Search('python', 'Remote', 2),
+    ]
+    assert list(product_searches(['python'], [])) == [Search('python')]
+
+    spider = make_spider(frontier=str(path), keywords='python;sql', locations='New York, NY')
+    assert [(search.keyword, search.priority) for search in spider.load_frontier()] == \
+        [('python', 10), ('java', 0), ('sql', 0)]
+    assert make_spider().load_frontier() == [Search('python')]
+
+
+def test_priority_decays_with_page_depth():
+    spider = make_spider()
+    search = Search('python', '', 10)
+
+    assert [spider.search_request(search, offset).priority for offset in (0, 10, 50, 200)] == [10, 9, 5, -10]
+    # the deep page of important search goes before the first page of minor one
+    assert spider.search_request(search, 50).priority > spider.search_request(Search('sql', '', 2)).priority
+
+
+def test_next_page_goes_after_job_pages_of_current_page():
+    spider = make_spider()
+    first_page = spider.search_request(Search('python', '', 10))
+
+    [next_page, *job_pages] = spider.parse_search_results(search_response(first_page, ['a', 'b'], total=100))
+
+    assert next_page.meta['offset'] == 10
+    assert next_page.meta['search_jobkeys'] == ['a', 'b']
+    assert next_page.priority == 9
+    assert [(request.meta['jobKey'], request.priority) for request in job_pages] == [('a', 11), ('b', 11)]
+
+
+def test_search_stops_on_repeated_page():
+    spider = make_spider()
+    page = spider.search_request(Search('python'), 20, ['a', 'b'])
+
+    requests = list(spider.parse_search_results(search_response(page, ['a', 'b'])))
+
+    assert [request.meta['jobKey'] for request in requests] == ['a', 'b']
+    assert spider.crawler.stats.get_value('frontier/searches_done') == 1
+    assert spider.crawler.stats.get_value('frontier/pages') == 3
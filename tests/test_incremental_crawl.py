@@ -0,0 +1,96 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from indeed_project.spiders.indeed_spider import IndeedSpider
+from indeed_project.store import JobStore
+
+
+def html_response(url: str, body: str, meta: dict) -> HtmlResponse:
+    return HtmlResponse(url, body=body.encode('utf-8'), encoding='utf-8', request=Request(url, meta=meta))
+
+
+def search_response(jobkeys: list[str]) -> HtmlResponse:
+    data = {'metaData': {'mosaicProviderJobCardsModel': {'results': [{'jobkey': jobkey} for jobkey in jobkeys]}}}
+    body = f'<script>window.mosaic.providerData["mosaic-provider-jobcards"]={json.dumps(data)};</script>'
+    return html_response('https://www.indeed.com/jobs?q=python', body,
+                         {'keyword': 'python', 'location': '', 'offset': 0})
+
+
+def job_response(jobkey: str, body: str, refresh=False) -> HtmlResponse:
+    return html_response(f'https://www.indeed.com/m/basecamp/viewjob?jk={jobkey}', body,
+                         {'keyword': 'python', 'location': '', 'page': 1, 'position': 0, 'jobKey': jobkey,
+                          'refresh': refresh})
+
+
+JOB_PAGE = ('<script>window._initialData={"jobInfoWrapperModel": {"jobInfoModel": {"jobTitle": "Developer"}}, '
+            '"salaryInfoModel": {"salaryMin": 1, "salaryMax": 2, "salaryText": "$1 - $2 an hour"}};</script>')
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite')
+
+
+def make_spider(store_path: str, **kwargs) -> IndeedSpider:
+    crawler = get_crawler(IndeedSpider, {'JOB_STORE_PATH': store_path, 'RECRAWL_TTL_DAYS': 7})
+    return IndeedSpider.from_crawler(crawler, **kwargs)
+
+
+def fetched_days_ago(store_path: str, days: dict[str, float]) -> None:
+    store = JobStore(store_path)
+    store.mark_fetched(days)
+    now = datetime.now(timezone.utc)
+    store.connection.executemany('UPDATE crawl_index SET fetched_at = ? WHERE jobkey = ?',
+                                 [((now - timedelta(days=age)).isoformat(), jobkey) for jobkey, age in days.items()])
+    store.connection.commit()
+    store.close()
+
+
+def test_new_and_stale_jobkeys_are_selected(store_path):
+    fetched_days_ago(store_path, {'fresh': 1, 'stale': 10})
+    spider = make_spider(store_path)
+
+    selected = spider.select_for_fetch(['new', 'fresh', 'stale'])
+
+    assert selected == {'new': False, 'stale': True}
+    stats = spider.crawler.stats
+    assert [stats.get_value(f'incremental/{key}') for key in ('fetched_new', 'fetched_stale', 'skipped_fresh')] == \
+        [1, 1, 1]
+    seen = dict(spider.store.connection.execute('SELECT jobkey, last_seen_at FROM crawl_index'))
+    assert set(seen) == {'new', 'fresh', 'stale'}
+
+
+def test_full_crawl_selects_everything(store_path):
+    fetched_days_ago(store_path, {'fresh': 1})
+    spider = make_spider(store_path, incremental='0')
+
+    assert spider.store is None
+    assert spider.select_for_fetch(['new', 'fresh']) == {'new': False, 'fresh': False}
+
+
+def test_search_page_requests_only_selected_job_pages(store_path):
+    fetched_days_ago(store_path, {'fresh': 1, 'stale': 10})
+    spider = make_spider(store_path)
+    spider.max_pages = 1
+
+    requests = list(spider.parse_search_results(search_response(['new', 'fresh', 'stale'])))
+
+    assert {request.meta['jobKey']: request.meta['refresh'] for request in requests} == {'new': False, 'stale': True}
+
+
+def test_job_page_is_marked_fetched_after_successful_parse(store_path):
+    spider = make_spider(store_path)
+
+    assert list(spider.parse_job(job_response('broken', '<html>no data</html>'))) == []
+    [item] = spider.parse_job(job_response('parsed', JOB_PAGE, refresh=True))
+
+    assert item['refresh'] is True
+    assert set(spider.store.fetched_at(['broken', 'parsed'])) == {'parsed'}
+    assert spider.crawler.stats.get_value('extraction/job_failed') == 1
+    # page which failed extraction is requested again by the next crawl
+    assert spider.select_for_fetch(['broken', 'parsed']) == {'broken': False}
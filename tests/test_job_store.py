@@ -0,0 +1,95 @@
+import pytest
+
+from parser.job_store import JobStore
+from parser.raw_feed import RAW_COLUMNS
+
+
+def raw_item(jobkey: str, description='Python and SQL', salary_text='$100,000 a year') -> dict:
+    return {
+        'keyword': 'python', 'location': 'Remote', 'page': 1, 'position': 0, 'company': 'Acme', 'jobkey': jobkey,
+        'jobTitle': 'Developer', 'jobDescription': description, 'salaryMax': 100000, 'salaryMin': 100000,
+        'salaryText': salary_text,
+    }
+
+
+def cleaned(row: list, salary=100000.0) -> list:
+    """Cleaned row of raw row"""
+    raw = dict(zip(RAW_COLUMNS, row))
+    return [raw['keyword'], raw['jobkey'], raw['location'], raw['jobDescription'], salary]
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(str(tmp_path / 'data' / 'jobs.sqlite'))
+    yield job_store
+    job_store.close()
+
+
+def run_cleaning(store: JobStore) -> list[str]:
+    """Clean all new raw postings, jobkeys of cleaned ones"""
+    jobkeys = []
+    for batch in store.iter_new_raw(batch_size=2):
+        batch_jobkeys = [row[RAW_COLUMNS.index('jobkey')] for row in batch]
+        store.add_cleaned([cleaned(row) for row in batch], batch_jobkeys)
+        jobkeys.extend(batch_jobkeys)
+    return jobkeys
+
+
+def run_extraction(store: JobStore, skills: dict[str, list[str]]) -> list[str]:
+    jobkeys = []
+    for batch in store.iter_unextracted(batch_size=2):
+        store.add_skills([(row[1], skills[row[1]]) for row in batch], 'model', 'v1')
+        jobkeys.extend(row[1] for row in batch)
+    return jobkeys
+
+
+def test_round_trip(store):
+    store.add_raw([raw_item('a'), raw_item('b', 'Excel'), raw_item('c', 'Nothing')])
+    [batch] = store.iter_new_raw()
+    assert batch[0] == ['python', 'Remote', '1', '0', 'Acme', 'a', 'Developer', 'Python and SQL', '100000', '100000',
+                        '$100,000 a year']
+
+    assert run_cleaning(store) == ['a', 'b', 'c']
+    assert run_extraction(store, {'a': [' Python ', 'SQL', 'Python', ''], 'b': ['Excel'], 'c': []}) == ['a', 'b', 'c']
+
+    assert [posting for batch in store.iter_skill_sets(batch_size=1) for posting in batch] == [
+        {'jobkey': 'a', 'keyword': 'python', 'location': 'Remote', 'salary': 100000.0, 'skills': ['Python', 'SQL']},
+        {'jobkey': 'b', 'keyword': 'python', 'location': 'Remote', 'salary': 100000.0, 'skills': ['Excel']},
+    ]
+    assert store.skill_stats() == [('Excel', 1, 100000.0), ('Python', 1, 100000.0), ('SQL', 1, 100000.0)]
+    assert store.counts() == {'raw': 3, 'not_cleaned': 0, 'cleaned': 3, 'not_extracted': 0, 'with_skills': 2}
+    # every stage reads only new rows on the next run
+    assert run_cleaning(store) == []
+    assert run_extraction(store, {}) == []
+
+
+def test_recrawled_postings_are_kept_once(store):
+    store.add_raw([raw_item('same'), raw_item('changed'), raw_item('same')])
+    run_cleaning(store)
+    run_extraction(store, {'same': ['Python'], 'changed': ['SQL']})
+
+    store.add_raw([raw_item('same'), raw_item('changed', 'Python, SQL and AWS')])
+
+    assert sorted(store.iter_jobkeys()) == ['changed', 'same']
+    # only the posting with changed description goes through cleaning and extraction again
+    assert run_cleaning(store) == ['changed']
+    assert run_extraction(store, {'changed': ['SQL', 'AWS']}) == ['changed']
+    skills = {posting['jobkey']: posting['skills'] for batch in store.iter_skill_sets() for posting in batch}
+    assert {jobkey: sorted(values) for jobkey, values in skills.items()} == {'same': ['Python'],
+                                                                             'changed': ['AWS', 'SQL']}
+    assert store.counts()['cleaned'] == 2
+
+
+def test_raw_feed_import(store, tmp_path):
+    path = tmp_path / 'feed.csv'
+    items = [raw_item('a'), raw_item('b'), raw_item('a', 'New description')]
+    path.write_text(','.join(RAW_COLUMNS) + '\n' +
+                    ''.join(','.join(str(item[column]).replace(',', '') for column in RAW_COLUMNS) + '\n'
+                            for item in items))
+
+    assert store.import_raw_feed(str(path), batch_size=2) == 3
+
+    assert store.counts()['raw'] == 2
+    descriptions = {row[RAW_COLUMNS.index('jobkey')]: row[RAW_COLUMNS.index('jobDescription')]
+                    for batch in store.iter_new_raw() for row in batch}
+    assert descriptions == {'a': 'New description', 'b': 'Python and SQL'}
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from parser.clean_csv.openai_client import close_async_clients, close_clients, get_async_client, get_client
+from parser.clean_csv.skill_extractor import ExtractionConfig, SkillExtractionEngine, build_messages
+
+
+def test_sync_client_is_shared_and_keeps_connection(completion_server):
+    config = completion_server.client_config(http2=False)
+    try:
+        assert get_client(config) is get_client(config)
+        for idx in range(5):
+            response = get_client(config).chat.completions.create(model='test', messages=build_messages(f'd {idx}'))
+            assert response.choices[0].message.content == f'{{"skills": ["d {idx}"]}}'
+    finally:
+        close_clients()
+    assert completion_server.connections == 1
+
+
+def test_async_clients_are_shared_inside_loop(completion_server):
+    config = completion_server.client_config(http2=False)
+
+    async def clients():
+        try:
+            return get_async_client(config), get_async_client(config)
+        finally:
+            await close_async_clients()
+
+    first, second = asyncio.run(clients())
+    assert first is second
+    assert asyncio.run(clients())[0] is not first
+
+
+@pytest.mark.usefixtures('offline_encoding')
+def test_engine_keeps_connections_between_batches(completion_server):
+    engine = SkillExtractionEngine(ExtractionConfig(client=completion_server.client_config(http2=False),
+                                                    concurrency=2))
+    try:
+        for batch in range(3):
+            engine.extract_skills([(f'job{idx}', f'description {batch} {idx}') for idx in range(4)])
+    finally:
+        engine.close()
+    assert len(completion_server.descriptions) == 12
+    assert completion_server.connections <= 2
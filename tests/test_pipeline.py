@@ -0,0 +1,142 @@
+import json
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from indeed_project.pipelines import IndeedProjectPipeline
+from indeed_project.spiders.indeed_spider import IndeedSpider
+from indeed_project.store import JobStore
+
+
+def job_response(jobkey: str, salary=None, refresh=False) -> HtmlResponse:
+    """Job page with hidden JSON data as Indeed serves it"""
+    data = {
+        'jobInfoWrapperModel': {'jobInfoModel': {
+            'companyName': 'Acme', 'jobTitle': 'Python developer', 'sanitizedJobDescription': '<p>Python, SQL</p>',
+        }},
+        'salaryInfoModel': salary,
+    }
+    body = f'<html><script>window._initialData={json.dumps(data)};</script></html>'
+    request = Request(
+            f'https://www.indeed.com/m/basecamp/viewjob?viewtype=embedded&jk={jobkey}',
+            meta={'keyword': 'python', 'location': '', 'page': 1, 'position': 0, 'jobKey': jobkey,
+                  'refresh': refresh},
+    )
+    return HtmlResponse(request.url, body=body.encode('utf-8'), encoding='utf-8', request=request)
+
+
+SALARY = {'salaryMin': 100000, 'salaryMax': 120000, 'salaryText': ' $100,000 - $120,000 a year '}
+
+
+class Crawl:
+    """Spider and pipeline of one crawl without network and engine, items go from parse_job through pipeline"""
+
+    def __init__(self, store_path: str, **settings):
+        self.crawler = get_crawler(IndeedSpider, {'JOB_STORE_PATH': store_path, **settings})
+        self.spider = IndeedSpider.from_crawler(self.crawler, incremental='0')
+        self.pipeline = IndeedProjectPipeline.from_crawler(self.crawler)
+        self.pipeline.open_spider(self.spider)
+
+    def process(self, response: HtmlResponse) -> dict:
+        [item] = self.spider.parse_job(response)
+        return self.pipeline.process_item(item, self.spider)
+
+    def stat(self, key: str) -> int:
+        return self.crawler.stats.get_value(f'job_store/{key}', 0)
+
+    def close(self) -> None:
+        self.pipeline.close_spider(self.spider)
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite')
+
+
+def stored_jobkeys(store_path: str) -> list[str]:
+    store = JobStore(store_path)
+    try:
+        return sorted(store.iter_jobkeys())
+    finally:
+        store.close()
+
+
+def test_items_without_salary_are_dropped(store_path):
+    crawl = Crawl(store_path)
+
+    with pytest.raises(DropItem):
+        crawl.process(job_response('nosalary'))
+    with pytest.raises(DropItem):
+        crawl.process(job_response('nobounds', {'salaryText': 'Competitive'}))
+    crawl.close()
+
+    assert crawl.stat('dropped_no_salary') == 2
+    assert stored_jobkeys(store_path) == []
+
+
+def test_salary_is_normalized(store_path):
+    crawl = Crawl(store_path)
+
+    item = crawl.process(job_response('swapped', {'salaryMin': '90', 'salaryMax': 70, 'salaryText': ' $70 - $90 '}))
+    single = crawl.process(job_response('single', {'salaryMin': 50000, 'salaryText': 'From $50,000'}))
+    crawl.close()
+
+    assert (item['salaryMin'], item['salaryMax'], item['salaryText']) == (70.0, 90.0, '$70 - $90')
+    assert (single['salaryMin'], single['salaryMax']) == (50000.0, 50000.0)
+    assert 'refresh' not in item
+
+
+@pytest.mark.parametrize('backend', ['set', 'bloom'])
+def test_duplicates_are_dropped_within_and_across_crawls(store_path, tmp_path, backend):
+    settings = {'DEDUPE_BACKEND': backend, 'DEDUPE_BLOOM_PATH': str(tmp_path / 'seen.bloom'),
+                'DEDUPE_BLOOM_CAPACITY': 1000}
+    crawl = Crawl(store_path, **settings)
+    crawl.process(job_response('first', SALARY))
+    with pytest.raises(DropItem):
+        crawl.process(job_response('first', SALARY))
+    crawl.close()
+    assert crawl.stat('dropped_duplicate') == 1
+    assert (tmp_path / 'seen.bloom').exists() == (backend == 'bloom')
+
+    # the next crawl knows jobkeys from job store or from saved Bloom filter
+    crawl = Crawl(store_path, **settings)
+    with pytest.raises(DropItem):
+        crawl.process(job_response('first', SALARY))
+    crawl.process(job_response('second', SALARY))
+    crawl.close()
+
+    assert stored_jobkeys(store_path) == ['first', 'second']
+
+
+def test_refetched_stale_jobkey_is_kept_once(store_path):
+    crawl = Crawl(store_path)
+    crawl.process(job_response('stale', SALARY))
+    crawl.close()
+
+    crawl = Crawl(store_path)
+    item = crawl.process(job_response('stale', SALARY, refresh=True))
+    with pytest.raises(DropItem):
+        crawl.process(job_response('stale', SALARY, refresh=True))
+    crawl.close()
+
+    assert item['jobkey'] == 'stale'
+    assert crawl.stat('dropped_duplicate') == 1
+
+
+def test_items_are_written_in_batches(store_path):
+    crawl = Crawl(store_path, JOB_STORE_BATCH_SIZE=2)
+
+    crawl.process(job_response('a', SALARY))
+    assert stored_jobkeys(store_path) == []
+    crawl.process(job_response('b', SALARY))
+    assert stored_jobkeys(store_path) == ['a', 'b']
+    crawl.process(job_response('c', SALARY))
+    assert crawl.stat('written') == 2
+
+    # the rest of the buffer is written on close
+    crawl.close()
+    assert stored_jobkeys(store_path) == ['a', 'b', 'c']
+    assert crawl.stat('written') == 3
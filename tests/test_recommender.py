@@ -0,0 +1,66 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from parser.predictor.recommender import recommend_skills
+
+VOCABULARY = ['Python', 'SQL', 'AWS', 'Excel', 'Go', 'Rust']
+WEIGHTS = np.array([10, 5, 8, 1, 7, 3], dtype=float)
+
+
+class WeightModel:
+    """Salary is the sum of skill weights plus bonus for Excel with Rust, calls are counted"""
+
+    def __init__(self, pair_bonus=0.0):
+        self.pair_bonus = pair_bonus
+        self.calls = []
+
+    def predict(self, matrix):
+        self.calls.append(matrix.shape[0])
+        dense = matrix.toarray()
+        return dense @ WEIGHTS + self.pair_bonus * dense[:, 3] * dense[:, 5]
+
+
+def salary_of(skills: list[str], pair_bonus=0.0) -> float:
+    row = np.array([skill in skills for skill in VOCABULARY], dtype=float)
+    return float(row @ WEIGHTS + pair_bonus * row[3] * row[5])
+
+
+def test_best_combinations_first():
+    recommendations = recommend_skills(WeightModel(), VOCABULARY, ['Python'], k=2, top=3)
+
+    assert [(rec.skills, rec.salary, rec.gain) for rec in recommendations] == [
+        (['AWS', 'Go'], 25, 15), (['SQL', 'AWS'], 23, 13), (['SQL', 'Go'], 22, 12),
+    ]
+
+
+@pytest.mark.parametrize('k, top, size', [(1, 10, 5), (2, 10, 10), (3, 4, 4), (10, 5, 1)])
+def test_number_of_recommendations(k, top, size):
+    recommendations = recommend_skills(WeightModel(), VOCABULARY, ['Python'], k=k, beam_width=10, top=top)
+
+    assert len(recommendations) == size
+    assert all(len(rec.skills) == min(k, 5) and 'Python' not in rec.skills for rec in recommendations)
+    assert len({tuple(rec.skills) for rec in recommendations}) == size
+    salaries = [rec.salary for rec in recommendations]
+    assert salaries == sorted(salaries, reverse=True)
+
+
+def test_wide_beam_finds_what_greedy_search_misses():
+    greedy = recommend_skills(WeightModel(pair_bonus=20), VOCABULARY, [], k=2, beam_width=1, top=1)
+    beam = recommend_skills(WeightModel(pair_bonus=20), VOCABULARY, [], k=2, beam_width=6, top=1)
+    exhaustive = max(combinations(VOCABULARY, 2), key=lambda pair: salary_of(list(pair), pair_bonus=20))
+
+    assert greedy[0].skills == ['Python', 'AWS']
+    assert beam[0].skills == list(exhaustive) == ['Excel', 'Rust']
+    assert beam[0].salary == salary_of(['Excel', 'Rust'], pair_bonus=20) > greedy[0].salary
+
+
+def test_candidates_unknown_skills_and_batches():
+    model = WeightModel()
+    recommendations = recommend_skills(model, VOCABULARY, ['Python', 'Cobol'], k=1, top=5,
+                                       candidates=['Excel', 'Rust', 'Python', 'Haskell'], batch_size=1)
+
+    assert [(rec.skills, rec.gain) for rec in recommendations] == [(['Rust'], 3), (['Excel'], 1)]
+    # one call for current skills and one call per candidate row
+    assert model.calls == [1, 1, 1]
@@ -0,0 +1,163 @@
+import pytest
+from scrapy import Request, Spider
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.test import get_crawler
+
+fakeredis = pytest.importorskip('fakeredis')
+pytest.importorskip('lupa')
+
+from indeed_project import scheduler as scheduler_module  # noqa: E402
+from indeed_project.scheduler import LEASE_META_KEY, RedisScheduler  # noqa: E402
+
+
+class DummySpider(Spider):
+    name = 'dummy'
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def workers(server):
+    """Start schedulers of several workers on one Redis server, they are closed as crashed ones at the end"""
+    started = []
+
+    def start(**kwargs):
+        crawler = get_crawler(DummySpider)
+        spider = DummySpider()
+        spider.crawler = crawler
+        scheduler = RedisScheduler(crawler, fakeredis.FakeRedis(server=server), **kwargs)
+        scheduler.open(spider)
+        started.append(scheduler)
+        return scheduler
+
+    yield start
+    for scheduler in started:
+        if scheduler.heartbeat.running:
+            scheduler.heartbeat.stop()
+
+
+def crash(scheduler: RedisScheduler) -> None:
+    """Worker dies without closing its scheduler, its heartbeat expires"""
+    scheduler.heartbeat.stop()
+    scheduler.server.delete(scheduler.leases.heartbeat_key)
+
+
+def drain(scheduler: RedisScheduler) -> list[str]:
+    urls = []
+    while (request := scheduler.next_request()) is not None:
+        urls.append(request.url)
+        scheduler.request_left_downloader(request, scheduler.spider)
+    return urls
+
+
+def test_workers_share_queue_in_priority_order(workers):
+    first, second = workers(), workers()
+    first.enqueue_request(Request('https://example.com/low', priority=0))
+    second.enqueue_request(Request('https://example.com/high', priority=10))
+    first.enqueue_request(Request('https://example.com/middle', priority=5))
+
+    taken = [first.next_request().url, second.next_request().url, first.next_request().url]
+
+    assert taken == ['https://example.com/high', 'https://example.com/middle', 'https://example.com/low']
+    assert second.next_request() is None
+    assert not first.has_pending_requests()
+
+
+def test_dupefilter_is_shared_between_workers(workers):
+    first, second = workers(), workers()
+
+    assert first.enqueue_request(Request('https://example.com/job'))
+    assert not second.enqueue_request(Request('https://example.com/job'))
+    assert second.enqueue_request(Request('https://example.com/job', dont_filter=True))
+    assert second.stats.get_value('dupefilter/filtered') == 1
+
+
+def test_seen_request_is_scheduled_again_after_ttl(workers, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(scheduler_module.time, 'time', lambda: now)
+    first = workers(dupefilter_ttl=3600)
+    assert first.enqueue_request(Request('https://example.com/job'))
+    drain(first)
+
+    now += 1800
+    assert not first.enqueue_request(Request('https://example.com/job'))
+
+    # the next sweep fetches the page again
+    now += 3600
+    second = workers(dupefilter_ttl=3600)
+    assert second.server.zcard(second.dupefilter.key) == 0
+    assert second.enqueue_request(Request('https://example.com/job'))
+
+
+def test_requests_of_crashed_worker_are_requeued(workers):
+    first = workers()
+    first.enqueue_request(Request('https://example.com/1'))
+    first.enqueue_request(Request('https://example.com/2'))
+    done = first.next_request()
+    first.request_left_downloader(done, first.spider)
+    in_flight = first.next_request()
+    crash(first)
+
+    second = workers()
+
+    assert second.next_request().url == in_flight.url
+    assert second.next_request() is None
+    assert second.stats.get_value('scheduler/requeued/redis') == 1
+
+
+def test_idle_worker_requeues_requests_of_crashed_worker(workers):
+    idle, busy = workers(idle_timeout=0), workers()
+    busy.enqueue_request(Request('https://example.com/job'))
+    busy.next_request()
+
+    # live worker holds a lease, it may still bring new requests
+    with pytest.raises(DontCloseSpider):
+        idle.spider_idle(idle.spider)
+
+    crash(busy)
+    with pytest.raises(DontCloseSpider):
+        idle.spider_idle(idle.spider)
+    assert drain(idle) == ['https://example.com/job']
+    idle.idle_since = None
+    idle.spider_idle(idle.spider)
+
+
+def test_replacing_request_releases_lease(workers):
+    worker = workers()
+    worker.enqueue_request(Request('https://example.com/job'))
+    request = worker.next_request()
+    assert len(worker.leases) == 1
+
+    # proxy middleware or retry gives a new request with copied meta
+    replacement = request.replace(url='https://proxy.example.com/?url=job')
+    assert worker.enqueue_request(replacement)
+
+    assert LEASE_META_KEY not in replacement.meta
+    assert len(worker.leases) == 0
+    assert len(worker.queue) == 1
+
+
+def test_close_requeues_unfinished_requests(workers):
+    first = workers()
+    first.enqueue_request(Request('https://example.com/job'))
+    first.next_request()
+
+    first.close('shutdown')
+
+    second = workers()
+    assert drain(second) == ['https://example.com/job']
+    assert not second.server.exists(first.leases.heartbeat_key)
+
+
+def test_finished_worker_drops_leases_of_ignored_requests(workers):
+    first = workers()
+    first.enqueue_request(Request('https://example.com/ignored'))
+    first.next_request()
+
+    first.close('finished')
+
+    assert len(first.leases) == 0
+    assert not first.has_pending_requests()
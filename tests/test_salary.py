@@ -0,0 +1,76 @@
+import math
+
+import pandas as pd
+import pytest
+
+from parser.clean_csv.salary import PERIOD_FACTORS, UNKNOWN_PERIOD, normalize_salaries
+
+
+def normalize(*postings) -> pd.DataFrame:
+    """Normalized salaries of (salaryMin, salaryMax, salaryText) postings"""
+    return normalize_salaries(pd.DataFrame(postings, columns=['salaryMin', 'salaryMax', 'salaryText']))
+
+
+@pytest.mark.parametrize('text, period', [
+    ('$20 - $25 an hour', 'hour'),
+    ('$20 - $25 /hr', 'hour'),
+    ('$20 - $25 hourly', 'hour'),
+    ('$20 - $25 per hour', 'hour'),
+    ('$200 a day', 'day'),
+    ('$200 daily', 'day'),
+    ('$1,000 a week', 'week'),
+    ('$1,000/wk', 'week'),
+    ('$1,000 weekly', 'week'),
+    ('$5,000 a month', 'month'),
+    ('$5,000/mo', 'month'),
+    ('$5,000 monthly', 'month'),
+    ('$90,000 a year', 'year'),
+    ('$90,000/yr', 'year'),
+    ('$90,000 per annum', 'year'),
+    ('$90,000 annually', 'year'),
+])
+def test_period_aliases(text, period):
+    frame = normalize((20, 25, text))
+
+    assert frame['period'].iat[0] == period
+    assert frame['salary'].iat[0] == pytest.approx(22.5 * PERIOD_FACTORS[period])
+
+
+def test_text_without_period_is_not_annualized():
+    frame = normalize((20, 25, '$20 - $25'), (90000, 100000, 'Competitive'))
+
+    assert frame['period'].tolist() == [UNKNOWN_PERIOD, UNKNOWN_PERIOD]
+    assert frame['salary'].isna().all()
+    assert not frame['outlier'].any()
+
+
+def test_bounds_are_fixed():
+    frame = normalize(
+            (120000, 100000, '$100,000 - $120,000 a year'),
+            ('noSalaryMinInfo', 50, '$50 an hour'),
+            ('40', 'noSalaryMaxInfo', '$40 an hour'),
+            ('noSalaryInfoAtAll', 'noSalaryInfoAtAll', 'noSalaryInfoAtAll'),
+    )
+
+    assert frame[['annual_min', 'annual_max']].iloc[0].tolist() == [100000, 120000]
+    assert frame['salary'].iat[1] == 50 * PERIOD_FACTORS['hour']
+    assert frame['annual_min'].iat[2] == frame['annual_max'].iat[2] == 40 * PERIOD_FACTORS['hour']
+    assert math.isnan(frame['salary'].iat[3])
+
+
+def test_outliers_are_flagged():
+    frame = normalize((90000, 100000, '$90,000 - $100,000 an hour'), (5, 5, '$5 a year'),
+                      (90000, 100000, '$90,000 - $100,000 a year'))
+
+    assert frame['outlier'].tolist() == [True, True, False]
+
+
+def test_currency():
+    frame = normalize((1, 1, '£30,000 a year'), (1, 1, 'C$40 an hour'), (1, 1, 'EUR 3,000 a month'),
+                      (1, 1, '50,000 a year'))
+
+    assert frame['currency'].tolist() == ['GBP', 'CAD', 'EUR', 'USD']
+
+
+def test_empty_frame():
+    assert normalize().empty
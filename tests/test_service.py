@@ -0,0 +1,75 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from parser.predictor.artifacts import Artifacts
+from parser.predictor.service import PredictionService, _make_handler
+
+
+class SkillCountModel:
+    """Salary is 1000 per known skill"""
+
+    def predict(self, matrix):
+        return np.asarray(matrix.sum(axis=1)).ravel() * 1000
+
+
+@pytest.fixture
+def service():
+    artifacts = Artifacts('test', {'count': SkillCountModel()}, ['Python', 'SQL', 'AWS'])
+    # long wait collects all submitted requests into one batch
+    prediction_service = PredictionService(artifacts, 'count', max_wait_ms=200)
+    yield prediction_service
+    prediction_service.close()
+
+
+@pytest.mark.parametrize('skills', ['Python, SQL', ['Python', ['SQL']], [{'Python'}], None])
+def test_malformed_skills_are_rejected_before_queueing(service, skills):
+    with pytest.raises(TypeError):
+        service.submit(skills)
+    with pytest.raises(TypeError):
+        service.predict_many([['Python'], skills])
+
+
+def test_broken_request_does_not_fail_its_batch(service, monkeypatch):
+    predict = service._predict
+
+    def fail_on_go(skill_sets):
+        if any('Go' in skills for skills in skill_sets):
+            raise ValueError('broken skill set')
+        return predict(skill_sets)
+
+    monkeypatch.setattr(service, '_predict', fail_on_go)
+    futures = [service.submit(['Python', 'SQL']), service.submit(['Go']), service.submit(['AWS'])]
+    assert futures[0].result(5) == 2000
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == 1000
+
+
+def test_http_api(service):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/predict'
+
+    def post(payload) -> tuple[int, dict]:
+        request = urllib.request.Request(url, json.dumps(payload).encode('utf-8'), method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    try:
+        assert post({'skills': ['Python', 'Rust']}) == (200, {'salary': 1000.0})
+        assert post({'skill_sets': [['SQL'], []]}) == (200, {'salaries': [1000.0, 0.0]})
+        assert post({'skills': 'Python, SQL'})[0] == 400
+        assert post({'skill_sets': [['SQL'], 'AWS']})[0] == 400
+        assert post(['Python'])[0] == 400
+    finally:
+        server.shutdown()
+        server.server_close()
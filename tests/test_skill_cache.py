@@ -0,0 +1,23 @@
+from parser.clean_csv.skill_cache import SkillCache
+
+
+def test_description_is_the_key(tmp_path):
+    cache = SkillCache(str(tmp_path / 'cache.sqlite'), 'model', 'v1')
+    cache.put_many([('job1', 'Python and  SQL', ['Python', 'SQL'])])
+    assert cache.get_many([('job2', 'python and sql'), ('job1', 'Go and Rust')]) == [['Python', 'SQL'], None]
+    assert SkillCache(str(tmp_path / 'cache.sqlite'), 'model', 'v2').get_many([('job1', 'Python and SQL')]) == [None]
+
+
+def test_jobkey_lookup_only_for_entries_without_description(tmp_path):
+    cache = SkillCache(str(tmp_path / 'cache.sqlite'), 'model', 'v1')
+    cache.put_many([('job1', None, ['Excel']), ('job2', 'Python', ['Python'])])
+    assert cache.get_many([('job1', 'any text'), ('job2', 'Java')]) == [['Excel'], None]
+
+
+def test_evict(tmp_path):
+    cache = SkillCache(str(tmp_path / 'cache.sqlite'), 'model', 'v1', max_entries=2)
+    cache.put_many([(f'job{idx}', f'text {idx}', [str(idx)]) for idx in range(3)])
+    cache.get_many([('job0', 'text 0')])
+    assert cache.evict() == 1
+    assert cache.get_many([(f'job{idx}', f'text {idx}') for idx in range(3)]).count(None) == 1
+    assert cache.get_many([('job0', 'text 0')]) == [['0']]
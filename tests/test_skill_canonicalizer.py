@@ -0,0 +1,58 @@
+import pytest
+
+from parser.clean_csv.skill_canonicalizer import SkillCanonicalizer, is_misspelling, skill_key
+
+
+# distinct or even opposite skills which look alike
+DISTINCT_SKILLS = [
+    ('unstructured data', 'structured data'),
+    ('inorganic chemistry', 'organic chemistry'),
+    ('non-functional requirements', 'functional requirements'),
+    ('qualitative analysis', 'quantitative analysis'),
+    ('valuation', 'evaluation'),
+    ('progression testing', 'regression testing'),
+    ('software developer', 'software'),
+    ('system engineering', 'systems'),
+    ('development', 'web development'),
+    ('mechanical engineering', 'mechanical experience'),
+    ('MI Engineer', 'AI Engineer'),
+]
+
+
+@pytest.mark.parametrize('skill, other', DISTINCT_SKILLS)
+def test_distinct_skills_are_not_merged(skill, other):
+    # the other skill is more frequent, so it would be canonical one of merged group
+    learned = SkillCanonicalizer.learn([[other]] * 5 + [[skill]])
+    canonicalizer = SkillCanonicalizer(learned)
+    assert canonicalizer.canonical(skill) == skill
+    assert canonicalizer.canonical(other) == other
+
+
+@pytest.mark.parametrize('skill, other', DISTINCT_SKILLS)
+def test_distinct_skills_are_not_misspellings(skill, other):
+    assert not is_misspelling(skill_key(skill), skill_key(other))
+
+
+def test_sis_words_are_not_singularized():
+    assert skill_key('Data Analysis') == 'data analysis'
+    assert skill_key('Redis') == 'redis'
+    assert skill_key('AngularJS') == 'angularjs'
+
+
+@pytest.mark.parametrize('skill, canonical', [
+    ('kubernets', 'Kubernetes'),
+    ('python programming', 'Python'),
+    ('Python 3', 'Python'),
+    ('node js', 'Node.js'),
+    ('AWS Cloud', 'AWS'),
+    ('relational databases', 'relational database'),
+])
+def test_spellings_are_merged(skill, canonical):
+    skill_lists = [['Kubernetes', 'Python', 'Node.js', 'AWS', 'relational database']] * 5 + [[skill]]
+    canonicalizer = SkillCanonicalizer(SkillCanonicalizer.learn(skill_lists))
+    assert canonicalizer.canonical(skill) == canonical
+
+
+def test_manual_aliases_win():
+    canonicalizer = SkillCanonicalizer({'postgres': 'postgres'}, {'Postgres': 'PostgreSQL'})
+    assert canonicalizer.canonicalize(['postgres', 'PostgreSQL', ' ']) == ['PostgreSQL']
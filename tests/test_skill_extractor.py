@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from parser.clean_csv.skill_extractor import (
+    PACKED_PROMPT_VERSION,
+    PROMPT_VERSION,
+    ExtractionConfig,
+    RateLimiter,
+    SkillExtractionEngine,
+    build_packed_messages,
+)
+
+
+pytestmark = pytest.mark.usefixtures('offline_encoding')
+
+
+def make_engine(server, **kwargs) -> SkillExtractionEngine:
+    return SkillExtractionEngine(ExtractionConfig(client=server.client_config(http2=False), backoff_base=0.01,
+                                                  **kwargs))
+
+
+def test_results_keep_order(completion_server):
+    descriptions = [f'description {idx}' for idx in range(20)]
+    # the first descriptions are answered last
+    completion_server.delays = {description: 0.05 * (20 - idx) / 20 for idx, description in enumerate(descriptions)}
+    engine = make_engine(completion_server, concurrency=10)
+    try:
+        skills = engine.extract_skills([(f'job{idx}', description) for idx, description in enumerate(descriptions)])
+    finally:
+        engine.close()
+    assert skills == [[description] for description in descriptions]
+    assert sorted(completion_server.descriptions) == sorted(descriptions)
+
+
+def test_rate_limited_requests_are_retried(completion_server):
+    descriptions = [f'description {idx}' for idx in range(6)]
+    completion_server.rate_limited = {'description 1': 2, 'description 4': 1}
+    engine = make_engine(completion_server, concurrency=3)
+    try:
+        skills = engine.extract_skills([(f'job{idx}', description) for idx, description in enumerate(descriptions)])
+    finally:
+        engine.close()
+    assert skills == [[description] for description in descriptions]
+    assert completion_server.descriptions.count('description 1') == 3
+    assert completion_server.descriptions.count('description 4') == 2
+    assert len(completion_server.descriptions) == 9
+
+
+def test_gives_up_after_max_retries(completion_server):
+    completion_server.rate_limited = {'description 0': 10}
+    engine = make_engine(completion_server, max_retries=2)
+    try:
+        skills = engine.extract_skills([('job0', 'description 0'), ('job1', 'description 1')])
+    finally:
+        engine.close()
+    assert skills == [None, ['description 1']]
+    assert completion_server.descriptions.count('description 0') == 3
+
+
+def test_concurrency_is_bounded(completion_server):
+    descriptions = [f'description {idx}' for idx in range(12)]
+    completion_server.delays = dict.fromkeys(descriptions, 0.05)
+    engine = make_engine(completion_server, concurrency=3)
+    try:
+        engine.extract_skills([(f'job{idx}', description) for idx, description in enumerate(descriptions)])
+    finally:
+        engine.close()
+    # every request in flight holds its own keep-alive connection
+    assert completion_server.connections <= 3
+
+
+def packed_items(count: int) -> list[tuple[str, str]]:
+    return [(f'job{idx}', f'description {idx}') for idx in range(count)]
+
+
+def test_descriptions_are_packed(completion_server):
+    engine = make_engine(completion_server, pack_size=3)
+    try:
+        skills = engine.extract_skills_versioned(packed_items(7))
+    finally:
+        engine.close()
+    assert skills == [([f'description {idx}'], PACKED_PROMPT_VERSION) for idx in range(7)]
+    assert sorted(completion_server.packs) == [['job0', 'job1', 'job2'], ['job3', 'job4', 'job5'], ['job6']]
+    assert completion_server.descriptions == []
+
+
+def test_pack_is_split_by_token_budget(offline_encoding):
+    engine = SkillExtractionEngine(ExtractionConfig(pack_size=10, pack_token_budget=1500, completion_tokens=100))
+    items = packed_items(4) + [('long', 'x' * 2000)] + packed_items(2)
+
+    packs = engine.pack(items)
+
+    assert [len(pack) for pack in packs] == [4, 1, 2]
+    assert all(len(pack) == 1 or engine.count_tokens(build_packed_messages(pack)) + 100 * len(pack) <= 1500
+               for pack in packs)
+
+
+def test_missed_and_malformed_answers_fall_back_to_single_prompt(completion_server):
+    completion_server.omitted = {'job1'}
+    engine = make_engine(completion_server, pack_size=3)
+    try:
+        partial = engine.extract_skills_versioned(packed_items(3))
+        completion_server.malformed = True
+        malformed = engine.extract_skills_versioned(packed_items(2))
+    finally:
+        engine.close()
+    assert partial == [(['description 0'], PACKED_PROMPT_VERSION), (['description 1'], PROMPT_VERSION),
+                       (['description 2'], PACKED_PROMPT_VERSION)]
+    assert malformed == [(['description 0'], PROMPT_VERSION), (['description 1'], PROMPT_VERSION)]
+    # broken answer is not retried as a pack
+    assert len(completion_server.packs) == 2
+    assert completion_server.descriptions.count('description 1') == 2
+
+
+def test_failed_pack_is_not_requested_one_by_one(completion_server):
+    # packed request is rate limited by its last description
+    completion_server.rate_limited = {'description 1': 10}
+    engine = make_engine(completion_server, pack_size=2, max_retries=1)
+    try:
+        skills = engine.extract_skills(packed_items(3))
+    finally:
+        engine.close()
+    assert skills == [None, None, ['description 2']]
+    assert len(completion_server.packs) == 3
+    assert completion_server.descriptions == []
+
+
+def test_rate_limiter_works_on_new_event_loops():
+    # one request per 10 ms, so acquires wait inside the lock
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=10 ** 6, period=0.01)
+
+    async def contend():
+        await asyncio.gather(*(limiter.acquire(10) for _ in range(5)))
+
+    # engine closes its loop and creates a new one, waiters contend for the lock on every loop
+    for _ in range(3):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(contend())
+        finally:
+            loop.close()
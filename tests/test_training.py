@@ -0,0 +1,11 @@
+import numpy as np
+import pytest
+
+from parser.predictor.training import search_models
+
+
+def test_unknown_models_are_rejected_before_search(tmp_path):
+    X, y = np.ones((10, 2)), np.arange(10.0)
+
+    with pytest.raises(ValueError, match='boosted_trees.*available models: linear, random_forest'):
+        search_models(X, y, ['linear', 'boosted_trees'], cache_dir=str(tmp_path))